@@ -0,0 +1,209 @@
+"""Catálogo de pesos de modelos, construido una vez por proceso.
+
+Antes cada búsqueda recorría todos los directorios candidatos (y en
+``sitecustomize`` también cada entrada de ``sys.path``) con
+``resolve()``/``exists()``/``stat()`` por nombre. Ahora:
+
+- Al primer uso se listan con un solo ``scandir`` los directorios
+  conocidos y se anota tamaño y mtime de cada archivo de pesos.
+- Las resoluciones se guardan; un acierto cuesta un ``stat`` para validar
+  que el archivo no cambió (si cambió, se vuelve a indexar).
+- Un fallo (o un acierto por un nombre equivalente) solo reindexa si
+  cambió el mtime de algún directorio (se agregó o quitó un archivo).
+- El SHA-256 se calcula bajo demanda y se conserva mientras no cambie el mtime.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sys
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+BASE_MODELS_DIR = Path(__file__).resolve().parent
+WEIGHT_EXTS = (".pt", ".pth", ".onnx", ".engine", ".torchscript")
+
+# Nombres equivalentes del modelo propio (incluye variantes con la ñ mal
+# decodificada que aparecen al copiar el archivo entre sistemas)
+PRIMARY_NAMES = ("ninera.pt", "NiñeraV.pt", "Ni�eraV.pt", "Ni��eraV.pt", "nineraV.pt")
+# Si falta el detector pedido se usa otro YOLOv8, del más liviano al más pesado
+DETECTOR_NAMES = ("yolov8n.pt", "yolov8s.pt", "yolov8m.pt")
+
+
+def _key(name: str) -> str:
+    return unicodedata.normalize("NFC", name).casefold()
+
+
+def candidate_names(requested: str) -> Tuple[str, ...]:
+    """Nombre pedido primero y luego sus equivalentes conocidos."""
+    requested = requested.strip()
+    key = _key(requested)
+    if key in {_key(n) for n in PRIMARY_NAMES} or key.startswith("ninerav") or key.startswith("ni�"):
+        family: Sequence[str] = PRIMARY_NAMES
+    elif key.startswith("yolov8"):
+        family = DETECTOR_NAMES
+    else:
+        family = ()
+    out = [requested]
+    for name in family:
+        if _key(name) not in {_key(n) for n in out}:
+            out.append(name)
+    return tuple(out)
+
+
+@dataclass
+class ModelEntry:
+    path: Path
+    size: int
+    mtime_ns: int
+    _sha256: Optional[str] = field(default=None, repr=False)
+
+    def is_current(self) -> bool:
+        try:
+            st = self.path.stat()
+        except OSError:
+            return False
+        return st.st_size == self.size and st.st_mtime_ns == self.mtime_ns
+
+    @property
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            h = hashlib.sha256()
+            with open(self.path, "rb") as fh:
+                for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                    h.update(chunk)
+            self._sha256 = h.hexdigest()
+        return self._sha256
+
+    def as_dict(self, with_hash: bool = False) -> dict:
+        out = {"path": str(self.path), "size": self.size, "mtime_ns": self.mtime_ns}
+        if with_hash:
+            out["sha256"] = self.sha256
+        return out
+
+
+def default_dirs() -> List[Path]:
+    """Directorios donde viven los pesos en el repo, en Docker y en desarrollo."""
+    project = BASE_MODELS_DIR.parent  # entrenamiento_niñeravirtual2
+    repo = project.parent
+    dirs = [
+        BASE_MODELS_DIR,
+        project / "ninera_virtual" / "ml_models",
+        repo / "ml_models",
+        project,
+        repo,
+        Path.cwd() / "ml_models",
+        Path.cwd(),
+    ]
+    dirs += [Path(d) for d in os.getenv("MODEL_DIRS", "").split(os.pathsep) if d]
+    dirs += [Path(p) / "ml_models" for p in sys.path if isinstance(p, str) and p]
+    return dirs
+
+
+class ModelCatalog:
+    def __init__(self, dirs: Optional[Iterable[Path]] = None):
+        self._dirs_source = dirs
+        self._lock = threading.Lock()
+        self._dirs: List[Path] = []
+        self._dir_mtimes: Dict[Path, int] = {}
+        self._index: Dict[str, List[ModelEntry]] = {}
+        self._resolved: Dict[str, ModelEntry] = {}
+        self._built = False
+        self.scans = 0
+
+    def _scan(self) -> None:
+        seen: List[Path] = []
+        for d in self._dirs_source if self._dirs_source is not None else default_dirs():
+            try:
+                rd = Path(d).resolve()
+            except OSError:
+                continue
+            if rd not in seen and rd.is_dir():
+                seen.append(rd)
+        index: Dict[str, List[ModelEntry]] = {}
+        mtimes: Dict[Path, int] = {}
+        for directory in seen:
+            try:
+                mtimes[directory] = directory.stat().st_mtime_ns
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if not entry.name.lower().endswith(WEIGHT_EXTS):
+                            continue
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        if not entry.is_file() or st.st_size <= 0:
+                            continue
+                        index.setdefault(_key(entry.name), []).append(
+                            ModelEntry(Path(entry.path), st.st_size, st.st_mtime_ns)
+                        )
+            except OSError:
+                continue
+        self._dirs, self._dir_mtimes, self._index = seen, mtimes, index
+        self._resolved.clear()
+        self._built = True
+        self.scans += 1
+        logging.debug("[models] catálogo: %d archivos en %d directorios", sum(map(len, index.values())), len(seen))
+
+    def _dirs_changed(self) -> bool:
+        for directory, mtime in self._dir_mtimes.items():
+            try:
+                if directory.stat().st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _lookup(self, requested: str) -> Optional[ModelEntry]:
+        for name in candidate_names(requested):
+            entries = self._index.get(_key(name))
+            if entries:
+                return entries[0]
+        return None
+
+    def find(self, requested: str) -> Optional[ModelEntry]:
+        """Entrada vigente para ``requested`` (o un equivalente), o ``None``."""
+        with self._lock:
+            if not self._built:
+                self._scan()
+            entry = self._resolved.get(requested)
+            if entry is not None:
+                exact = _key(entry.path.name) == _key(requested)
+                # Un equivalente puede quedar tapado si luego aparece el archivo pedido
+                if entry.is_current() and (exact or not self._dirs_changed()):
+                    return entry
+                self._scan()
+            entry = self._lookup(requested)
+            if (entry is None or _key(entry.path.name) != _key(requested)) and self._dirs_changed():
+                self._scan()
+                entry = self._lookup(requested)
+            if entry is not None:
+                self._resolved[requested] = entry
+            return entry
+
+    def resolve(self, requested: str) -> Path:
+        entry = self.find(requested)
+        if entry is not None:
+            return entry.path
+        # Ruta esperada aunque no exista, para que el error muestre dónde se buscó
+        return BASE_MODELS_DIR / candidate_names(requested)[0]
+
+    def entries(self, with_hash: bool = False) -> Dict[str, dict]:
+        with self._lock:
+            if not self._built:
+                self._scan()
+            index = dict(self._index)
+        return {entries[0].path.name: entries[0].as_dict(with_hash) for entries in index.values()}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._built = False
+
+
+CATALOG = ModelCatalog()
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from . import models
+from .services.zones import invalidate_zones
 
 
 @admin.register(models.InferenceResult)
@@ -8,3 +9,33 @@ class InferenceResultAdmin(admin.ModelAdmin):
     list_display = ("id", "uploaded_at", "status")
     search_fields = ("status",)
     list_filter = ("status", "uploaded_at")
+
+
+@admin.register(models.Zone)
+class ZoneAdmin(admin.ModelAdmin):
+    list_display = ("id", "camera", "name", "active", "updated_at")
+    search_fields = ("camera", "name")
+    list_filter = ("active", "camera")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_zones(obj.camera)
+
+    def delete_model(self, request, obj):
+        camera = obj.camera
+        super().delete_model(request, obj)
+        invalidate_zones(camera)
+
+
+@admin.register(models.StreamAlert)
+class StreamAlertAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "camera", "risk_display", "max_conf")
+    search_fields = ("camera", "text")
+    list_filter = ("camera", "created_at")
+
+
+@admin.register(models.MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ("sha256", "name", "size", "refcount", "last_used_at")
+    search_fields = ("sha256", "name")
+    readonly_fields = ("sha256", "name", "size", "refcount", "created_at", "last_used_at")
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+from typing import Dict
+
+from django.http import HttpRequest, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from .models import Zone
+from .services.rollups import period_counts
+from .services.zones import invalidate_zones
+from .web_views import get_logged_user
+
+
+def _unauthorized() -> JsonResponse:
+    return JsonResponse({"error": "Sesión requerida."}, status=401)
+
+
+def _read_json(request: HttpRequest) -> Dict:
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError as exc:
+        raise ValueError("JSON inválido.") from exc
+    if not isinstance(data, dict):
+        raise ValueError("Se esperaba un objeto JSON.")
+    return data
+
+
+def _clean_zone(data: Dict, partial: bool = False) -> Dict:
+    """Valida el payload de una zona. Los puntos van normalizados (0..1)."""
+    cleaned: Dict = {}
+    for field in ("camera", "name"):
+        if field in data:
+            value = str(data[field] or "").strip()
+            if not value or len(value) > 64:
+                raise ValueError(f"'{field}' es obligatorio (máx. 64 caracteres).")
+            cleaned[field] = value.lower() if field == "name" else value
+        elif not partial:
+            raise ValueError(f"'{field}' es obligatorio.")
+    if "points" in data:
+        points = data["points"]
+        try:
+            pts = [[float(x), float(y)] for x, y in points]
+        except Exception as exc:
+            raise ValueError("'points' debe ser una lista de pares [x, y].") from exc
+        if len(pts) < 3:
+            raise ValueError("Una zona necesita al menos 3 puntos.")
+        if any(not (0.0 <= v <= 1.0) for pt in pts for v in pt):
+            raise ValueError("Los puntos deben estar normalizados entre 0 y 1.")
+        cleaned["points"] = pts
+    elif not partial:
+        raise ValueError("'points' es obligatorio.")
+    if "active" in data:
+        cleaned["active"] = bool(data["active"])
+    return cleaned
+
+
+@require_http_methods(["GET", "POST"])
+def zones_collection(request: HttpRequest) -> JsonResponse:
+    """Lista (``?camera=``) o crea zonas."""
+    if not get_logged_user(request):
+        return _unauthorized()
+
+    if request.method == "GET":
+        qs = Zone.objects.all()
+        camera = request.GET.get("camera")
+        if camera:
+            qs = qs.filter(camera=camera)
+        return JsonResponse({"zones": [z.as_dict() for z in qs]})
+
+    try:
+        cleaned = _clean_zone(_read_json(request))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    zone = Zone.objects.create(**cleaned)
+    invalidate_zones(zone.camera)
+    return JsonResponse(zone.as_dict(), status=201)
+
+
+@require_http_methods(["GET", "PUT", "PATCH", "DELETE"])
+def zone_detail(request: HttpRequest, pk: int) -> JsonResponse:
+    if not get_logged_user(request):
+        return _unauthorized()
+
+    zone = get_object_or_404(Zone, pk=pk)
+    if request.method == "GET":
+        return JsonResponse(zone.as_dict())
+
+    if request.method == "DELETE":
+        camera = zone.camera
+        zone.delete()
+        invalidate_zones(camera)
+        return JsonResponse({"deleted": pk})
+
+    try:
+        cleaned = _clean_zone(_read_json(request), partial=request.method == "PATCH")
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    old_camera = zone.camera
+    for field, value in cleaned.items():
+        setattr(zone, field, value)
+    zone.save()
+    invalidate_zones(old_camera)
+    if zone.camera != old_camera:
+        invalidate_zones(zone.camera)
+    return JsonResponse(zone.as_dict())
+
+
+@require_http_methods(["GET"])
+def alert_metrics(request: HttpRequest) -> JsonResponse:
+    """Conteos de alertas por riesgo (hoy, 7 días, siempre); ``?camera=`` opcional."""
+    if not get_logged_user(request):
+        return _unauthorized()
+    return JsonResponse(period_counts(request.GET.get("camera") or None))
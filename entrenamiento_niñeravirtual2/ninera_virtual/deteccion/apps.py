@@ -5,3 +5,14 @@ class DeteccionConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "deteccion"
     verbose_name = "Detección"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .legacy.sqlite import tune_django_connection
+
+        connection_created.connect(tune_django_connection, dispatch_uid="deteccion.sqlite_tuning")
+
+        from .services.media import connect_signals
+
+        connect_signals()
@@ -6,6 +6,7 @@ import logging
 import os
 import time
 from typing import List, Tuple
+from urllib.parse import parse_qs
 
 import cv2
 import numpy as np
@@ -13,21 +14,38 @@ from channels.db import database_sync_to_async
 import asyncio
 from channels.generic.websocket import AsyncWebsocketConsumer
 
-try:
-    from ultralytics import YOLO  # type: ignore
-except Exception:  # pragma: no cover
-    YOLO = None  # type: ignore
-
-from ml_models import get_model_path
+from .legacy.batch import VOCAB, DetectionBatch, source_id
 from .legacy.config import Config
+from .legacy.cascade import CascadePolicy, CascadeStats, crop_region
 from .legacy.notifications import NotificationMediator
-from .models import StreamAlert
+from .legacy.scene import StaticSceneMap, is_static_label
+from .risks import ZONE, risks_for_labels
+from .services.alerts import format_alert_text, record_alert
+from .services.live import DASHBOARD_GROUP, apublish, camera_event
+from .services.preload import PRELOAD
+from .services.zones import ZONE_CACHE, ZONES_GROUP, zones_hit
+from .web_views import SESSION_KEY
+
+CHILD_LABELS = {"nino", "child"}
+
+
+def _is_child_label(label: str) -> bool:
+    return Config.COCO_CLASS_MAP.get(label, label) in CHILD_LABELS
+
+
+def _child_mask() -> np.ndarray:
+    return VOCAB.membership_where("child", _is_child_label)
+
+
+class _ModelBusy(Exception):
+    """El modelo compartido está en uso (p. ej. por ``run_inference``)."""
 
 
 class StreamConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.model_custom = None
         self.model_coco = None
+        self.model_gate = None
         self._busy = False
         self._last_alert_ts = 0.0
         try:
@@ -45,38 +63,86 @@ class StreamConsumer(AsyncWebsocketConsumer):
         self.conf_coco = float(os.getenv("YOLO_CONF_COCO", "0.25"))
         self.coco_model_file = os.getenv("COCO_MODEL_FILE", "yolov8n.pt")
         self.primary_model_file = os.getenv("PRIMARY_MODEL_FILE", "NineraV.pt")
+        self.gate_model_file = os.getenv("CASCADE_GATE_MODEL_FILE", "yolov8n.pt")
+        # Si asgi.py no la lanzó (PRELOAD_MODELS=0), la carga empieza con la primera conexión
+        PRELOAD.start()
+        self._loading_sent = False
 
         self._notifier = NotificationMediator()
+        # Mapa de escena: muebles/escaleras/estufas se detectan con baja frecuencia
+        self._scene = StaticSceneMap() if Config.SCENE_MAP else None
+        self._dynamic_classes = {}
+        self._luts = {}
+
+        # Cámara lógica del stream (zonas por cámara): ws/stream?camera=<id>
+        qs = parse_qs((self.scope.get("query_string") or b"").decode("utf-8", "ignore"))
+        self.camera_id = (qs.get("camera") or ["web"])[0][:64] or "web"
+        # Cascada configurable por cámara (CASCADE_CAMERAS)
+        self.cascade = CascadePolicy.for_camera(self.camera_id)
+        self._cascade_stats = CascadeStats()
+        # Recargar zonas una vez por conexión (no por frame); las ediciones
+        # posteriores llegan como eventos del grupo ZONES_GROUP.
+        ZONE_CACHE.invalidate(self.camera_id)
+        if self.channel_layer is not None:
+            try:
+                await self.channel_layer.group_add(ZONES_GROUP, self.channel_name)
+            except Exception:
+                logging.exception("[stream] no se pudo suscribir a zonas")
+
         await self.accept()
         await self.send_json({"type": "ready", "message": "stream accepted"})
-        if os.getenv("WARMUP_ON_CONNECT", "1").lower() in {"1","true","yes"}:
+        await apublish(camera_event(self.camera_id, "online", name=self.camera_id), self.channel_layer)
+        if not PRELOAD.done:
+            await self.send_json({"type": "loading", "message": "cargando modelos"})
+            self._loading_sent = True
+        elif os.getenv("WARMUP_ON_CONNECT", "1").lower() in {"1","true","yes"}:
             try:
                 await asyncio.to_thread(self._lazy_models)
             except Exception:
                 logging.exception("[stream] warmup models failed")
 
     def _lazy_models(self) -> Tuple[object | None, object | None]:
-        if YOLO is None:
-            return None, None
+        # Modelos compartidos del proceso: solo el primero que los pide los carga
         if self.use_primary and self.model_custom is None:
-            try:
-                self.model_custom = YOLO(str(get_model_path(self.primary_model_file)))
-            except Exception:
-                # Fallback sin tildes/ñ
-                try:
-                    self.model_custom = YOLO(str(get_model_path("ninera.pt")))
-                except Exception:
-                    self.model_custom = None
-            else:
-                logging.info("[stream] Modelo primary cargado")
+            # Fallback sin tildes/ñ
+            self.model_custom = PRELOAD.model(self.primary_model_file) or PRELOAD.model("ninera.pt")
         if self.use_coco and self.model_coco is None:
+            self.model_coco = PRELOAD.model(self.coco_model_file)
+        if self.cascade.enabled and self.model_gate is None:
+            for name in (self.gate_model_file, self.coco_model_file):
+                self.model_gate = PRELOAD.model(name)
+                if self.model_gate is not None:
+                    logging.info("[stream] Gate de cascada: %s", name)
+                    break
+        return self.model_custom, self.model_coco
+
+    def _lut(self, model) -> np.ndarray:
+        """Tabla clase -> id de ``VOCAB`` (una vez por modelo cargado)."""
+        lut = self._luts.get(id(model))
+        if lut is None:
+            lut = self._luts[id(model)] = VOCAB.lut_for(getattr(model, "names", {}) or {})
+        return lut
+
+    async def disconnect(self, code):
+        stats = getattr(self, "_cascade_stats", None)
+        if stats is not None and stats.frames:
+            logging.info("[stream] cascada %s: %s", self.camera_id, stats.as_dict())
+        if self.channel_layer is not None:
             try:
-                self.model_coco = YOLO(str(get_model_path(self.coco_model_file)))
+                await self.channel_layer.group_discard(ZONES_GROUP, self.channel_name)
             except Exception:
-                self.model_coco = None
-            else:
-                logging.info("[stream] Modelo coco cargado")
-        return self.model_custom, self.model_coco
+                pass
+            if hasattr(self, "camera_id"):
+                await apublish(camera_event(self.camera_id, "offline", name=self.camera_id), self.channel_layer)
+
+    async def zones_invalidate(self, event):
+        ZONE_CACHE.invalidate(event.get("camera"))
+
+    async def _zones(self):
+        zones = ZONE_CACHE.peek(self.camera_id)
+        if zones is None:
+            zones = await database_sync_to_async(ZONE_CACHE.load)(self.camera_id)
+        return zones
 
     @staticmethod
     def _decode_frame(b64: str) -> np.ndarray | None:
@@ -108,99 +174,161 @@ class StreamConsumer(AsyncWebsocketConsumer):
             data = json.loads(text_data)
             if data.get("type") != "frame":
                 return
+            # Mientras se carga el stack se contesta cada frame para que el cliente no se trabe
+            if not PRELOAD.done:
+                await self.send_json({"type": "loading", "message": "cargando modelos"})
+                return
+            if self._loading_sent:
+                self._loading_sent = False
+                await self.send_json({"type": "ready", "message": "modelos listos"})
 
             frame = self._decode_frame(data.get("data", ""))
             if frame is None:
                 return
             frame = self._resize(frame, self.target_w)
 
-            det_items: List[dict] = []
+            batches: List[DetectionBatch] = []
             model_custom, model_coco = self._lazy_models()
+            model_gate = self.model_gate if self.cascade.enabled else None
+            # full_pass solo elige entre todas las clases y las móviles; no decide la cascada
+            full_pass = self._scene is None or self._scene.needs_refresh(frame)
+            full_sources = set()  # fuentes que corrieron sobre el frame completo
 
-            def _fmt_results(res, src: str):
-                nonlocal det_items
+            def _fmt_results(res, src: str, model, offset=(0, 0)):
                 if not res:
                     return
-                r0 = res[0]
-                if getattr(r0, "boxes", None) is None:
+                batch = DetectionBatch.from_yolo(res[0], self._lut(model), source_id(src))
+                if len(batch):
+                    batches.append(batch.shifted(*offset) if offset != (0, 0) else batch)
+
+            def _pass_kwargs(model, src: str) -> dict | None:
+                # Entre refrescos del mapa de escena solo se buscan clases móviles
+                if full_pass:
+                    return {"imgsz": self.target_w}
+                classes = self._dynamic_classes.get(src)
+                if classes is None:
+                    # En web las etiquetas se envían crudas (p. ej. "dining table")
+                    lut = self._lut(model)
+                    static = VOCAB.membership_where("static", is_static_label)
+                    classes = np.flatnonzero((lut >= 0) & ~static[np.maximum(lut, 0)]).tolist()
+                    self._dynamic_classes[src] = classes
+                if not classes:
+                    return None
+                imgsz = Config.SCENE_DYNAMIC_IMGSZ or self.target_w
+                return {"imgsz": imgsz, "classes": classes}
+
+            def _run(model, src: str, conf: float, image=None, offset=(0, 0), **overrides):
+                kwargs = _pass_kwargs(model, src)
+                if kwargs is None:
                     return
-                names = getattr(getattr(self, f"model_{src}"), "names", {}) if hasattr(self, f"model_{src}") else {}
-                for b in r0.boxes:
-                    xyxy = b.xyxy.cpu().numpy().astype(int)[0].tolist()
-                    conf = float(b.conf.item())
-                    cls = int(b.cls.item())
-                    label = str(names.get(cls, src)).lower()
-                    det_items.append({"label": label, "box": xyxy, "conf": conf, "src": src})
-
-            if self.use_primary and model_custom is not None:
+                kwargs.update(overrides)
+                # Modelo compartido con run_inference (vistas en otros hilos): si
+                # está ocupado se salta el frame en vez de bloquear el event loop
+                lock = PRELOAD.lock_for(model)
+                if not lock.acquire(blocking=False):
+                    raise _ModelBusy(src)
                 try:
-                    res_c = model_custom.predict(
-                        source=frame,
-                        imgsz=self.target_w,
-                        conf=self.conf_primary,
+                    res = model.predict(
+                        source=frame if image is None else image,
+                        conf=conf,
                         iou=0.45,
                         device="cpu",
                         verbose=False,
                         max_det=50,
+                        **kwargs,
                     )
-                    _fmt_results(res_c, "custom")
+                finally:
+                    lock.release()
+                _fmt_results(res, src, model, offset)
+
+            # Cascada: el gate (COCO ligero) reemplaza al modelo COCO y el
+            # modelo custom solo corre si el gate ve un niño.
+            run_primary = self.use_primary and model_custom is not None
+            region = None
+            if model_gate is not None:
+                stats = self._cascade_stats
+                stats.frames += 1
+                try:
+                    _run(model_gate, "coco", self.cascade.gate_conf, imgsz=self.cascade.gate_imgsz)
+                    full_sources.add("coco")
+                except _ModelBusy:
+                    raise
+                except Exception:
+                    logging.exception("[stream] error en gate")
+                gated = DetectionBatch.concat(batches)
+                children = gated.boxes[_child_mask()[gated.cls]]
+                if len(children):
+                    stats.gated += 1
+                else:
+                    run_primary = False
+                if run_primary:
+                    stats.heavy_runs += 1
+                    if self.cascade.crop:
+                        region = crop_region(children, frame.shape, self.cascade.crop_margin)
+                    if region is None:
+                        stats.full_runs += 1
+
+            if run_primary:
+                try:
+                    if region is None:
+                        _run(model_custom, "custom", self.conf_primary)
+                        full_sources.add("custom")
+                    else:
+                        self._cascade_stats.crop_runs += 1
+                        x1, y1, x2, y2 = region
+                        _run(model_custom, "custom", self.conf_primary, image=frame[y1:y2, x1:x2], offset=(x1, y1))
+                except _ModelBusy:
+                    raise
                 except Exception:
                     logging.exception("[stream] error en primary")
-            if self.use_coco and model_coco is not None:
+            if self.use_coco and model_coco is not None and model_gate is None:
                 try:
-                    res_y = model_coco.predict(
-                        source=frame,
-                        imgsz=self.target_w,
-                        conf=self.conf_coco,
-                        iou=0.45,
-                        device="cpu",
-                        verbose=False,
-                        max_det=50,
-                    )
-                    _fmt_results(res_y, "coco")
+                    _run(model_coco, "coco", self.conf_coco)
+                    full_sources.add("coco")
+                except _ModelBusy:
+                    raise
                 except Exception:
                     logging.exception("[stream] error en coco")
 
-            def threshold_for(label: str) -> float:
-                l = (label or "").lower()
-                return Config.CLASS_THRESHOLDS.get(l, self.conf_coco)
-
-            over = [d for d in det_items if d.get("conf", 0.0) >= threshold_for(str(d.get("label", "")))]
-
-            # Derivar "tipo de riesgo" legible a partir de labels detectados
-            def risk_types(items: List[dict]) -> List[str]:
-                labels = {str((i.get("label") or "")).lower() for i in items}
-                risks = []
-                if any(x in labels for x in ["knife", "cuchillo"]):
-                    risks.append("Cuchillo")
-                if any(x in labels for x in ["scissors", "tijera", "tijeras"]):
-                    risks.append("Tijeras")
-                if any(x in labels for x in [
-                    "kitchen", "cocina", "cooker", "stove", "horno", "oven"
-                ]):
-                    risks.append("Estufa/Cocina")
-                if any(x in labels for x in ["stairs", "escalera", "escaleras"]):
-                    risks.append("Escaleras")
-                if any(x in labels for x in [
-                    "chair","silla","bar","barra","table","mesa","stool","taburete","counter","mostrador","shelf","estante"
-                ]):
-                    risks.append("Altura")
-                if any(x in labels for x in ["pot", "olla", "pan"]):
-                    risks.append("Olla/Recipiente caliente")
-                return risks
-
-            if over:
+            dets = DetectionBatch.concat(batches)
+            if self._scene is not None and (model_custom is not None or model_coco is not None or model_gate is not None):
+                if full_pass:
+                    # Lo estático de una fuente que no miró todo el frame (primary
+                    # salteado o recortado) se conserva del refresco anterior
+                    static = VOCAB.membership_where("static", is_static_label)
+                    full_src = np.array([source_id(s) for s in full_sources], dtype=np.uint8)
+                    previous = self._scene.detections
+                    kept = previous.select(~np.isin(previous.src, full_src))
+                    is_static, fresh = static[dets.cls], np.isin(dets.src, full_src)
+                    self._scene.update(frame, dets.select(is_static & fresh) + kept)
+                    dets = dets.select(~is_static | fresh) + kept
+                else:
+                    dets = dets + self._scene.detections
+
+            over = dets.above_thresholds(self.conf_coco)
+
+            # Zonas: solo se evalúan si hay niños (COCO "person" -> "nino")
+            zone_names: List[str] = []
+            children = over.boxes[_child_mask()[over.cls]]
+            if len(children):
+                zones = await self._zones()
+                if zones:
+                    fh, fw = frame.shape[:2]
+                    zone_names = zones_hit(zones, children, fw, fh)
+
+            over_items = over.to_items()
+
+            if len(over):
                 try:
                     now = time.time()
                     must_fire = (now - self._last_alert_ts) >= self._alert_min_interval or (not self._sent_first_alert)
                     if must_fire:
-                        risks = risk_types(over)
-                        details = " · ".join(
-                            [f"[{d.get('src')}] {d.get('label')} {d.get('conf'):.2f}" for d in over]
-                        )
-                        prefix = f"Riesgo: {', '.join(risks)} | " if risks else ""
-                        text = prefix + details
-                        await self._create_stream_alert(text)
+                        # Tipo de riesgo a partir de los labels detectados
+                        risks = risks_for_labels(over.labels())
+                        text = format_alert_text(risks, over_items, [f"Zona {z}" for z in zone_names])
+                        if zone_names:
+                            risks.append(ZONE)
+                        await self._create_stream_alert(text, risks, over_items)
                         # Notificación opcional por Telegram (si está configurado)
                         try:
                             self._notifier.notify(text, frame_bgr=frame)
@@ -212,8 +340,18 @@ class StreamConsumer(AsyncWebsocketConsumer):
                     logging.exception("[stream] persist alert failed")
 
             await self.send_json(
-                {"type": "detections", "items": det_items, "over": over, "ts": data.get("ts")}
+                {
+                    "type": "detections",
+                    "items": dets.to_items(),
+                    "over": over_items,
+                    "zones": zone_names,
+                    "cascade": self._cascade_stats.as_dict() if self.cascade.enabled else None,
+                    "ts": data.get("ts"),
+                }
             )
+        except _ModelBusy as busy:
+            # El cliente manda el próximo frame al recibir cualquier respuesta
+            await self.send_json({"type": "busy", "message": f"modelo ocupado ({busy})"})
         except Exception as exc:  # pragma: no cover
             await self.send_json({"type": "error", "message": str(exc)})
         finally:
@@ -223,5 +361,42 @@ class StreamConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps(payload))
 
     @database_sync_to_async
-    def _create_stream_alert(self, text: str):
-        return StreamAlert.objects.create(text=text)
+    def _create_stream_alert(self, text: str, risks: List[str], detections: List[dict]):
+        return record_alert(
+            risks=risks,
+            detections=detections,
+            camera=self.camera_id,
+            session=self.channel_name,
+            text=text,
+        )
+
+
+class DashboardConsumer(AsyncWebsocketConsumer):
+    """Reenvía al navegador los eventos del grupo ``DASHBOARD_GROUP``.
+
+    Solo para sesiones iniciadas; no consulta la BD (el estado inicial lo
+    pinta ``web_dashboard`` y el resto llega como incrementos).
+    """
+
+    async def connect(self):
+        session = self.scope.get("session")
+        user = await database_sync_to_async(session.get)(SESSION_KEY) if session is not None else None
+        if not user or self.channel_layer is None:
+            await self.close(code=4401)
+            return
+        await self.channel_layer.group_add(DASHBOARD_GROUP, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.channel_layer is not None:
+            try:
+                await self.channel_layer.group_discard(DASHBOARD_GROUP, self.channel_name)
+            except Exception:
+                pass
+
+    async def receive(self, text_data=None, bytes_data=None):
+        # Canal de solo lectura
+        return
+
+    async def dashboard_event(self, message):
+        await self.send(text_data=json.dumps(message["event"], ensure_ascii=False))
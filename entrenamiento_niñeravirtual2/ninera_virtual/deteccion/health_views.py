@@ -0,0 +1,88 @@
+"""Sondas para la plataforma de despliegue.
+
+- ``/healthz``: el proceso responde (liveness). No toca BD ni modelos.
+- ``/readyz``: listo para tráfico (readiness). Exige los modelos que el
+  stream tiene activos cargados y calentados (los de ``run_inference`` se
+  informan en ``preload.inference`` pero no cuentan), BD y channel layer accesibles, y la cola de hashing de
+  contraseñas con lugar. Responde 503 con el detalle mientras algo falte.
+  Con ``PRELOAD_MODELS=0`` los modelos no cuentan (se cargan con la
+  primera conexión al stream); si la precarga está activa pero nadie la
+  lanzó (p. ej. otro servidor de desarrollo), la lanza la propia sonda,
+  y lo mismo tras un fallo, una vez vencido el backoff.
+
+Ambas quedan fuera de la redirección HTTPS (``SECURE_REDIRECT_EXEMPT``)
+porque los health checks internos llegan por HTTP.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+from .legacy.passwords import get_hasher
+from .services.preload import FAILED, IDLE, PRELOAD
+
+
+def _check_models() -> None:
+    if PRELOAD.ready:
+        return
+    if PRELOAD.state == IDLE and not settings.PRELOAD_MODELS:
+        return
+    if PRELOAD.state in (IDLE, FAILED):
+        PRELOAD.start()
+    raise RuntimeError(PRELOAD.error or PRELOAD.state)
+
+
+def _check_database() -> None:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+def _check_channel_layer() -> None:
+    layer = get_channel_layer()
+    if layer is None:
+        raise RuntimeError("sin channel layer")
+    # Grupo sin miembros: con Redis igual hace un viaje al servidor
+    async_to_sync(layer.group_send)("readyz", {"type": "readyz.ping"})
+
+
+def _check_password_queue() -> None:
+    hasher = get_hasher()
+    if hasher.pending >= hasher.max_pending:
+        raise RuntimeError(f"{hasher.pending}/{hasher.max_pending} pendientes")
+
+
+CHECKS: Dict[str, Callable[[], None]] = {
+    "models": _check_models,
+    "database": _check_database,
+    "channel_layer": _check_channel_layer,
+    "password_queue": _check_password_queue,
+}
+
+
+@never_cache
+@require_safe
+def healthz(request: HttpRequest) -> JsonResponse:
+    return JsonResponse({"status": "ok"})
+
+
+@never_cache
+@require_safe
+def readyz(request: HttpRequest) -> JsonResponse:
+    checks: Dict[str, str] = {}
+    for name, check in CHECKS.items():
+        try:
+            check()
+            checks[name] = "ok"
+        except Exception as e:
+            checks[name] = str(e) or e.__class__.__name__
+    ready = all(v == "ok" for v in checks.values())
+    payload = {"status": "ready" if ready else "not_ready", "checks": checks, "preload": PRELOAD.status()}
+    return JsonResponse(payload, status=200 if ready else 503)
@@ -1,6 +1,18 @@
 from __future__ import annotations
 
+import json
+import logging
+import shutil
+import subprocess
+import time
+from typing import Optional, Tuple
+
 import cv2
+import numpy as np
+
+from .config import Config
+
+STREAM_SCHEMES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://", "udp://", "tcp://")
 
 
 class ICameraAdapter:
@@ -8,12 +20,29 @@ class ICameraAdapter:
 
     def open(self) -> bool: ...
 
-    def read(self): ...
+    def read(self, out=None):
+        """Devuelve ``(ok, frame)``; si ``out`` sirve, decodifica sobre él."""
+        ...
+
+    def grab(self) -> bool:
+        """Avanza un frame sin decodificarlo (si la fuente lo permite)."""
+        ...
+
+    def retrieve(self, out=None):
+        """Decodifica el último frame avanzado con ``grab``."""
+        ...
 
     def release(self): ...
 
     def is_opened(self) -> bool: ...
 
+    def fps(self) -> float:
+        return 0.0
+
+    def rewind(self) -> bool:
+        """Vuelve al inicio (solo archivos); ``False`` si no se puede."""
+        return False
+
 
 class OpenCVCaptureAdapter(ICameraAdapter):
     """Adapter simple sobre cv2.VideoCapture (webcam, archivo, RTSP/HTTP)."""
@@ -26,11 +55,24 @@ class OpenCVCaptureAdapter(ICameraAdapter):
         self.cap = cv2.VideoCapture(self.source)
         return self.cap.isOpened()
 
-    def read(self):
+    def read(self, out=None):
         if not self.cap:
             return False, None
+        if out is not None:
+            # OpenCV reutiliza ``out`` si tamaño y tipo coinciden
+            return self.cap.read(out)
         return self.cap.read()
 
+    def grab(self):
+        return bool(self.cap is not None and self.cap.grab())
+
+    def retrieve(self, out=None):
+        if not self.cap:
+            return False, None
+        if out is not None:
+            return self.cap.retrieve(out)
+        return self.cap.retrieve()
+
     def release(self):
         if self.cap and self.cap.isOpened():
             self.cap.release()
@@ -38,11 +80,249 @@ class OpenCVCaptureAdapter(ICameraAdapter):
     def is_opened(self):
         return self.cap is not None and self.cap.isOpened()
 
+    def fps(self):
+        try:
+            val = self.cap.get(cv2.CAP_PROP_FPS) if self.cap else 0.0
+        except Exception:
+            return 0.0
+        return float(val) if val and val > 0 else 0.0
+
+    def rewind(self):
+        try:
+            return bool(self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0))
+        except Exception:
+            return False
+
+
+def _parse_rate(rate: str) -> float:
+    try:
+        num, _, den = str(rate).partition("/")
+        value = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+    return value if value > 0 else 0.0
+
+
+def probe_stream(source: str, timeout: float = 10.0) -> Optional[Tuple[int, int, float]]:
+    """``(ancho, alto, fps)`` de la fuente con ffprobe (u OpenCV si no está)."""
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe:
+        cmd = [
+            ffprobe, "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,avg_frame_rate,r_frame_rate",
+            "-of", "json",
+        ]
+        if source.startswith(("rtsp://", "rtsps://")):
+            cmd += ["-rtsp_transport", "tcp"]
+        try:
+            out = subprocess.run(cmd + [source], capture_output=True, timeout=timeout, check=True).stdout
+            stream = json.loads(out or b"{}").get("streams", [{}])[0]
+            w, h = int(stream["width"]), int(stream["height"])
+            fps = _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate"))
+            return w, h, fps
+        except Exception as e:
+            logging.warning(f"[capture] ffprobe falló para {source}: {e}")
+    cap = cv2.VideoCapture(source)
+    try:
+        if not cap.isOpened():
+            return None
+        w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+    finally:
+        cap.release()
+    return (w, h, fps) if w > 0 and h > 0 else None
+
+
+class FFmpegCaptureAdapter(ICameraAdapter):
+    """Decodifica con ``ffmpeg`` en un subproceso y lee BGR crudo del pipe.
+
+    ffmpeg escala al ancho de inferencia (``INFER_IMG_W``, o ``CAPTURE_WIDTH``
+    si se fija) manteniendo aspecto y limita a ``fps`` antes de entregar los
+    frames, así que Python solo recibe lo que va a usar. Cada frame se lee
+    con ``readinto`` sobre un buffer preasignado (o el ``out`` del ring).
+    Las fuentes en vivo se abren y reconectan con backoff exponencial y se
+    vuelven a sondear en cada reconexión (la resolución puede cambiar); los
+    archivos devuelven ``False`` al terminar.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        width: Optional[int] = None,
+        fps: float = Config.CAPTURE_FPS,
+        max_backoff: float = Config.CAPTURE_MAX_BACKOFF,
+        open_attempts: int = Config.CAPTURE_OPEN_ATTEMPTS,
+    ):
+        self.source = source
+        self.target_width = width if width is not None else (Config.CAPTURE_WIDTH or Config.INFER_IMG_W)
+        self.open_attempts = max(1, open_attempts)
+        self.target_fps = fps
+        self.max_backoff = max_backoff
+        self.is_stream = source.lower().startswith(STREAM_SCHEMES)
+        self.proc: Optional[subprocess.Popen] = None
+        self.shape: Optional[Tuple[int, int, int]] = None
+        self._fps = 0.0
+        self._buf: Optional[np.ndarray] = None
+        self._closed = True
+        self._pending = False
+        self.reconnects = 0
+
+    # Proceso ---------------------------------------------------------------
+    def _command(self):
+        h, w = self.shape[:2]
+        filters = [f"scale={w}:{h}"]
+        if self.target_fps > 0:
+            filters.append(f"fps={self.target_fps:g}")
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if self.source.lower().startswith(("rtsp://", "rtsps://")):
+            cmd += ["-rtsp_transport", "tcp", "-fflags", "nobuffer", "-flags", "low_delay"]
+        cmd += ["-i", self.source, "-an", "-sn", "-vf", ",".join(filters)]
+        cmd += ["-pix_fmt", "bgr24", "-f", "rawvideo", "pipe:1"]
+        return cmd
+
+    def _spawn(self) -> bool:
+        try:
+            self.proc = subprocess.Popen(
+                self._command(),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                stdin=subprocess.DEVNULL,
+                bufsize=0,
+            )
+        except OSError as e:
+            logging.error(f"[capture] no se pudo lanzar ffmpeg: {e}")
+            self.proc = None
+            return False
+        return True
+
+    def _kill(self):
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        try:
+            proc.kill()
+            proc.wait(timeout=2)
+        except Exception:
+            pass
+        if proc.stdout:
+            proc.stdout.close()
+
+    def _connect(self) -> bool:
+        """Sondea la fuente, ajusta la forma del frame y lanza ffmpeg."""
+        probe = probe_stream(self.source)
+        if probe is None:
+            return False
+        src_w, src_h, src_fps = probe
+        w = src_w
+        if 0 < self.target_width < src_w:
+            w = self.target_width
+        h = int(round(src_h * w / src_w))
+        w, h = w - w % 2, max(2, h - h % 2)
+        if (h, w, 3) != self.shape:
+            if self.shape is not None:
+                logging.info(f"[capture] {self.source} cambió a {src_w}x{src_h}")
+            self.shape = (h, w, 3)
+            self._buf = np.empty(self.shape, dtype=np.uint8)
+        self._fps = min(src_fps, self.target_fps) if self.target_fps > 0 and src_fps else (self.target_fps or src_fps)
+        return self._spawn()
+
+    def open(self):
+        if shutil.which("ffmpeg") is None:
+            logging.error("[capture] ffmpeg no está instalado")
+            return False
+        self._closed = False
+        attempts = self.open_attempts if self.is_stream else 1
+        backoff = 0.5
+        for attempt in range(1, attempts + 1):
+            if self._connect():
+                return True
+            if attempt < attempts:
+                logging.warning(f"[capture] no se pudo abrir {self.source}; reintento en {backoff:.1f}s")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+        self._closed = True
+        return False
+
+    # Lectura ---------------------------------------------------------------
+    def _read_into(self, buf: np.ndarray) -> bool:
+        proc = self.proc
+        if proc is None or proc.stdout is None:
+            return False
+        view = memoryview(buf.reshape(-1))
+        got, total = 0, view.nbytes
+        while got < total:
+            n = proc.stdout.readinto(view[got:])
+            if not n:
+                return False
+            got += n
+        return True
+
+    def _target(self, out) -> np.ndarray:
+        if out is not None and out.shape == self.shape and out.dtype == np.uint8 and out.flags.c_contiguous:
+            return out
+        return np.empty(self.shape, dtype=np.uint8)
+
+    def read(self, out=None):
+        backoff = 0.5
+        while not self._closed and self.shape is not None:
+            # Tras una reconexión la forma puede cambiar y ``out`` dejar de servir
+            buf = self._target(out)
+            if self._read_into(buf):
+                return True, buf
+            self._kill()
+            if not self.is_stream:
+                return False, None
+            self.reconnects += 1
+            logging.warning(f"[capture] reconectando {self.source} en {backoff:.1f}s")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+            if not self._closed:
+                self._connect()
+        return False, None
+
+    def grab(self):
+        # El pipe no permite saltar sin leer: el frame pendiente que nadie
+        # pidió se descarta sobre el buffer interno en el siguiente grab.
+        if self._pending:
+            ok, _ = self.read(self._buf)
+            if not ok:
+                self._pending = False
+                return False
+        self._pending = not self._closed
+        return self._pending
+
+    def retrieve(self, out=None):
+        if not self._pending:
+            return False, None
+        self._pending = False
+        return self.read(out)
+
+    def release(self):
+        self._closed = True
+        self._kill()
+
+    def is_opened(self):
+        return not self._closed
+
+    def fps(self):
+        return self._fps
+
+    def rewind(self):
+        if self.is_stream or self._closed:
+            return False
+        self._pending = False
+        self._kill()
+        return self._spawn()
+
 
 class VideoSourceFactory:
-    """Factory Method: decide qué adapter construir (actualmente OpenCV)."""
+    """Factory Method: decide qué adapter construir según fuente y backend."""
 
     @staticmethod
     def create(kind: str, target):
-        # Si mañana cambia la lib de cámara IP, se cambia aquí el adapter.
+        backend = Config.CAPTURE_BACKEND
+        if isinstance(target, str) and backend != "opencv" and shutil.which("ffmpeg"):
+            if backend == "ffmpeg" or target.lower().startswith(STREAM_SCHEMES):
+                return FFmpegCaptureAdapter(target)
         return OpenCVCaptureAdapter(target)
@@ -0,0 +1,265 @@
+"""Lotes de detecciones en forma de arreglos (struct-of-arrays).
+
+Las etiquetas se internan una sola vez (al cargar cada modelo) en
+``VOCAB`` y por frame solo viajan enteros: cajas ``int32``, confianza
+``float32``, id de clase ``int16`` y fuente ``uint8``. Umbrales, colores y
+pertenencia a conjuntos de etiquetas se resuelven con tablas indexadas por
+id en lugar de ``label.lower()`` + búsquedas en sets de strings.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .config import Config
+
+SOURCES: List[str] = ["custom", "coco", "primary", "detector"]
+
+
+def source_id(name: str) -> int:
+    try:
+        return SOURCES.index(name)
+    except ValueError:
+        SOURCES.append(name)
+        return len(SOURCES) - 1
+
+
+class Detection:
+    """Vista de una sola detección (compatibilidad con el código por objeto)."""
+
+    __slots__ = ("label", "box", "confidence", "src")
+
+    def __init__(self, label: str, box, confidence: float, src: str):
+        self.label = label
+        self.box = box
+        self.confidence = confidence
+        self.src = src
+
+    def __repr__(self) -> str:  # pragma: no cover - depuración
+        return f"Detection({self.label!r}, {list(self.box)}, {self.confidence:.2f}, {self.src!r})"
+
+
+class LabelVocab:
+    """Vocabulario de etiquetas -> id (int16) con tablas derivadas cacheadas."""
+
+    def __init__(self, labels: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self.labels: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._tables: Dict[Hashable, tuple] = {}
+        for label in labels:
+            self.intern(label)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def intern(self, label) -> int:
+        if isinstance(label, (bytes, bytearray)):
+            label = label.decode("utf-8", errors="ignore")
+        key = str(label).lower()
+        idx = self._ids.get(key)
+        if idx is None:
+            with self._lock:
+                idx = self._ids.get(key)
+                if idx is None:
+                    idx = len(self.labels)
+                    self.labels.append(key)
+                    self._ids[key] = idx
+        return idx
+
+    def lut_for(self, names: Mapping[int, str], mapping: Optional[Mapping[str, str]] = None) -> np.ndarray:
+        """Tabla id-de-clase-del-modelo -> id del vocabulario (-1 = descartar).
+
+        Con ``mapping`` (p. ej. ``COCO_CLASS_MAP``) solo sobreviven las
+        clases mapeadas, ya con su etiqueta traducida.
+        """
+        names = dict(names or {})
+        size = (max(names) + 1) if names else 0
+        lut = np.full(size, -1, dtype=np.int16)
+        for idx, raw in names.items():
+            if isinstance(raw, (bytes, bytearray)):
+                raw = raw.decode("utf-8", errors="ignore")
+            label = str(raw).lower()
+            if mapping is not None:
+                label = mapping.get(label)
+                if not label:
+                    continue
+            lut[int(idx)] = self.intern(label)
+        return lut
+
+    def _table(self, key: Hashable, build: Callable[[], np.ndarray]) -> np.ndarray:
+        cached = self._tables.get(key)
+        size = len(self.labels)
+        if cached is None or cached[0] != size:
+            cached = (size, build())
+            self._tables[key] = cached
+        return cached[1]
+
+    def thresholds(self, default: float) -> np.ndarray:
+        """Umbral por id según ``Config.CLASS_THRESHOLDS``."""
+        return self._table(
+            ("thr", default),
+            lambda: np.array(
+                [Config.CLASS_THRESHOLDS.get(l, default) for l in self.labels], dtype=np.float32
+            ),
+        )
+
+    def membership(self, labels: Iterable[str]) -> np.ndarray:
+        """Máscara booleana por id: ``True`` si la etiqueta está en ``labels``."""
+        key = frozenset(labels)
+        return self._table(("in", key), lambda: np.array([l in key for l in self.labels], dtype=bool))
+
+    def membership_where(self, name: str, predicate: Callable[[str], bool]) -> np.ndarray:
+        return self._table(("where", name), lambda: np.array([bool(predicate(l)) for l in self.labels], dtype=bool))
+
+    def table(self, name: str, values: Mapping[str, object], default) -> List:
+        """Lista por id con ``values[label]`` (p. ej. colores de dibujo)."""
+        return self._table(("table", name), lambda: [values.get(l, default) for l in self.labels])
+
+
+VOCAB = LabelVocab(
+    list(Config.CLASS_THRESHOLDS) + list(Config.COCO_CLASS_MAP.values()) + list(Config.COCO_CLASS_MAP)
+)
+
+
+def _np(value) -> np.ndarray:
+    if hasattr(value, "cpu"):
+        value = value.cpu()
+    if hasattr(value, "numpy"):
+        value = value.numpy()
+    return np.asarray(value)
+
+
+class DetectionBatch:
+    """Detecciones de un frame como arreglos paralelos."""
+
+    __slots__ = ("boxes", "conf", "cls", "src", "vocab")
+
+    def __init__(self, boxes, conf, cls, src, vocab: LabelVocab = VOCAB):
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls, dtype=np.int16).reshape(-1)
+        self.src = np.asarray(src, dtype=np.uint8).reshape(-1)
+        self.vocab = vocab
+
+    # Construcción ---------------------------------------------------------
+    @classmethod
+    def empty(cls, vocab: LabelVocab = VOCAB) -> "DetectionBatch":
+        return cls(np.empty((0, 4), np.int32), (), (), (), vocab)
+
+    @classmethod
+    def from_yolo(cls, result, lut: np.ndarray, src: int, vocab: LabelVocab = VOCAB) -> "DetectionBatch":
+        """Convierte un ``Results`` de ultralytics sin iterar caja por caja."""
+        boxes = getattr(result, "boxes", None)
+        if boxes is None or len(boxes) == 0:
+            return cls.empty(vocab)
+        model_cls = _np(boxes.cls).astype(np.int64)
+        inside = (model_cls >= 0) & (model_cls < len(lut))
+        ids = np.full(len(model_cls), -1, dtype=np.int16)
+        ids[inside] = lut[model_cls[inside]]
+        keep = ids >= 0
+        return cls(
+            _np(boxes.xyxy)[keep],
+            _np(boxes.conf)[keep],
+            ids[keep],
+            np.full(int(keep.sum()), src, dtype=np.uint8),
+            vocab,
+        )
+
+    @classmethod
+    def from_detections(cls, dets: Iterable[Detection], vocab: LabelVocab = VOCAB) -> "DetectionBatch":
+        dets = list(dets)
+        if not dets:
+            return cls.empty(vocab)
+        return cls(
+            [list(d.box)[:4] for d in dets],
+            [d.confidence for d in dets],
+            [vocab.intern(d.label) for d in dets],
+            [source_id(d.src) for d in dets],
+            vocab,
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence["DetectionBatch"]) -> "DetectionBatch":
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        return cls(
+            np.concatenate([b.boxes for b in batches]),
+            np.concatenate([b.conf for b in batches]),
+            np.concatenate([b.cls for b in batches]),
+            np.concatenate([b.src for b in batches]),
+            batches[0].vocab,
+        )
+
+    def __add__(self, other: "DetectionBatch") -> "DetectionBatch":
+        return DetectionBatch.concat([self, other])
+
+    # Acceso ----------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.conf)
+
+    def __getitem__(self, i: int) -> Detection:
+        return Detection(
+            self.vocab.labels[self.cls[i]], self.boxes[i], float(self.conf[i]), SOURCES[self.src[i]]
+        )
+
+    def __iter__(self) -> Iterator[Detection]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def labels(self) -> List[str]:
+        names = self.vocab.labels
+        return [names[c] for c in self.cls.tolist()]
+
+    def select(self, mask) -> "DetectionBatch":
+        return DetectionBatch(self.boxes[mask], self.conf[mask], self.cls[mask], self.src[mask], self.vocab)
+
+    def label_mask(self, labels: Iterable[str]) -> np.ndarray:
+        return self.vocab.membership(labels)[self.cls]
+
+    def above_thresholds(self, default: float = Config.YOLO_CONF_DEFAULT) -> "DetectionBatch":
+        return self.select(self.conf >= self.vocab.thresholds(default)[self.cls])
+
+    def shifted(self, dx: int, dy: int) -> "DetectionBatch":
+        shift = np.array([dx, dy, dx, dy], dtype=np.int32)
+        return DetectionBatch(self.boxes + shift, self.conf, self.cls, self.src, self.vocab)
+
+    def nms_by_label(self, iou_thr: float = 0.5) -> "DetectionBatch":
+        """NMS por clase: conserva la de mayor confianza de cada grupo."""
+        if len(self) < 2:
+            return self
+        b = self.boxes.astype(np.float32)
+        areas = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        order = np.argsort(-self.conf, kind="stable")
+        suppressed = np.zeros(len(self), dtype=bool)
+        keep: List[int] = []
+        for i in order:
+            if suppressed[i]:
+                continue
+            keep.append(i)
+            x1 = np.maximum(b[i, 0], b[:, 0])
+            y1 = np.maximum(b[i, 1], b[:, 1])
+            x2 = np.minimum(b[i, 2], b[:, 2])
+            y2 = np.minimum(b[i, 3], b[:, 3])
+            inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+            iou = inter / np.maximum(areas[i] + areas - inter + 1e-9, 1e-9)
+            suppressed |= (self.cls == self.cls[i]) & (iou > iou_thr)
+        keep.sort()
+        return self.select(np.asarray(keep, dtype=np.int64))
+
+    # Serialización --------------------------------------------------------
+    def to_items(self) -> List[dict]:
+        """Lista de dicts para JSON (WebSocket, ``output_data``)."""
+        names = self.vocab.labels
+        return [
+            {"label": names[c], "box": box, "conf": conf, "src": SOURCES[s]}
+            for box, conf, c, s in zip(
+                self.boxes.tolist(), self.conf.tolist(), self.cls.tolist(), self.src.tolist()
+            )
+        ]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from .config import Config
+
+CHILD_LABELS = frozenset({"nino", "child"})
+GATE_LABELS = frozenset({"person"}) | CHILD_LABELS
+
+
+def _camera_overrides() -> Dict[str, dict]:
+    raw = (Config.CASCADE_CAMERAS or "").strip()
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        logging.error("CASCADE_CAMERAS no es JSON válido; se ignora.")
+        return {}
+    if not isinstance(data, dict):
+        logging.error("CASCADE_CAMERAS debe ser un objeto {cámara: {...}}; se ignora.")
+        return {}
+    return {str(k): v for k, v in data.items() if isinstance(v, dict)}
+
+
+def _coerce(current, value):
+    """Convierte ``value`` (JSON) al tipo del valor por defecto del campo."""
+    if isinstance(current, bool):
+        if isinstance(value, str):
+            return value.strip().lower() in {"1", "true", "yes"}
+        return bool(value)
+    return type(current)(value)
+
+
+@dataclass(frozen=True)
+class CascadePolicy:
+    """Política de la cascada (gate barato -> modelo pesado)."""
+
+    enabled: bool = Config.CASCADE
+    gate_imgsz: int = Config.CASCADE_GATE_IMGSZ
+    gate_conf: float = Config.CASCADE_GATE_CONF
+    crop: bool = Config.CASCADE_CROP
+    crop_margin: float = Config.CASCADE_CROP_MARGIN
+
+    @classmethod
+    def for_camera(cls, *keys: str) -> "CascadePolicy":
+        """Política base con los overrides del primer id/nombre que exista."""
+        policy = cls()
+        overrides = _camera_overrides()
+        for key in keys:
+            if key is not None and str(key) in overrides:
+                known = {}
+                for name, value in overrides[str(key)].items():
+                    if name not in policy.__dataclass_fields__:
+                        continue
+                    try:
+                        known[name] = _coerce(getattr(policy, name), value)
+                    except (TypeError, ValueError):
+                        logging.error("CASCADE_CAMERAS[%s].%s inválido (%r); se ignora.", key, name, value)
+                return replace(policy, **known)
+        return policy
+
+
+@dataclass
+class CascadeStats:
+    """Cuenta cuántas veces corre la etapa cara de la cascada."""
+
+    frames: int = 0
+    gated: int = 0
+    heavy_runs: int = 0
+    crop_runs: int = 0
+    full_runs: int = 0
+
+    @property
+    def heavy_ratio(self) -> float:
+        return self.heavy_runs / self.frames if self.frames else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["heavy_ratio"] = round(self.heavy_ratio, 3)
+        return data
+
+
+def crop_region(
+    boxes: Iterable[Sequence[float]],
+    frame_shape: Tuple[int, ...],
+    margin: float,
+    min_margin_px: float = Config.PROXIMITY_PX,
+) -> Optional[Tuple[int, int, int, int]]:
+    """Región (x1, y1, x2, y2) que cubre ``boxes`` más un margen.
+
+    El margen es ``margin`` veces el lado mayor de cada caja y nunca menor
+    que ``min_margin_px``, para que las reglas de proximidad sigan viendo
+    los objetos cercanos al niño.
+    """
+    h, w = frame_shape[:2]
+    region = None
+    for b in boxes:
+        x1, y1, x2, y2 = (float(v) for v in b[:4])
+        m = max(margin * max(x2 - x1, y2 - y1), min_margin_px)
+        cur = (x1 - m, y1 - m, x2 + m, y2 + m)
+        if region is None:
+            region = cur
+        else:
+            region = (
+                min(region[0], cur[0]),
+                min(region[1], cur[1]),
+                max(region[2], cur[2]),
+                max(region[3], cur[3]),
+            )
+    if region is None:
+        return None
+    x1 = max(0, int(region[0]))
+    y1 = max(0, int(region[1]))
+    x2 = min(w, int(region[2]))
+    y2 = min(h, int(region[3]))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
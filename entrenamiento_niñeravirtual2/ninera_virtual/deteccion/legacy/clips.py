@@ -0,0 +1,298 @@
+"""Clips de alerta (segundos previos + posteriores) desde un ring en memoria.
+
+Cada cámara guarda los últimos ``pre_sec`` segundos como JPEG reducidos
+(``width`` px, ``fps`` fijos) en un ``deque`` acotado; no se escribe nada
+en disco mientras no haya alertas. Al llegar una alerta el ring se copia
+a un clip abierto que sigue recibiendo frames ``post_sec`` segundos más
+(una alerta nueva durante la grabación lo extiende hasta ``max_sec``); al
+cerrarse, un hilo aparte lo codifica a MP4 con ffmpeg (``image2pipe``, los
+JPEG entran tal cual) o, sin ffmpeg, con ``cv2.VideoWriter``.
+
+La retención (``MAX_ALERT_CLIPS`` y ``CLIP_MAX_AGE_DAYS``) la aplica el
+propio hilo sobre su índice, también cuando no hay clips nuevos: el
+directorio queda marcado y la retención del servidor no entra en él.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from queue import Empty, Full, Queue
+from typing import Deque, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import Config
+from .render import resize_into
+from .snapshots import DirectoryClaim, _safe_name
+
+
+class _Clip:
+    __slots__ = ("path", "frames", "until", "max_until")
+
+    def __init__(self, path: str, frames: List[bytes], until: float, max_until: float):
+        self.path = path
+        self.frames = frames
+        self.until = until
+        self.max_until = max_until
+
+
+class _CameraBuffer:
+    __slots__ = ("ring", "next_at", "small", "clip")
+
+    def __init__(self, maxlen: int):
+        self.ring: Deque[bytes] = deque(maxlen=maxlen)
+        self.next_at = 0.0
+        self.small: Optional[np.ndarray] = None
+        self.clip: Optional[_Clip] = None
+
+
+class ClipRecorder:
+    """Ring de JPEG por cámara + codificador MP4 en segundo plano."""
+
+    def __init__(
+        self,
+        directory: str = Config.CLIP_DIR,
+        pre_sec: float = Config.CLIP_PRE_SEC,
+        post_sec: float = Config.CLIP_POST_SEC,
+        max_sec: float = Config.CLIP_MAX_SEC,
+        fps: float = Config.CLIP_FPS,
+        width: int = Config.CLIP_WIDTH,
+        quality: int = Config.CLIP_JPEG_QLTY,
+        max_files: int = Config.MAX_ALERT_CLIPS,
+        max_age_sec: float = Config.CLIP_MAX_AGE_DAYS * 86400,
+        queue_size: int = 4,
+    ):
+        self.directory = directory
+        self.pre_sec = pre_sec
+        self.post_sec = post_sec
+        self.max_sec = max(max_sec, pre_sec + post_sec)
+        self.fps = max(fps, 1.0)
+        self.period = 1.0 / self.fps
+        self.width = width
+        self.quality = quality
+        self.max_files = max_files
+        self.max_age_sec = max_age_sec
+        self._cams: Dict[str, _CameraBuffer] = {}
+        self._lock = threading.Lock()
+        self._queue: Queue = Queue(maxsize=queue_size)
+        self._index: Deque[Tuple[float, str]] = deque()
+        self._claim = DirectoryClaim(directory)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.ffmpeg = shutil.which("ffmpeg")
+        self.encoded_frames = 0
+        self.triggered = 0
+        self.written = 0
+        self.dropped = 0
+
+    # Ciclo de vida --------------------------------------------------------
+    def start(self) -> "ClipRecorder":
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    if entry.name.endswith(".part.mp4"):
+                        os.remove(entry.path)
+                    elif entry.name.endswith(".mp4"):
+                        entries.append((entry.stat().st_mtime, entry.path))
+            self._index = deque(sorted(entries))
+            self._claim.touch()
+            self._enforce()
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, name="clips", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Cierra los clips abiertos (con lo que tengan) y espera al codificador."""
+        if self._thread is None:
+            return
+        with self._lock:
+            for cam in self._cams.values():
+                self._close(cam)
+        self._running = False
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        self._claim.release()
+
+    # Captura ------------------------------------------------------------
+    def feed(self, camera_id: str, frame_bgr: np.ndarray, now: Optional[float] = None) -> bool:
+        """Muestra el frame a ``fps`` fijos; ``True`` si se guardó en el ring."""
+        now = time.monotonic() if now is None else now
+        cam = self._cams.get(camera_id)
+        if cam is None:
+            with self._lock:
+                cam = self._cams.setdefault(camera_id, _CameraBuffer(max(1, math.ceil(self.pre_sec * self.fps))))
+        if now < cam.next_at:
+            return False
+        cam.next_at = max(cam.next_at + self.period, now)
+
+        h, w = frame_bgr.shape[:2]
+        if self.width > 0 and w > self.width:
+            size = (max(1, h * self.width // w), self.width)
+            if cam.small is None or cam.small.shape[:2] != size:
+                cam.small = np.empty((*size, 3), dtype=np.uint8)
+            frame_bgr = resize_into(frame_bgr, cam.small)
+        ok, buf = cv2.imencode(".jpg", frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return False
+        jpeg = buf.tobytes()
+        self.encoded_frames += 1
+        with self._lock:
+            cam.ring.append(jpeg)
+            clip = cam.clip
+            if clip is not None:
+                clip.frames.append(jpeg)
+                if now >= clip.until:
+                    self._close(cam)
+        return True
+
+    def trigger(self, camera_id: str, camera_name: str, now: Optional[float] = None) -> Optional[str]:
+        """Abre (o extiende) el clip de la cámara; devuelve la ruta final del MP4."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            cam = self._cams.get(camera_id)
+            if cam is None or not cam.ring:
+                return None
+            if cam.clip is not None:
+                cam.clip.until = min(now + self.post_sec, cam.clip.max_until)
+                return cam.clip.path
+            tsf = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            path = os.path.join(self.directory, f"clip_{_safe_name(camera_name)}_{tsf}.mp4")
+            pre = len(cam.ring) * self.period
+            cam.clip = _Clip(path, list(cam.ring), now + self.post_sec, now + self.max_sec - pre)
+            self.triggered += 1
+            return path
+
+    def drop(self, camera_id: str) -> None:
+        """La cámara se quitó: cierra su clip abierto y libera el ring."""
+        with self._lock:
+            cam = self._cams.pop(camera_id, None)
+            if cam is not None:
+                self._close(cam)
+
+    # Codificación -------------------------------------------------------
+    def _close(self, cam: _CameraBuffer) -> None:
+        clip, cam.clip = cam.clip, None
+        if clip is None:
+            return
+        try:
+            self._queue.put_nowait(clip)
+        except Full:
+            self.dropped += 1
+            logging.warning(f"[clips] cola llena, clip descartado: {clip.path}")
+
+    def _expire(self) -> None:
+        # Cámaras que dejaron de mandar frames no deben dejar clips abiertos
+        now = time.monotonic()
+        with self._lock:
+            for cam in self._cams.values():
+                if cam.clip is not None and now >= cam.clip.until + 2 * self.period:
+                    self._close(cam)
+
+    def _loop(self) -> None:
+        while self._running or not self._queue.empty():
+            self._claim.touch()
+            try:
+                clip = self._queue.get(timeout=0.5)
+            except Empty:
+                self._expire()
+                self._enforce()
+                continue
+            try:
+                self._write(clip)
+            except Exception as e:
+                logging.error(f"[clips] {clip.path}: {e}")
+            self._expire()
+
+    def _write(self, clip: _Clip) -> None:
+        tmp = clip.path[:-4] + ".part.mp4"
+        if self.ffmpeg:
+            self._encode_ffmpeg(clip.frames, tmp)
+        else:
+            self._encode_cv2(clip.frames, tmp)
+        os.replace(tmp, clip.path)
+        self._index.append((time.time(), clip.path))
+        self.written += 1
+        self._enforce()
+
+    def _encode_ffmpeg(self, frames: List[bytes], out: str) -> None:
+        cmd = [
+            self.ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+            "-f", "image2pipe", "-c:v", "mjpeg", "-framerate", f"{self.fps:g}", "-i", "pipe:0",
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-movflags", "+faststart", out,
+        ]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            for jpeg in frames:
+                proc.stdin.write(jpeg)
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        _, err = proc.communicate(timeout=60)
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg terminó con {proc.returncode}: {err.decode(errors='replace').strip()}")
+
+    def _encode_cv2(self, frames: List[bytes], out: str) -> None:
+        writer = None
+        try:
+            for jpeg in frames:
+                img = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if img is None:
+                    continue
+                if writer is None:
+                    h, w = img.shape[:2]
+                    writer = cv2.VideoWriter(out, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (w, h))
+                writer.write(img)
+        finally:
+            if writer is not None:
+                writer.release()
+        if writer is None:
+            raise ValueError("clip sin frames decodificables")
+
+    def _over_limit(self, now: float) -> bool:
+        if not self._index:
+            return False
+        if self.max_files > 0 and len(self._index) > self.max_files:
+            return True
+        return self.max_age_sec > 0 and now - self._index[0][0] > self.max_age_sec
+
+    def _enforce(self) -> None:
+        now = time.time()
+        while self._over_limit(now):
+            _, path = self._index.popleft()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"[clips] no se pudo borrar {path}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            ring_frames = sum(len(c.ring) for c in self._cams.values())
+            ring_bytes = sum(len(j) for c in self._cams.values() for j in c.ring)
+            recording = sum(1 for c in self._cams.values() if c.clip is not None)
+        return {
+            "ring_frames": ring_frames,
+            "ring_kb": ring_bytes // 1024,
+            "recording": recording,
+            "encoded_frames": self.encoded_frames,
+            "triggered": self.triggered,
+            "written": self.written,
+            "dropped": self.dropped,
+            "files": len(self._index),
+        }
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import binascii
-import hashlib
 import os
 import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Optional
 
 from django.conf import settings
+from ml_models import get_model_path
+
+from .passwords import HasherBusy, PasswordHasher, get_hasher
+from .sqlite import ThreadLocalConnections
 
 try:
     from dotenv import load_dotenv
@@ -18,36 +22,6 @@ except Exception:
     pass
 
 
-def _workspace_roots() -> list[Path]:
-    base_dir = Path(settings.BASE_DIR).resolve()  # entrenamiento_niñeravirtual2/ninera_virtual
-    project_root = base_dir.parent  # entrenamiento_niñeravirtual2
-    repo_root = project_root.parent  # nineraVirtual2
-    candidates = [
-        project_root / "ml_models",
-        base_dir / "ml_models",
-        repo_root / "ml_models",
-        project_root,
-        repo_root,
-    ]
-    ordered: list[Path] = []
-    for path in candidates:
-        resolved = path.resolve()
-        if resolved not in ordered:
-            ordered.append(resolved)
-    return ordered
-
-
-def _resolve_from_dirs(filenames: Iterable[str], search_dirs: Iterable[Path]) -> Path:
-    for name in filenames:
-        for directory in search_dirs:
-            candidate = (directory / name).resolve()
-            if candidate.exists() and candidate.stat().st_size > 0:
-                return candidate
-    first_dir = next(iter(search_dirs))
-    first_name = next(iter(filenames))
-    return (first_dir / first_name).resolve()
-
-
 def _resolve_db_path() -> Path:
     override = os.getenv("LEGACY_DB_PATH")
     if override:
@@ -69,18 +43,37 @@ def _resolve_db_path() -> Path:
     return (project_root / "ninera_virtual.db").resolve()
 
 
+class _ModelPath:
+    """Ruta de pesos resuelta al leer el atributo, no al importar ``Config``."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def __get__(self, obj, owner=None) -> str:
+        return str(get_model_path(self.filename))
+
+
 class Config:
     """Configuraciones compartidas por la aplicación legacy."""
 
     BASE_DIR = Path(settings.BASE_DIR)
-    SEARCH_PATHS = _workspace_roots()
 
-    YOLO_MODEL_PATH = str(
-        _resolve_from_dirs(("ninera.pt", "NiñeraV.pt", "nineraV.pt"), SEARCH_PATHS)
-    )
-    COCO_MODEL_PATH = str(_resolve_from_dirs(("yolov8s.pt",), SEARCH_PATHS))
+    # Rutas resueltas por el catálogo de modelos al primer acceso (un escaneo por proceso)
+    YOLO_MODEL_PATH = _ModelPath("ninera.pt")
+    COCO_MODEL_PATH = _ModelPath("yolov8s.pt")
     USE_COCO_MODEL = True
 
+    # Cascada: un detector rápido (yolov8n a baja resolución) decide si hay
+    # un niño antes de correr el modelo custom. CASCADE_CAMERAS permite
+    # sobreescribir la política por cámara: {"cam": {"crop": false, ...}}
+    CASCADE = bool(int(os.getenv("CASCADE", "0")))
+    CASCADE_GATE_MODEL_PATH = _ModelPath(os.getenv("CASCADE_GATE_MODEL_FILE", "yolov8n.pt"))
+    CASCADE_GATE_IMGSZ = int(os.getenv("CASCADE_GATE_IMGSZ", "256"))
+    CASCADE_GATE_CONF = float(os.getenv("CASCADE_GATE_CONF", "0.30"))
+    CASCADE_CROP = bool(int(os.getenv("CASCADE_CROP", "1")))
+    CASCADE_CROP_MARGIN = float(os.getenv("CASCADE_CROP_MARGIN", "0.5"))
+    CASCADE_CAMERAS = os.getenv("CASCADE_CAMERAS", "")
+
     COCO_CLASS_MAP = {
         "knife": "cuchillo",
         "oven": "horno",
@@ -140,6 +133,37 @@ class Config:
         "estante",
     ]
 
+    STAIRS_LABELS = ["stairs", "escaleras"]
+    STOVE_LABELS = ["cooker", "kitchen", "cocina", "oven", "horno"]
+    RAILING_LABELS = ["handrail", "baranda"]
+    # Objetos que casi nunca se mueven: se detectan con baja frecuencia
+    # (mapa de escena por cámara) y se reutilizan en las reglas de riesgo.
+    STATIC_SCENE_LABELS = HIGH_SURFACE_LABELS + STAIRS_LABELS + STOVE_LABELS + RAILING_LABELS
+    SCENE_MAP = bool(int(os.getenv("SCENE_MAP", "1")))
+    SCENE_REFRESH_SEC = float(os.getenv("SCENE_REFRESH_SEC", "30"))
+    SCENE_CHANGE_THR = float(os.getenv("SCENE_CHANGE_THR", "18"))
+    # imgsz del pase por frame (solo niños/objetos móviles); 0 = el del modelo
+    SCENE_DYNAMIC_IMGSZ = int(os.getenv("SCENE_DYNAMIC_IMGSZ", "0"))
+
+    # Captura: "auto" usa ffmpeg para RTSP/HTTP, "ffmpeg" también para archivos
+    CAPTURE_BACKEND = os.getenv("CAPTURE_BACKEND", "auto").lower()
+    # ffmpeg entrega los frames ya al ancho de inferencia; CAPTURE_WIDTH > 0 lo fuerza
+    INFER_IMG_W = int(os.getenv("INFER_IMG_W", "416"))
+    CAPTURE_WIDTH = int(os.getenv("CAPTURE_WIDTH", "0"))
+    CAPTURE_FPS = float(os.getenv("CAPTURE_FPS", "0"))
+    CAPTURE_MAX_BACKOFF = float(os.getenv("CAPTURE_MAX_BACKOFF", "10"))
+    CAPTURE_OPEN_ATTEMPTS = int(os.getenv("CAPTURE_OPEN_ATTEMPTS", "5"))
+
+    # Decimación en captura: frames que no se infieren ni se muestran no se decodifican
+    INFER_FPS = float(os.getenv("INFER_FPS", "8"))
+    DISPLAY_FPS = float(os.getenv("DISPLAY_FPS", "25"))
+
+    # Scheduler de inferencia compartido: 0 = según núcleos disponibles
+    INFER_WORKERS = int(os.getenv("INFER_WORKERS", "0"))
+    INFER_STATS_SEC = float(os.getenv("INFER_STATS_SEC", "30"))
+    # Motor headless: una cámara sin frames nuevos en este tiempo se reporta "stale"
+    ENGINE_STALE_SEC = float(os.getenv("ENGINE_STALE_SEC", "10"))
+
     PROXIMITY_PX = 120.0
     CD_GENERAL = 5
     CD_HANDRAIL = 1
@@ -154,34 +178,75 @@ class Config:
     TELEGRAM_JPEG_QLTY = 80
     TELEGRAM_CONC = 2
 
-    UPDATE_MS = 25
+    # Vista mosaico (todas las cámaras): refresco y alerta resaltada
+    MOSAIC_FPS = float(os.getenv("MOSAIC_FPS", "10"))
+    MOSAIC_ALERT_SEC = 5.0
+    # Refresco de la vista en vivo al ritmo de DISPLAY_FPS
+    UPDATE_MS = max(5, int(1000 / DISPLAY_FPS)) if DISPLAY_FPS > 0 else 25
     SAVE_IMG_DIR = str(Path(settings.MEDIA_ROOT) / "alertas_img")
     MAX_ALERT_IMGS = 500
+    # Retención adicional de capturas: 0 = sin límite. La antigüedad toma
+    # RETENTION_SNAPSHOT_DAYS porque la retención del servidor no borra en
+    # directorios de un escritor activo.
+    MAX_ALERT_IMG_MB = int(os.getenv("MAX_ALERT_IMG_MB", "0"))
+    ALERT_IMG_MAX_AGE_DAYS = float(os.getenv("ALERT_IMG_MAX_AGE_DAYS", os.getenv("RETENTION_SNAPSHOT_DAYS", "30")))
+    # Clips de alerta: ring en memoria de JPEG reducidos; solo se codifica
+    # a MP4 (segundos previos + posteriores) cuando hay una alerta
+    ALERT_CLIPS = bool(int(os.getenv("ALERT_CLIPS", "1")))
+    CLIP_DIR = str(Path(settings.MEDIA_ROOT) / "alertas_clip")
+    CLIP_PRE_SEC = float(os.getenv("CLIP_PRE_SEC", "5"))
+    CLIP_POST_SEC = float(os.getenv("CLIP_POST_SEC", "5"))
+    CLIP_MAX_SEC = float(os.getenv("CLIP_MAX_SEC", "30"))
+    CLIP_FPS = float(os.getenv("CLIP_FPS", "5"))
+    CLIP_WIDTH = int(os.getenv("CLIP_WIDTH", "480"))
+    CLIP_JPEG_QLTY = 70
+    MAX_ALERT_CLIPS = int(os.getenv("MAX_ALERT_CLIPS", "100"))
+    CLIP_MAX_AGE_DAYS = float(os.getenv("CLIP_MAX_AGE_DAYS", os.getenv("RETENTION_SNAPSHOT_DAYS", "30")))
     SOUND = True
 
     GRAYSCALE = False
     CLAHE = False
 
     DB_PATH = str(_resolve_db_path())
-    PASSWORD_ITERATIONS = 120_000
+    # Iteraciones PBKDF2-SHA256 para hashes nuevos (600000, la cifra que
+    # recomienda OWASP); los usuarios con menos se actualizan al iniciar sesión
+    PASSWORD_ITERATIONS = int(os.getenv("PASSWORD_ITERATIONS", "600000"))
+    # Pool de procesos para el hash (0 = en el mismo hilo) y control de admisión
+    PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))
+    PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", "16"))
+    PASSWORD_WAIT_SEC = float(os.getenv("PASSWORD_WAIT_SEC", "2"))
+
+
+LEGACY_PASSWORD_ITERATIONS = 120_000
+_DUMMY_SALT = "00" * 16
 
 
 class DatabaseConnection:
-    """Singleton para la conexión SQLite."""
+    """Singleton de la base SQLite legacy, con una conexión por hilo.
+
+    Las conexiones van afinadas (WAL, busy timeout, mmap; ver
+    ``legacy.sqlite``) y ya no se comparten entre hilos.
+    """
 
     _instance: Optional["DatabaseConnection"] = None
+    _instance_lock = threading.Lock()
 
-    def __init__(self):
-        self.conn = sqlite3.connect(Config.DB_PATH, check_same_thread=False)
-        self.conn.execute("PRAGMA foreign_keys = ON")
+    def __init__(self, path: Optional[str] = None):
+        self.connections = ThreadLocalConnections(path or Config.DB_PATH)
         self._init_schema()
 
     @classmethod
     def get_instance(cls) -> "DatabaseConnection":
         if cls._instance is None:
-            cls._instance = DatabaseConnection()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = DatabaseConnection()
         return cls._instance
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self.connections.get()
+
     def _init_schema(self) -> None:
         cur = self.conn.cursor()
         cur.execute(
@@ -192,10 +257,17 @@ class DatabaseConnection:
                 email TEXT NOT NULL UNIQUE,
                 password_hash TEXT NOT NULL,
                 salt TEXT NOT NULL,
-                created_at TEXT NOT NULL
+                created_at TEXT NOT NULL,
+                iterations INTEGER NOT NULL DEFAULT {legacy}
             )
-        """
+        """.format(legacy=LEGACY_PASSWORD_ITERATIONS)
         )
+        columns = {row[1] for row in cur.execute("PRAGMA table_info(users)")}
+        if "iterations" not in columns:
+            # Bases anteriores: todos los hashes se calcularon con 120k iteraciones
+            cur.execute(
+                f"ALTER TABLE users ADD COLUMN iterations INTEGER NOT NULL DEFAULT {LEGACY_PASSWORD_ITERATIONS}"
+            )
         self.conn.commit()
 
     def get_conn(self):
@@ -203,33 +275,46 @@ class DatabaseConnection:
 
 
 class UserRepository:
-    """Repositorio para operar sobre la tabla de usuarios."""
+    """Repositorio para operar sobre la tabla de usuarios.
+
+    ``hasher`` por defecto es el pool compartido del proceso (``get_hasher``);
+    la GUI y los comandos pasan el suyo.
+    """
 
-    def __init__(self, db: DatabaseConnection):
-        self.conn = db.get_conn()
+    def __init__(self, db: DatabaseConnection, hasher: Optional[PasswordHasher] = None):
+        self.db = db
+        self._hasher = hasher
+
+    @property
+    def hasher(self) -> PasswordHasher:
+        return self._hasher or get_hasher()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Conexión del hilo que ejecuta la operación, no la del que creó el repositorio
+        return self.db.get_conn()
 
     @staticmethod
-    def _hash_password(password: str, salt: bytes) -> str:
-        dk = hashlib.pbkdf2_hmac(
-            "sha256", password.encode("utf-8"), salt, Config.PASSWORD_ITERATIONS
-        )
-        return binascii.hexlify(dk).decode("utf-8")
+    def _new_salt() -> str:
+        return binascii.hexlify(os.urandom(16)).decode("utf-8")
 
     def create_user(self, name: str, email: str, password: str) -> None:
-        salt = os.urandom(16)
-        phash = self._hash_password(password, salt)
+        salt = self._new_salt()
+        iterations = Config.PASSWORD_ITERATIONS
+        phash = self.hasher.hash(password, salt, iterations)
         cur = self.conn.cursor()
         cur.execute(
             """
-            INSERT INTO users (name, email, password_hash, salt, created_at)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT INTO users (name, email, password_hash, salt, created_at, iterations)
+            VALUES (?, ?, ?, ?, ?, ?)
         """,
             (
                 name.strip(),
                 email.strip().lower(),
                 phash,
-                binascii.hexlify(salt).decode("utf-8"),
+                salt,
                 datetime.now().isoformat(timespec="seconds"),
+                iterations,
             ),
         )
         self.conn.commit()
@@ -237,7 +322,7 @@ class UserRepository:
     def find_by_email(self, email: str):
         cur = self.conn.cursor()
         cur.execute(
-            "SELECT id, name, email, password_hash, salt FROM users WHERE email = ?",
+            "SELECT id, name, email, password_hash, salt, iterations FROM users WHERE email = ?",
             (email.strip().lower(),),
         )
         row = cur.fetchone()
@@ -249,14 +334,33 @@ class UserRepository:
             "email": row[2],
             "password_hash": row[3],
             "salt": row[4],
+            "iterations": row[5],
         }
 
     def verify_credentials(self, email: str, password: str):
+        """Usuario si la contraseña coincide; ``HasherBusy`` si no hay turno."""
+        hasher = self.hasher
         user = self.find_by_email(email)
         if not user:
+            # Mismo costo que un usuario real: no revelar qué correos existen
+            hasher.hash(password, _DUMMY_SALT, Config.PASSWORD_ITERATIONS)
             return None
-        salt = binascii.unhexlify(user["salt"].encode("utf-8"))
-        phash = self._hash_password(password, salt)
-        if phash == user["password_hash"]:
-            return user
-        return None
+        if not hasher.verify(password, user["salt"], user["iterations"], user["password_hash"]):
+            return None
+        if user["iterations"] < Config.PASSWORD_ITERATIONS:
+            self._upgrade_hash(user, password)
+        return user
+
+    def _upgrade_hash(self, user: dict, password: str) -> None:
+        salt = self._new_salt()
+        iterations = Config.PASSWORD_ITERATIONS
+        try:
+            phash = self.hasher.hash(password, salt, iterations)
+        except HasherBusy:
+            return  # se reintentará en el próximo login
+        self.conn.execute(
+            "UPDATE users SET password_hash = ?, salt = ?, iterations = ? WHERE id = ?",
+            (phash, salt, iterations, user["id"]),
+        )
+        self.conn.commit()
+        user.update(password_hash=phash, salt=salt, iterations=iterations)
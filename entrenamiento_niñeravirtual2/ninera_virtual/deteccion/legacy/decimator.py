@@ -0,0 +1,56 @@
+"""Política de decimación de frames en captura.
+
+Decide, frame a frame, si vale la pena decodificar (``retrieve``) lo que
+se acaba de avanzar con ``grab``: solo cuando toca inferir (``infer_fps``)
+o mostrar la cámara (``display_fps``, y solo si está visible). El resto se
+descarta sin decodificar.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from .config import Config
+
+
+class FrameDecimator:
+    """Reloj doble inferencia/display; ``0`` fps = todos los frames."""
+
+    def __init__(self, infer_fps: float = Config.INFER_FPS, display_fps: float = Config.DISPLAY_FPS):
+        self.infer_period = 1.0 / infer_fps if infer_fps > 0 else 0.0
+        self.display_period = 1.0 / display_fps if display_fps > 0 else 0.0
+        self._next_infer = 0.0
+        self._next_display = 0.0
+        self.grabbed = 0
+        self.decoded = 0
+
+    def set_display_fps(self, display_fps: float) -> None:
+        self.display_period = 1.0 / display_fps if display_fps > 0 else 0.0
+
+    @staticmethod
+    def _advance(due: float, period: float, now: float) -> float:
+        # Sin acumular deuda si la cámara se atrasó: se retoma desde ``now``
+        nxt = due + period
+        return nxt if nxt > now else now + period
+
+    def should_decode(self, visible: bool, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self.grabbed += 1
+        infer = now >= self._next_infer
+        display = visible and now >= self._next_display
+        if not (infer or display):
+            return False
+        if infer:
+            self._next_infer = self._advance(self._next_infer, self.infer_period, now)
+        if visible and now >= self._next_display:
+            self._next_display = self._advance(self._next_display, self.display_period, now)
+        self.decoded += 1
+        return True
+
+    @property
+    def skip_ratio(self) -> float:
+        return 1.0 - self.decoded / self.grabbed if self.grabbed else 0.0
+
+    def stats(self) -> dict:
+        return {"grabbed": self.grabbed, "decoded": self.decoded, "skip_ratio": round(self.skip_ratio, 3)}
@@ -1,79 +1,114 @@
 from __future__ import annotations
 
+import copy
 import logging
-from dataclasses import dataclass
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, Iterable, List, Optional
+from typing import Collection, Dict, List, Optional
 
 import numpy as np
 
+from ..risks import RULE_RISKS, ZONE
+from .batch import VOCAB, DetectionBatch, source_id
+from .cascade import CHILD_LABELS, CascadePolicy, CascadeStats, crop_region
 from .config import Config
+from .scene import STATIC_LABELS, SceneMapRegistry
 
 try:
     from ultralytics import YOLO
 except Exception:  # pragma: no cover - dependencia pesada
     YOLO = None  # type: ignore
 
+class IDetectionStrategy:
+    def detect(self, frame_bgr, exclude: Optional[Collection[str]] = None) -> DetectionBatch:
+        """Detecta objetos; ``exclude`` omite esas etiquetas (pase parcial)."""
+        ...
 
-@dataclass
-class Detection:
-    label: str
-    box: Iterable[int]
-    confidence: float
-    src: str
+    def full_detect(self, frame_bgr) -> DetectionBatch:
+        """Pase completo sin atajos (lo usa el refresco del mapa de escena)."""
+        return self.detect(frame_bgr)
 
 
-class IDetectionStrategy:
-    def detect(self, frame_bgr) -> List[Detection]: ...
+class _YOLOStrategyBase(IDetectionStrategy):
+    """Construye los kwargs de ``predict`` para pases completos o parciales.
 
+    Al cargar el modelo se arma una vez la tabla clase-del-modelo -> id del
+    vocabulario (``self.lut``); por frame ya no se tocan strings.
+    """
 
-class YOLOCustomStrategy(IDetectionStrategy):
-    def __init__(self, model_path: str):
-        if YOLO is None:
-            raise RuntimeError("Ultralytics YOLO no está disponible.")
-        self.model = YOLO(model_path)
+    CLASS_MAP: Optional[Dict[str, str]] = None
+    DEFAULT_CONF = 0.25
+    IOU = Config.YOLO_IOU
+    SOURCE = "detector"
 
-    def detect(self, frame_bgr):
-        out: List[Detection] = []
-        res = self.model.predict(
-            source=frame_bgr,
-            conf=min(Config.YOLO_CONF_DEFAULT, 0.25),
-            iou=Config.YOLO_IOU,
-            verbose=False,
-        )
-        if res and res[0].boxes is not None:
-            names = self.model.names
-            for b in res[0].boxes:
-                xyxy = b.xyxy.cpu().numpy().astype(int)[0]
-                conf = float(b.conf.item())
-                cls = int(b.cls.item())
-                label = names[cls].lower()
-                out.append(Detection(label, xyxy, conf, "custom"))
-        return out
-
-
-class YOLOCocoStrategy(IDetectionStrategy):
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, imgsz: Optional[int] = None, conf: Optional[float] = None):
         if YOLO is None:
             raise RuntimeError("Ultralytics YOLO no está disponible.")
         self.model = YOLO(model_path)
-
-    def detect(self, frame_bgr):
-        out: List[Detection] = []
-        res = self.model.predict(source=frame_bgr, conf=0.25, iou=0.5, verbose=False)
-        if res and res[0].boxes is not None:
-            names = self.model.names
-            for b in res[0].boxes:
-                xyxy = b.xyxy.cpu().numpy().astype(int)[0]
-                conf = float(b.conf.item())
-                cls = int(b.cls.item())
-                raw = names[cls]
-                if isinstance(raw, (bytes, bytearray)):
-                    raw = raw.decode("utf-8", errors="ignore")
-                mapped = Config.COCO_CLASS_MAP.get(str(raw).lower())
-                if mapped:
-                    out.append(Detection(mapped.lower(), xyxy, conf, "coco"))
-        return out
+        # El predictor de ultralytics no es thread-safe; las copias de
+        # ``with_options`` comparten modelo y por lo tanto este lock.
+        self._predict_lock = threading.Lock()
+        self.imgsz = imgsz
+        self.conf = self.DEFAULT_CONF if conf is None else conf
+        self.lut = VOCAB.lut_for(self.model.names, self.CLASS_MAP)
+        self.src_id = source_id(self.SOURCE)
+        self._classes_cache: Dict[frozenset, Optional[List[int]]] = {}
+
+    def with_options(self, imgsz: Optional[int] = None, conf: Optional[float] = None):
+        """Copia que comparte el modelo cargado pero con otro imgsz/conf."""
+        clone = copy.copy(self)
+        if imgsz is not None:
+            clone.imgsz = imgsz
+        if conf is not None:
+            clone.conf = conf
+        return clone
+
+    def _classes(self, exclude: Collection[str]) -> Optional[List[int]]:
+        """Ids de clase del modelo a pedir (``None`` = todas)."""
+        key = frozenset(exclude)
+        if key not in self._classes_cache:
+            valid = self.lut >= 0
+            if key:
+                valid &= ~VOCAB.membership(key)[np.maximum(self.lut, 0)]
+            if valid.all():
+                self._classes_cache[key] = None
+            else:
+                self._classes_cache[key] = np.flatnonzero(valid).tolist()
+        return self._classes_cache[key]
+
+    def _predict_kwargs(self, exclude: Optional[Collection[str]]):
+        kwargs = {"conf": self.conf, "iou": self.IOU}
+        if self.imgsz:
+            kwargs["imgsz"] = self.imgsz
+        classes = self._classes(exclude or ())
+        if classes is not None:
+            kwargs["classes"] = classes
+        if exclude and Config.SCENE_DYNAMIC_IMGSZ > 0 and not self.imgsz:
+            kwargs["imgsz"] = Config.SCENE_DYNAMIC_IMGSZ
+        return kwargs
+
+    def detect(self, frame_bgr, exclude=None):
+        kwargs = self._predict_kwargs(exclude)
+        if "classes" in kwargs and not kwargs["classes"]:
+            return DetectionBatch.empty()
+        with self._predict_lock:
+            res = self.model.predict(source=frame_bgr, verbose=False, **kwargs)
+        if not res:
+            return DetectionBatch.empty()
+        return DetectionBatch.from_yolo(res[0], self.lut, self.src_id)
+
+
+class YOLOCustomStrategy(_YOLOStrategyBase):
+    DEFAULT_CONF = min(Config.YOLO_CONF_DEFAULT, 0.25)
+    SOURCE = "custom"
+
+
+class YOLOCocoStrategy(_YOLOStrategyBase):
+    """COCO restringido (vía ``classes``) a las clases de ``COCO_CLASS_MAP``."""
+
+    CLASS_MAP = Config.COCO_CLASS_MAP
+    IOU = 0.5
+    SOURCE = "coco"
 
 
 class FusionDetectionStrategy(IDetectionStrategy):
@@ -83,47 +118,65 @@ class FusionDetectionStrategy(IDetectionStrategy):
         self.a = strat_a
         self.b = strat_b
 
-    def detect(self, frame_bgr):
-        dets: List[Detection] = []
+    def detect(self, frame_bgr, exclude=None):
+        batches: List[DetectionBatch] = []
         try:
-            dets += self.a.detect(frame_bgr)
+            batches.append(self.a.detect(frame_bgr, exclude))
         except Exception as e:
             logging.error(f"Custom detect error: {e}")
         if self.b:
             try:
-                dets += self.b.detect(frame_bgr)
+                batches.append(self.b.detect(frame_bgr, exclude))
             except Exception as e:
                 logging.error(f"COCO detect error: {e}")
-        if not dets:
-            return []
-
-        def iou(a, b):
-            x1 = max(a[0], b[0])
-            y1 = max(a[1], b[1])
-            x2 = min(a[2], b[2])
-            y2 = min(a[3], b[3])
-            inter = max(0, x2 - x1) * max(0, y2 - y1)
-            A = (a[2] - a[0]) * (a[3] - a[1])
-            B = (b[2] - b[0]) * (b[3] - b[1])
-            return inter / max(A + B - inter + 1e-9, 1e-9)
-
-        res: List[Detection] = []
-        used = [False] * len(dets)
-        for i, di in enumerate(dets):
-            if used[i]:
-                continue
-            best = di
-            for j in range(i + 1, len(dets)):
-                if used[j]:
-                    continue
-                dj = dets[j]
-                if di.label == dj.label and iou(di.box, dj.box) > 0.5:
-                    if dj.confidence > best.confidence:
-                        best = dj
-                    used[j] = True
-            used[i] = True
-            res.append(best)
-        return res
+        return nms_by_label(DetectionBatch.concat(batches))
+
+
+class CascadeDetectionStrategy(IDetectionStrategy):
+    """Cascada: un gate barato busca niños y solo entonces corre el modelo pesado.
+
+    Con ``policy.crop`` el modelo pesado procesa únicamente la región que
+    rodea a los niños (más un margen) y sus cajas se trasladan de vuelta
+    al frame completo. Los contadores quedan en ``stats``.
+    """
+
+    def __init__(self, gate: IDetectionStrategy, heavy: IDetectionStrategy, policy: Optional[CascadePolicy] = None):
+        self.policy = policy or CascadePolicy()
+        if hasattr(gate, "with_options"):
+            gate = gate.with_options(imgsz=self.policy.gate_imgsz, conf=self.policy.gate_conf)
+        self.gate = gate
+        self.heavy = heavy
+        self.stats = CascadeStats()
+
+    def detect(self, frame_bgr, exclude=None):
+        self.stats.frames += 1
+        gate_dets = self.gate.detect(frame_bgr, exclude)
+        children = gate_dets.label_mask(CHILD_LABELS)
+        if not children.any():
+            return gate_dets
+        self.stats.gated += 1
+        self.stats.heavy_runs += 1
+        region = None
+        if self.policy.crop:
+            region = crop_region(gate_dets.boxes[children], frame_bgr.shape, self.policy.crop_margin)
+        if region is None:
+            heavy_dets = self.heavy.detect(frame_bgr, exclude)
+        else:
+            self.stats.crop_runs += 1
+            x1, y1, x2, y2 = region
+            heavy_dets = self.heavy.detect(frame_bgr[y1:y2, x1:x2], exclude).shifted(x1, y1)
+        return nms_by_label(gate_dets + heavy_dets)
+
+    def full_detect(self, frame_bgr):
+        self.stats.full_runs += 1
+        return nms_by_label(self.gate.detect(frame_bgr) + self.heavy.detect(frame_bgr))
+
+
+def nms_by_label(dets: DetectionBatch, iou_thr: float = 0.5) -> DetectionBatch:
+    """NMS por clase: conserva la detección de mayor confianza (IoU > 0.5)."""
+    if not isinstance(dets, DetectionBatch):
+        dets = DetectionBatch.from_detections(dets)
+    return dets.nms_by_label(iou_thr)
 
 
 class IRiskObserver:
@@ -131,22 +184,39 @@ class IRiskObserver:
 
 
 class RiskEvent:
-    def __init__(self, camera_name, messages, frame_bgr):
+    def __init__(self, camera_name, messages, frame_bgr, camera_id=None, risks=None, detections=None):
         self.camera_name = camera_name
+        self.camera_id = camera_id
         self.messages = messages
         self.frame_bgr = frame_bgr
+        # Códigos de ``deteccion.risks`` y detecciones (dicts de ``to_items``)
+        self.risks = risks or []
+        self.detections = detections or []
         self.ts = datetime.now()
 
 
 class RiskAnalysisFacade:
     """Aplica reglas de riesgo y notifica a observers."""
 
-    def __init__(self, detector: IDetectionStrategy):
+    PROXIMITY_RULES = {
+        "CHILD_NEAR_KNIFE": ("NIÑO CERCA DE CUCHILLO!", frozenset({"knife", "cuchillo"})),
+        "CHILD_NEAR_STAIRS": ("NIÑO CERCA DE ESCALERAS!", frozenset({"stairs", "escaleras"})),
+        "CHILD_NEAR_STOVE": ("NIÑO CERCA DE ESTUFA/COCINA!", frozenset({"cooker", "kitchen", "cocina"})),
+        "CHILD_NEAR_POT": ("NIÑO CERCA DE OLLA/SARTÉN!", frozenset({"pot", "pan", "olla"})),
+        "CHILD_NEAR_OVEN": ("NIÑO CERCA DE HORNO!", frozenset({"oven", "horno"})),
+        "CHILD_NEAR_RAILING": ("NIÑO CERCA DE BARANDA!", frozenset({"handrail", "baranda"})),
+        "CHILD_NEAR_SCISSORS": ("NIÑO CERCA DE TIJERAS!", frozenset({"scissors", "tijeras"})),
+    }
+
+    def __init__(self, detector: IDetectionStrategy, use_scene_map: bool = Config.SCENE_MAP):
         self.detector = detector
         self.observers: List[IRiskObserver] = []
         self.cooldowns: Dict[tuple, datetime] = {}
+        self._cooldown_lock = threading.Lock()
         self.polygons_per_cam: Dict[str, Dict] = {}
         self.high_surfaces = set(Config.HIGH_SURFACE_LABELS)
+        self.scene_maps: Optional[SceneMapRegistry] = SceneMapRegistry() if use_scene_map else None
+        self.camera_detectors: Dict[str, IDetectionStrategy] = {}
 
     def subscribe(self, obs: IRiskObserver):
         self.observers.append(obs)
@@ -154,6 +224,29 @@ class RiskAnalysisFacade:
     def set_polygons(self, cam_id, zones_dict):
         self.polygons_per_cam[cam_id] = zones_dict
 
+    def set_camera_detector(self, cam_id, detector: Optional[IDetectionStrategy]):
+        """Estrategia propia para una cámara (p. ej. cascada con su política)."""
+        if detector is None:
+            self.camera_detectors.pop(cam_id, None)
+        else:
+            self.camera_detectors[cam_id] = detector
+
+    def reset_scene(self, cam_id):
+        if self.scene_maps is not None:
+            self.scene_maps.reset(cam_id)
+
+    def _detect(self, frame_bgr, camera_id) -> DetectionBatch:
+        """Detección completa o parcial + objetos estáticos cacheados."""
+        detector = self.camera_detectors.get(camera_id, self.detector)
+        if self.scene_maps is None:
+            return detector.detect(frame_bgr)
+        scene = self.scene_maps.get(camera_id)
+        if scene.needs_refresh(frame_bgr):
+            dets = detector.full_detect(frame_bgr)
+            scene.update(frame_bgr, dets.select(dets.label_mask(STATIC_LABELS)))
+            return dets
+        return detector.detect(frame_bgr, exclude=STATIC_LABELS) + scene.detections
+
     @staticmethod
     def _center(box):
         return int((box[0] + box[2]) / 2), int((box[1] + box[3]) / 2)
@@ -242,52 +335,54 @@ class RiskAnalysisFacade:
     def _mark(self, cam, typ, ck=None):
         self.cooldowns[(cam, typ, ck)] = datetime.now()
 
-    def detect_and_evaluate(self, frame_bgr, camera_id, camera_name):
-        dets = self.detector.detect(frame_bgr)
-        filtered = []
-        for d in dets:
-            thr = Config.CLASS_THRESHOLDS.get(d.label, Config.YOLO_CONF_DEFAULT)
-            if d.confidence >= thr:
-                filtered.append(d)
-        msgs = []
-        children = [d for d in filtered if d.label in ["nino", "child"]]
-        prox_cfg = {
-            "CHILD_NEAR_KNIFE": ("NIÑO CERCA DE CUCHILLO!", {"knife", "cuchillo"}),
-            "CHILD_NEAR_STAIRS": ("NIÑO CERCA DE ESCALERAS!", {"stairs", "escaleras"}),
-            "CHILD_NEAR_STOVE": ("NIÑO CERCA DE ESTUFA/COCINA!", {"cooker", "kitchen", "cocina"}),
-            "CHILD_NEAR_POT": ("NIÑO CERCA DE OLLA/SARTÉN!", {"pot", "pan", "olla"}),
-            "CHILD_NEAR_OVEN": ("NIÑO CERCA DE HORNO!", {"oven", "horno"}),
-            "CHILD_NEAR_RAILING": ("NIÑO CERCA DE BARANDA!", {"handrail", "baranda"}),
-            "CHILD_NEAR_SCISSORS": ("NIÑO CERCA DE TIJERAS!", {"scissors", "tijeras"}),
-        }
-        if children:
-            for ch in children:
-                ck = self._child_key(ch.box)
-                for key, (m, labels) in prox_cfg.items():
-                    boxes = [o.box for o in filtered if o.label in labels]
-                    for bx in boxes:
-                        if self._proximity(ch.box, bx, Config.PROXIMITY_PX):
-                            if self._can(camera_id, key, ck):
-                                msgs.append(m)
-                                self._mark(camera_id, key, ck)
-                            break
-            high = [o for o in filtered if o.label in Config.HIGH_SURFACE_LABELS]
-            for ch in children:
-                if (ch.box[2] - ch.box[0]) * (ch.box[3] - ch.box[1]) < 40 * 40:
+    def _claim(self, cam, typ, ck=None):
+        """``_can`` + ``_mark`` atómicos (varios workers comparten el facade)."""
+        with self._cooldown_lock:
+            if not self._can(cam, typ, ck):
+                return False
+            self._mark(cam, typ, ck)
+            return True
+
+    def detect_and_evaluate(self, frame_bgr, camera_id, camera_name) -> DetectionBatch:
+        filtered = self._detect(frame_bgr, camera_id).above_thresholds(Config.YOLO_CONF_DEFAULT)
+        msgs, risks = [], []
+        child_mask = filtered.label_mask(CHILD_LABELS)
+        if child_mask.any():
+            boxes = filtered.boxes
+            children = boxes[child_mask].tolist()
+            centers = (boxes[:, :2] + boxes[:, 2:]) // 2
+            for key, (m, labels) in self.PROXIMITY_RULES.items():
+                hazard = centers[filtered.label_mask(labels)]
+                if not len(hazard):
                     continue
-                for s in high:
-                    if self._child_on_high_surface(ch.box, s.box, s.label):
-                        k = "CHILD_ON_HIGH_SURFACE"
-                        ck = self._child_key(ch.box)
-                        if self._can(camera_id, k, ck):
-                            msgs.append(f"¡ALERTA! NIÑO SOBRE {s.label.upper()}!")
-                            self._mark(camera_id, k, ck)
-                        break
+                for ch in children:
+                    cx, cy = self._center(ch)
+                    if (np.hypot(hazard[:, 0] - cx, hazard[:, 1] - cy) < Config.PROXIMITY_PX).any():
+                        ck = self._child_key(ch)
+                        if self._claim(camera_id, key, ck):
+                            msgs.append(m)
+                            risks.append(RULE_RISKS[key])
+            high_mask = filtered.label_mask(Config.HIGH_SURFACE_LABELS)
+            if high_mask.any():
+                high_idx = np.flatnonzero(high_mask).tolist()
+                labels = filtered.vocab.labels
+                for ch in children:
+                    if (ch[2] - ch[0]) * (ch[3] - ch[1]) < 40 * 40:
+                        continue
+                    for i in high_idx:
+                        s_label = labels[filtered.cls[i]]
+                        if self._child_on_high_surface(ch, boxes[i].tolist(), s_label):
+                            k = "CHILD_ON_HIGH_SURFACE"
+                            ck = self._child_key(ch)
+                            if self._claim(camera_id, k, ck):
+                                msgs.append(f"¡ALERTA! NIÑO SOBRE {s_label.upper()}!")
+                                risks.append(RULE_RISKS[k])
+                            break
             zones = self.polygons_per_cam.get(camera_id, {})
             if zones:
                 for ch in children:
-                    ck = self._child_key(ch.box)
-                    probes = self._polygon_probe_points(ch.box)
+                    ck = self._child_key(ch)
+                    probes = self._polygon_probe_points(ch)
                     for name, polys in zones.items():
                         for poly in polys:
                             if any(
@@ -295,13 +390,13 @@ class RiskAnalysisFacade:
                                 for px, py in probes
                             ):
                                 k = f"CHILD_IN_ZONE_{name}"
-                                if self._can(camera_id, k, ck):
+                                if self._claim(camera_id, k, ck):
                                     msgs.append(f"NIÑO EN ZONA: {name.upper()}!")
-                                    self._mark(camera_id, k, ck)
+                                    risks.append(ZONE)
                                 break
 
         if msgs:
-            ev = RiskEvent(camera_name, msgs, frame_bgr)
+            ev = RiskEvent(camera_name, msgs, frame_bgr, camera_id, risks, filtered.to_items())
             for obs in self.observers:
                 try:
                     obs.on_alert(ev)
@@ -0,0 +1,347 @@
+"""Motor de monitoreo sin interfaz.
+
+Reúne lo que antes vivía dentro de la ventana Tk: fuentes de captura con
+su ring de frames, el scheduler de inferencia compartido, la fachada de
+riesgo con sus estrategias y los observers de alertas. La GUI y el daemon
+headless (``run_detection_daemon``) lo usan igual; la GUI solo aporta el
+callback ``visible`` para decodificar también al ritmo de display.
+
+Los recursos quedan acotados por construcción: un ring fijo por cámara,
+un pool fijo de workers para todas las cámaras y una cola acotada de
+capturas en disco.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import cv2
+
+from .adapters import STREAM_SCHEMES, VideoSourceFactory
+from .cascade import CascadePolicy
+from .clips import ClipRecorder
+from .config import Config
+from .decimator import FrameDecimator
+from .detection import (
+    CascadeDetectionStrategy,
+    FusionDetectionStrategy,
+    IRiskObserver,
+    RiskAnalysisFacade,
+    RiskEvent,
+    YOLOCustomStrategy,
+    YOLOCocoStrategy,
+)
+from .framebuffer import FrameRing
+from .notifications import NotificationMediator
+from .scheduler import InferenceScheduler
+from .snapshots import SnapshotWriter
+
+
+class MonitoringEngine:
+    """Fuentes + scheduler + fachada; Observer de la fachada y Subject propio.
+
+    Los observers suscritos con ``subscribe`` reciben el ``RiskEvent`` con
+    el frame ya copiado (fuera del ring), ``image_path`` con la captura
+    encolada y ``clip_path`` con el MP4 que se cerrará unos segundos
+    después (``None`` si no aplica).
+    """
+
+    def __init__(
+        self,
+        visible: Optional[Callable[[str], bool]] = None,
+        save_snapshots: bool = True,
+        record_clips: bool = Config.ALERT_CLIPS,
+        notify: bool = Config.SEND_TELEGRAM,
+        workers: Optional[int] = None,
+    ):
+        self.visible = visible or (lambda camera_id: False)
+        self.running = False
+        self.cameras: Dict[str, dict] = {}
+        # Un ring de frames por cámara; la inferencia publica sus últimas
+        # detecciones (seq, batch) para quien quiera dibujarlas.
+        self.frame_rings: Dict[str, FrameRing] = {}
+        self.latest_detections: Dict[str, tuple] = {}
+        self.last_alert_at: Dict[str, float] = {}
+        self._infer_seq: Dict[str, int] = {}
+        self.observers: List[IRiskObserver] = []
+
+        self._build_detector_and_facade()
+        self.facade.subscribe(self)
+        self.snapshots = SnapshotWriter(Config.SAVE_IMG_DIR) if save_snapshots else None
+        self.clips = ClipRecorder() if record_clips else None
+        self.mediator = NotificationMediator() if notify else None
+        self.scheduler = InferenceScheduler(self._infer_frame, workers)
+
+    # Detector setup ----------------------------------------------------
+    def _build_detector_and_facade(self):
+        custom = YOLOCustomStrategy(Config.YOLO_MODEL_PATH)
+        coco = None
+        if Config.USE_COCO_MODEL:
+            try:
+                coco = YOLOCocoStrategy(Config.COCO_MODEL_PATH)
+            except Exception as e:
+                logging.error(f"No se cargó COCO: {e}")
+        fusion = FusionDetectionStrategy(custom, coco)
+        self.facade = RiskAnalysisFacade(fusion)
+        self.custom_strategy = custom
+        self.gate_strategy = None
+        if Config.CASCADE:
+            try:
+                self.gate_strategy = YOLOCocoStrategy(Config.CASCADE_GATE_MODEL_PATH)
+            except Exception as e:
+                logging.error(f"No se cargó el gate de la cascada: {e}")
+
+    def _camera_detector(self, camera_id, display):
+        """Cascada por cámara (comparte modelos, política y stats propias)."""
+        if self.gate_strategy is None:
+            return None
+        policy = CascadePolicy.for_camera(camera_id, display)
+        if not policy.enabled:
+            return None
+        return CascadeDetectionStrategy(self.gate_strategy, self.custom_strategy, policy)
+
+    # Observers -----------------------------------------------------------
+    def subscribe(self, obs: IRiskObserver):
+        self.observers.append(obs)
+
+    def on_alert(self, event: RiskEvent):
+        self.last_alert_at[event.camera_id] = time.monotonic()
+        # El frame del evento es una vista del ring: se copia una sola vez aquí
+        event.frame_bgr = event.frame_bgr.copy()
+        ring = self.frame_rings.get(event.camera_id)
+        if ring is not None:
+            ring.note_copy()
+        event.image_path = None
+        if self.snapshots is not None:
+            event.image_path = self.snapshots.submit(event.frame_bgr, event.camera_name)
+        event.clip_path = None
+        if self.clips is not None:
+            event.clip_path = self.clips.trigger(event.camera_id, event.camera_name)
+        if self.mediator is not None:
+            text = " | ".join(sorted(set(event.messages)))
+            self.mediator.notify(f"🚨 ALERTA ({event.camera_name}): {text}", frame_bgr=event.frame_bgr)
+        for obs in list(self.observers):
+            try:
+                obs.on_alert(event)
+            except Exception as e:
+                logging.error(f"[engine] observer {type(obs).__name__}: {e}")
+
+    # Ciclo de vida --------------------------------------------------------
+    def start(self) -> "MonitoringEngine":
+        if not self.running:
+            self.running = True
+            if self.snapshots is not None:
+                self.snapshots.start()
+            if self.clips is not None:
+                self.clips.start()
+            self.scheduler.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.scheduler.stop()
+        for cam in list(self.cameras.values()):
+            cam["active"] = False
+        for camera_id in list(self.cameras):
+            self.remove_source(camera_id, join_timeout=0.8)
+        if self.snapshots is not None:
+            self.snapshots.stop()
+            logging.info(f"[snapshots] {self.snapshots.stats()}")
+        if self.clips is not None:
+            self.clips.stop()
+            logging.info(f"[clips] {self.clips.stats()}")
+
+    # Fuentes ------------------------------------------------------------
+    def add_source(
+        self,
+        kind: str,
+        target,
+        camera_id: Optional[str] = None,
+        name: Optional[str] = None,
+        display_fps: float = Config.DISPLAY_FPS,
+    ) -> Optional[str]:
+        """Abre la fuente y arranca su captura; ``None`` si no se pudo abrir."""
+        adapter = VideoSourceFactory.create(kind, target)
+        if not adapter.open():
+            logging.error(f"[engine] no se pudo abrir {kind}: {target}")
+            return None
+
+        camera_id = camera_id or f"{kind}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        display = name or (os.path.basename(str(target)) if isinstance(target, str) else f"Cámara {target}")
+        fps = adapter.fps() or 25.0
+
+        self.frame_rings[camera_id] = FrameRing()
+        self.facade.set_camera_detector(camera_id, self._camera_detector(camera_id, display))
+        cam = {
+            "adapter": adapter,
+            "type": kind,
+            "source_name": display,
+            "thread": None,
+            "active": True,
+            "frame_duration": 1.0 / max(fps, 1.0),
+            "decimator": FrameDecimator(display_fps=display_fps),
+            "last_frame_at": None,
+            "started_at": time.monotonic(),
+        }
+        self.cameras[camera_id] = cam
+
+        t = threading.Thread(target=self._capture_loop, args=(camera_id,), name=f"capture-{camera_id}", daemon=True)
+        cam["thread"] = t
+        t.start()
+        self.scheduler.register(camera_id, lambda: self._latest_frame(camera_id))
+        logging.info(f"[engine] fuente agregada: {display} ({camera_id})")
+        return camera_id
+
+    def remove_source(self, camera_id: str, join_timeout: float = 1.0) -> bool:
+        cam = self.cameras.get(camera_id)
+        if cam is None:
+            return False
+        cam["active"] = False
+        self.scheduler.unregister(camera_id)
+        if cam["thread"] is not None and cam["thread"].is_alive():
+            cam["thread"].join(timeout=join_timeout)
+        cam["adapter"].release()
+        logging.info(f"[capture] {cam['source_name']}: {cam['decimator'].stats()}")
+        del self.cameras[camera_id]
+        self.facade.reset_scene(camera_id)
+        self.facade.set_camera_detector(camera_id, None)
+
+        ring = self.frame_rings.pop(camera_id, None)
+        if ring is not None:
+            logging.info(f"[frames] {cam['source_name']}: {ring.stats()}")
+            ring.clear()
+        self.latest_detections.pop(camera_id, None)
+        self._infer_seq.pop(camera_id, None)
+        self.last_alert_at.pop(camera_id, None)
+        if self.clips is not None:
+            self.clips.drop(camera_id)
+        return True
+
+    def set_display_fps(self, display_fps: float):
+        for cam in self.cameras.values():
+            cam["decimator"].set_display_fps(display_fps)
+
+    def _capture_loop(self, camera_id):
+        cam = self.cameras[camera_id]
+        adapter = cam["adapter"]
+        ring = self.frame_rings[camera_id]
+        is_video = isinstance(adapter.source, str) and not adapter.source.lower().startswith(STREAM_SCHEMES)
+        fdur = cam["frame_duration"]
+        decimator = cam["decimator"]
+        clips = self.clips
+        while self.running and cam.get("active", False) and adapter.is_opened():
+            t0 = time.perf_counter()
+            ret = adapter.grab()
+            if ret and decimator.should_decode(self.visible(camera_id)):
+                slot, buf = ring.write_slot()
+                if slot is not None:
+                    ret, frame = adapter.retrieve(buf)
+                    if ret:
+                        ring.commit(slot, frame)
+                        cam["last_frame_at"] = time.monotonic()
+                        if clips is not None:
+                            # Solo el hilo de captura escribe este slot: leerlo aquí es seguro
+                            clips.feed(camera_id, frame, cam["last_frame_at"])
+                # Sin slot libre (todos fijados por lectores) el frame se descarta
+            if not ret:
+                if is_video and cam.get("active", False):
+                    if not adapter.rewind():
+                        break
+                    continue
+                else:
+                    break
+            if is_video:
+                st = fdur - (time.perf_counter() - t0)
+                if st > 0:
+                    time.sleep(st)
+        adapter.release()
+
+    # Inferencia ---------------------------------------------------------
+    def _latest_frame(self, camera_id):
+        ring = self.frame_rings.get(camera_id)
+        if ring is None:
+            return None
+        return ring.latest(self._infer_seq.get(camera_id, 0))
+
+    def _infer_frame(self, camera_id, lease):
+        """Un frame (lease del ring) de una cámara; lo ejecuta un worker del scheduler."""
+        with lease:
+            cam = self.cameras.get(camera_id)
+            if not self.running or not cam or not cam.get("active", False):
+                return
+            self._infer_seq[camera_id] = lease.seq
+            frame_proc = self._preprocess(lease.frame)
+            detections = self.facade.detect_and_evaluate(frame_proc, camera_id, cam["source_name"])
+            self.latest_detections[camera_id] = (lease.seq, detections)
+
+    def _preprocess(self, frame):
+        """Filtros opcionales; sin ellos devuelve el mismo frame (sin copiar)."""
+        processed = frame
+        try:
+            if Config.GRAYSCALE:
+                gray = cv2.cvtColor(processed, cv2.COLOR_BGR2GRAY)
+                if Config.CLAHE:
+                    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+                    gray = clahe.apply(gray)
+                processed = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+            elif Config.CLAHE:
+                lab = cv2.cvtColor(processed, cv2.COLOR_BGR2LAB)
+                l, a, b = cv2.split(lab)
+                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+                cl = clahe.apply(l)
+                limg = cv2.merge((cl, a, b))
+                processed = cv2.cvtColor(limg, cv2.COLOR_LAB2BGR)
+        except Exception as e:
+            logging.warning(f"Preprocesado: {e}")
+        return processed
+
+    # Salud y métricas -----------------------------------------------------
+    def health(self, camera_id: str, now: Optional[float] = None) -> dict:
+        """Estado de captura: ``ok``, ``stale`` (sin frames recientes) o ``down``."""
+        cam = self.cameras[camera_id]
+        now = time.monotonic() if now is None else now
+        alive = bool(cam["thread"] is not None and cam["thread"].is_alive() and cam["adapter"].is_opened())
+        last = cam["last_frame_at"]
+        age = now - (last if last is not None else cam["started_at"])
+        status = "down" if not alive else ("stale" if age > Config.ENGINE_STALE_SEC else "ok")
+        return {
+            "status": status,
+            "alive": alive,
+            "last_frame_age_sec": round(age, 2) if last is not None else None,
+            "reconnects": getattr(cam["adapter"], "reconnects", 0),
+        }
+
+    def healthy(self) -> bool:
+        return self.running and all(self.health(cid)["status"] == "ok" for cid in list(self.cameras))
+
+    def stats(self) -> dict:
+        """Por cámara: salud, FPS/latencia de inferencia, decimación y ring."""
+        now = time.monotonic()
+        infer = self.scheduler.stats()
+        cameras = {}
+        for camera_id, cam in list(self.cameras.items()):
+            ring = self.frame_rings.get(camera_id)
+            det = self.facade.camera_detectors.get(camera_id)
+            cascade = getattr(det, "stats", None)
+            last_alert = self.last_alert_at.get(camera_id)
+            cameras[camera_id] = {
+                "name": cam["source_name"],
+                **self.health(camera_id, now),
+                "infer": infer.get(camera_id, {"fps": 0.0, "infer_ms": 0.0, "frames": 0}),
+                "capture": cam["decimator"].stats(),
+                "frames": ring.stats() if ring is not None else {},
+                "cascade_heavy_ratio": round(cascade.heavy_ratio, 3) if cascade and cascade.frames else None,
+                "last_alert_age_sec": round(now - last_alert, 1) if last_alert is not None else None,
+            }
+        return {
+            "running": self.running,
+            "workers": self.scheduler.workers,
+            "cameras": cameras,
+            "snapshots": self.snapshots.stats() if self.snapshots is not None else None,
+            "clips": self.clips.stats() if self.clips is not None else None,
+        }
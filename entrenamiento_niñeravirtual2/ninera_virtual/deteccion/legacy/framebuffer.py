@@ -0,0 +1,141 @@
+"""Ring buffer de frames preasignados por cámara.
+
+La captura decodifica directamente sobre un slot libre (``adapter.read(out)``)
+y lo publica con un número de secuencia. Los lectores (inferencia, GUI,
+diálogos) obtienen un *lease*: una vista de solo lectura que fija el slot
+mientras lo usan, así el escritor nunca lo pisa. Solo se copia donde una
+etapa realmente modifica la imagen (dibujo, alertas) y se cuenta con
+``note_copy``.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class _Slot:
+    __slots__ = ("buf", "seq", "readers")
+
+    def __init__(self):
+        self.buf: Optional[np.ndarray] = None
+        self.seq = 0
+        self.readers = 0
+
+
+class FrameLease:
+    """Vista de solo lectura de un slot; liberar con ``release()`` o ``with``."""
+
+    __slots__ = ("frame", "seq", "_ring", "_slot")
+
+    def __init__(self, ring: "FrameRing", slot: _Slot):
+        self._ring = ring
+        self._slot = slot
+        self.seq = slot.seq
+        frame = slot.buf.view()
+        frame.flags.writeable = False
+        self.frame = frame
+
+    def release(self) -> None:
+        if self._slot is not None:
+            self._ring._unpin(self._slot)
+            self._slot = None
+
+    def __enter__(self) -> "FrameLease":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class FrameRing:
+    """Ring de ``size`` slots reutilizados; crece solo si todos están fijados."""
+
+    def __init__(self, size: int = 4, max_size: int = 8):
+        self._lock = threading.Lock()
+        self._slots: List[_Slot] = [_Slot() for _ in range(max(2, size))]
+        self.max_size = max(max_size, len(self._slots))
+        self._latest: Optional[_Slot] = None
+        self._seq = 0
+        self.allocations = 0
+        self.copies = 0
+        self.dropped = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    # Escritor --------------------------------------------------------------
+    def write_slot(self) -> Tuple[Optional[_Slot], Optional[np.ndarray]]:
+        """Slot libre (ni fijado ni el último publicado) y su buffer.
+
+        El buffer es ``None`` hasta el primer frame; devuelve ``(None, None)``
+        si no hay slot libre y el ring ya llegó a ``max_size``.
+        """
+        with self._lock:
+            for slot in self._slots:
+                if slot.readers == 0 and slot is not self._latest:
+                    return slot, slot.buf
+            if len(self._slots) < self.max_size:
+                slot = _Slot()
+                self._slots.append(slot)
+                return slot, None
+        self.dropped += 1
+        return None, None
+
+    def commit(self, slot: _Slot, frame: np.ndarray) -> int:
+        """Publica ``frame`` en ``slot``; si no es el buffer del slot lo adopta."""
+        with self._lock:
+            if frame is not slot.buf:
+                slot.buf = frame
+                self.allocations += 1
+            self._seq += 1
+            slot.seq = self._seq
+            self._latest = slot
+            return self._seq
+
+    # Lectores --------------------------------------------------------------
+    def latest(self, after_seq: int = -1) -> Optional[FrameLease]:
+        """Lease del último frame si su secuencia es mayor que ``after_seq``."""
+        with self._lock:
+            slot = self._latest
+            if slot is None or slot.buf is None or slot.seq <= after_seq:
+                return None
+            slot.readers += 1
+        return FrameLease(self, slot)
+
+    def snapshot(self) -> Optional[np.ndarray]:
+        """Copia propia del último frame (para diálogos o alertas)."""
+        lease = self.latest()
+        if lease is None:
+            return None
+        with lease:
+            self.note_copy()
+            return lease.frame.copy()
+
+    def _unpin(self, slot: _Slot) -> None:
+        with self._lock:
+            slot.readers = max(0, slot.readers - 1)
+
+    def note_copy(self, n: int = 1) -> None:
+        self.copies += n
+
+    def clear(self) -> None:
+        with self._lock:
+            self._latest = None
+            for slot in self._slots:
+                if slot.readers == 0:
+                    slot.buf = None
+
+    def stats(self) -> dict:
+        frames = self._seq or 1
+        return {
+            "frames": self._seq,
+            "slots": len(self._slots),
+            "allocations": self.allocations,
+            "alloc_per_frame": round(self.allocations / frames, 3),
+            "copies_per_frame": round(self.copies / frames, 3),
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,101 @@
+"""Hash y verificación de contraseñas fuera del hilo de la petición.
+
+PBKDF2-SHA256 con cientos de miles de iteraciones ocupa decenas de ms de
+CPU por intento. En vez de correrlo en el worker que atiende la
+petición, va a un pool de procesos dedicado y acotado:
+
+- ``PASSWORD_WORKERS`` procesos (0 = en línea, p. ej. la GUI de escritorio).
+- Como mucho ``PASSWORD_MAX_PENDING`` cálculos admitidos a la vez; quien
+  no consigue turno en ``PASSWORD_WAIT_SEC`` recibe ``HasherBusy`` (el
+  login responde 429) en lugar de encolarse sin límite.
+- La comparación es en tiempo constante (``hmac.compare_digest``).
+
+El pool usa ``spawn``: ``fork`` desde un servidor con hilos puede heredar
+locks tomados. Este módulo solo importa la biblioteca estándar para que
+los procesos hijos arranquen rápido.
+"""
+
+from __future__ import annotations
+
+import binascii
+import hashlib
+import hmac
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+
+class HasherBusy(Exception):
+    """No hubo turno para calcular el hash dentro del tiempo de espera."""
+
+
+def pbkdf2_hex(password: str, salt_hex: str, iterations: int) -> str:
+    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), binascii.unhexlify(salt_hex), iterations)
+    return binascii.hexlify(dk).decode("utf-8")
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = 2, max_pending: int = 16, wait_sec: float = 2.0):
+        self.workers = max(0, workers)
+        self.wait_sec = wait_sec
+        self.max_pending = max(1, max_pending)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pending_lock = threading.Lock()
+        self.pending = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self.rejected = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def hash(self, password: str, salt_hex: str, iterations: int) -> str:
+        if not self._slots.acquire(timeout=self.wait_sec):
+            self.rejected += 1
+            raise HasherBusy("Demasiados cálculos de contraseña en curso.")
+        with self._pending_lock:
+            self.pending += 1
+        try:
+            if self.workers == 0:
+                return pbkdf2_hex(password, salt_hex, iterations)
+            return self._executor().submit(pbkdf2_hex, password, salt_hex, iterations).result()
+        finally:
+            with self._pending_lock:
+                self.pending -= 1
+            self._slots.release()
+
+    def verify(self, password: str, salt_hex: str, iterations: int, expected_hex: str) -> bool:
+        return hmac.compare_digest(self.hash(password, salt_hex, iterations), expected_hex)
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_hasher() -> PasswordHasher:
+    """Hasher compartido del proceso, configurado desde ``Config``."""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                from .config import Config
+
+                _hasher = PasswordHasher(Config.PASSWORD_WORKERS, Config.PASSWORD_MAX_PENDING, Config.PASSWORD_WAIT_SEC)
+                logging.info(
+                    "[passwords] pool de %d procesos, %d pendientes como máximo",
+                    Config.PASSWORD_WORKERS,
+                    Config.PASSWORD_MAX_PENDING,
+                )
+    return _hasher
@@ -0,0 +1,97 @@
+"""Render de frames en widgets Tk sin trabajo de más.
+
+El frame se reduce primero al tamaño real del widget (sobre un buffer
+preasignado), se dibuja encima en esa resolución, se convierte a RGB en
+otro buffer propio y se vuelca con ``PhotoImage.paste`` sobre la misma
+imagen Tk mientras el tamaño no cambie.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+
+def fit_size(src_w: int, src_h: int, max_w: int, max_h: int) -> Tuple[int, int]:
+    """Tamaño que cabe en ``max_w x max_h`` manteniendo el aspecto."""
+    if src_w <= 0 or src_h <= 0 or max_w <= 1 or max_h <= 1:
+        return src_w, src_h
+    scale = min(max_w / src_w, max_h / src_h)
+    return max(1, int(src_w * scale)), max(1, int(src_h * scale))
+
+
+def resize_into(src: np.ndarray, dst: np.ndarray, interpolation: Optional[int] = None) -> np.ndarray:
+    """``cv2.resize`` escribiendo sobre ``dst`` (INTER_AREA al reducir)."""
+    h, w = dst.shape[:2]
+    if interpolation is None:
+        interpolation = cv2.INTER_AREA if w < src.shape[1] else cv2.INTER_LINEAR
+    return cv2.resize(src, (w, h), dst=dst, interpolation=interpolation)
+
+
+class EmaTimer:
+    """Media exponencial de milisegundos."""
+
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self.ms = 0.0
+        self.count = 0
+
+    def add(self, ms: float) -> None:
+        self.ms = ms if not self.count else self.ms + self.alpha * (ms - self.ms)
+        self.count += 1
+
+
+class TkFrameView:
+    """Vista de un ``ttk.Label`` que reutiliza buffers y ``PhotoImage``."""
+
+    def __init__(self, label):
+        self.label = label
+        self._bgr: Optional[np.ndarray] = None
+        self._rgb: Optional[np.ndarray] = None
+        self._photo: Optional[ImageTk.PhotoImage] = None
+
+    def _buffers(self, w: int, h: int):
+        if self._bgr is None or self._bgr.shape[:2] != (h, w):
+            self._bgr = np.empty((h, w, 3), dtype=np.uint8)
+            self._rgb = np.empty((h, w, 3), dtype=np.uint8)
+            self._photo = None
+        return self._bgr, self._rgb
+
+    def render(
+        self,
+        frame_bgr: np.ndarray,
+        size: Tuple[int, int],
+        draw: Optional[Callable[[np.ndarray, float, float], None]] = None,
+    ) -> None:
+        """Muestra ``frame_bgr`` a ``size``; ``draw(img, sx, sy)`` dibuja encima."""
+        w, h = size
+        bgr, rgb = self._buffers(w, h)
+        resize_into(frame_bgr, bgr)
+        if draw is not None:
+            src_h, src_w = frame_bgr.shape[:2]
+            draw(bgr, w / src_w, h / src_h)
+        self.show_bgr(bgr, rgb)
+
+    def show_bgr(self, bgr: np.ndarray, rgb: Optional[np.ndarray] = None) -> None:
+        """Vuelca un BGR ya del tamaño final (p. ej. el canvas del mosaico)."""
+        h, w = bgr.shape[:2]
+        if rgb is None or rgb.shape != bgr.shape:
+            if self._rgb is None or self._rgb.shape != bgr.shape:
+                self._rgb = np.empty_like(bgr)
+                self._photo = None
+            rgb = self._rgb
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=rgb)
+        img = Image.frombuffer("RGB", (w, h), rgb, "raw", "RGB", 0, 1)
+        if self._photo is None or (self._photo.width(), self._photo.height()) != (w, h):
+            self._photo = ImageTk.PhotoImage(image=img)
+            self.label.configure(image=self._photo)
+            self.label.imgtk = self._photo
+        else:
+            self._photo.paste(img)
+
+    def clear(self) -> None:
+        self._photo = None
+        self.label.imgtk = None
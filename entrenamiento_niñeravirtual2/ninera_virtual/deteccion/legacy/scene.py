@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import time
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from .batch import DetectionBatch
+from .config import Config
+
+STATIC_LABELS = frozenset(Config.STATIC_SCENE_LABELS)
+
+
+def is_static_label(label: str) -> bool:
+    """``True`` si la etiqueta (cruda o mapeada desde COCO) es estática."""
+    label = (label or "").lower()
+    return label in STATIC_LABELS or Config.COCO_CLASS_MAP.get(label) in STATIC_LABELS
+
+
+class StaticSceneMap:
+    """Detecciones cacheadas de objetos estáticos de una cámara.
+
+    Se refrescan con una detección completa cada ``refresh_sec`` o cuando
+    la miniatura del frame cambia más de ``change_thr`` (0-255) respecto a
+    la del último refresco. Entre refrescos solo hace falta buscar niños y
+    objetos pequeños móviles.
+    """
+
+    THUMB_SIZE = (32, 18)
+
+    def __init__(self, refresh_sec: float = Config.SCENE_REFRESH_SEC, change_thr: float = Config.SCENE_CHANGE_THR):
+        self.refresh_sec = refresh_sec
+        self.change_thr = change_thr
+        self.detections = DetectionBatch.empty()
+        self.refreshes = 0
+        self._thumb: Optional[np.ndarray] = None
+        self._last_refresh = 0.0
+
+    def _thumbnail(self, frame_bgr) -> np.ndarray:
+        small = cv2.resize(frame_bgr, self.THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def needs_refresh(self, frame_bgr, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if self._thumb is None or now - self._last_refresh >= self.refresh_sec:
+            return True
+        diff = np.abs(self._thumbnail(frame_bgr) - self._thumb)
+        return float(diff.mean()) >= self.change_thr
+
+    def update(self, frame_bgr, detections: DetectionBatch, now: Optional[float] = None) -> None:
+        self.detections = detections
+        self._thumb = self._thumbnail(frame_bgr)
+        self._last_refresh = time.monotonic() if now is None else now
+        self.refreshes += 1
+
+
+class SceneMapRegistry:
+    """Un ``StaticSceneMap`` por cámara, creado bajo demanda."""
+
+    def __init__(self):
+        self._maps: Dict[str, StaticSceneMap] = {}
+
+    def get(self, camera_id) -> StaticSceneMap:
+        scene = self._maps.get(camera_id)
+        if scene is None:
+            scene = self._maps[camera_id] = StaticSceneMap()
+        return scene
+
+    def reset(self, camera_id) -> None:
+        self._maps.pop(camera_id, None)
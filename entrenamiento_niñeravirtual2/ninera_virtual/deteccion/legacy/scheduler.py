@@ -0,0 +1,198 @@
+"""Scheduler de inferencia compartido entre cámaras.
+
+En vez de un hilo de inferencia por cámara (todos peleando por el pool
+intra-op de torch), un único despachador toma el frame más reciente de
+cada cámara en round-robin y lo envía a un pool fijo de workers. Cada
+cámara tiene como mucho un frame en vuelo, así que una cámara lenta no
+acapara el pool y los frames viejos se descartan en origen.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .config import Config
+
+try:
+    import torch
+except Exception:  # pragma: no cover - dependencia pesada
+    torch = None  # type: ignore
+
+
+def default_workers() -> int:
+    if Config.INFER_WORKERS > 0:
+        return Config.INFER_WORKERS
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+class RateMeter:
+    """FPS efectivo con media exponencial."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.fps = 0.0
+        self.count = 0
+        self.busy_ms = 0.0
+        self._last: Optional[float] = None
+
+    def tick(self, now: float, busy_ms: float) -> None:
+        if self._last is not None:
+            dt = now - self._last
+            if dt > 0:
+                inst = 1.0 / dt
+                self.fps = inst if self.count <= 1 else self.fps + self.alpha * (inst - self.fps)
+        self.busy_ms = busy_ms if not self.count else self.busy_ms + self.alpha * (busy_ms - self.busy_ms)
+        self._last = now
+        self.count += 1
+
+
+class InferenceScheduler:
+    """Reparte frames de varias cámaras sobre un pool fijo de workers.
+
+    ``register(camera_id, source)`` recibe una función que devuelve el
+    frame más reciente de la cámara (o ``None``) sin bloquear;
+    ``process(camera_id, frame)`` hace la inferencia y se ejecuta en el pool.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[str, object], None],
+        workers: Optional[int] = None,
+        idle_sleep: float = 0.005,
+    ):
+        self.process = process
+        self.workers = workers or default_workers()
+        self.idle_sleep = idle_sleep
+        self._sources: Dict[str, Callable[[], object]] = {}
+        self._order: List[str] = []
+        self._next = 0
+        self._inflight: set = set()
+        self._rates: Dict[str, RateMeter] = {}
+        self._slots = threading.Semaphore(self.workers)
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._last_report = time.monotonic()
+
+    # Cámaras --------------------------------------------------------------
+    def register(self, camera_id: str, source: Callable[[], object]) -> None:
+        with self._lock:
+            self._sources[camera_id] = source
+            self._rates[camera_id] = RateMeter()
+            if camera_id not in self._order:
+                self._order.append(camera_id)
+
+    def unregister(self, camera_id: str) -> None:
+        with self._lock:
+            self._sources.pop(camera_id, None)
+            self._rates.pop(camera_id, None)
+            if camera_id in self._order:
+                self._order.remove(camera_id)
+
+    # Ciclo de vida --------------------------------------------------------
+    def start(self) -> None:
+        if self._running:
+            return
+        if torch is not None:
+            try:
+                torch.set_num_threads(max(1, (os.cpu_count() or 1) // self.workers))
+            except Exception:
+                logging.warning("[scheduler] no se pudo ajustar torch.set_num_threads")
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="infer")
+        self._running = True
+        self._thread = threading.Thread(target=self._dispatch_loop, name="infer-dispatch", daemon=True)
+        self._thread.start()
+        logging.info("[scheduler] %d workers de inferencia", self.workers)
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # Métricas -------------------------------------------------------------
+    def fps(self, camera_id: str) -> float:
+        rate = self._rates.get(camera_id)
+        return rate.fps if rate else 0.0
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            rates = dict(self._rates)
+        return {
+            cam: {"fps": round(r.fps, 2), "infer_ms": round(r.busy_ms, 1), "frames": r.count}
+            for cam, r in rates.items()
+        }
+
+    # Despacho -------------------------------------------------------------
+    def _pick(self):
+        """Siguiente cámara (round-robin) con frame nuevo y sin frame en vuelo."""
+        with self._lock:
+            n = len(self._order)
+            for k in range(n):
+                idx = (self._next + k) % n
+                cam = self._order[idx]
+                if cam in self._inflight:
+                    continue
+                frame = self._sources[cam]()
+                if frame is None:
+                    continue
+                self._next = (idx + 1) % n
+                self._inflight.add(cam)
+                return cam, frame
+        return None
+
+    def _dispatch_loop(self) -> None:
+        # Referencia propia: stop() puede soltar self._pool si el join vence
+        # con este hilo aún vivo; el pool cerrado lanza RuntimeError al enviar
+        pool = self._pool
+        while self._running and pool is not None:
+            if not self._slots.acquire(timeout=0.2):
+                continue
+            picked = self._pick() if self._running else None
+            if picked is None:
+                self._slots.release()
+                time.sleep(self.idle_sleep)
+                self._maybe_report()
+                continue
+            cam, frame = picked
+            try:
+                pool.submit(self._run, cam, frame)
+            except RuntimeError:
+                self._done(cam, None)
+                break
+            self._maybe_report()
+
+    def _run(self, camera_id: str, frame) -> None:
+        t0 = time.perf_counter()
+        try:
+            self.process(camera_id, frame)
+        except Exception as e:
+            logging.error(f"Inferencia {camera_id}: {e}")
+        finally:
+            self._done(camera_id, (time.perf_counter() - t0) * 1000.0)
+
+    def _done(self, camera_id: str, busy_ms: Optional[float]) -> None:
+        with self._lock:
+            self._inflight.discard(camera_id)
+            rate = self._rates.get(camera_id)
+        if rate is not None and busy_ms is not None:
+            rate.tick(time.monotonic(), busy_ms)
+        self._slots.release()
+
+    def _maybe_report(self) -> None:
+        now = time.monotonic()
+        if Config.INFER_STATS_SEC <= 0 or now - self._last_report < Config.INFER_STATS_SEC:
+            return
+        self._last_report = now
+        stats = self.stats()
+        if stats:
+            logging.info("[scheduler] %s", stats)
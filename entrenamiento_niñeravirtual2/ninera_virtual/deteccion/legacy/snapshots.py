@@ -0,0 +1,210 @@
+"""Escritura asíncrona de capturas de alerta con retención indexada.
+
+Las alertas solo encolan el frame; un hilo aparte codifica el JPEG, lo
+escribe y aplica la retención. El directorio se escanea una sola vez al
+arrancar para armar un índice ordenado por antigüedad; desde ahí cada
+escritura añade al final y la retención solo mira el más antiguo, sin
+``listdir``/``stat``/``sort`` por alerta.
+
+Mientras el escritor corre, el directorio lleva una marca (``.writer``)
+que se refresca desde su hilo; la retención del servidor no borra en
+directorios marcados para no desincronizar el índice en memoria. Por eso
+la antigüedad máxima (``ALERT_IMG_MAX_AGE_DAYS``, por defecto
+``RETENTION_SNAPSHOT_DAYS``) se aplica también cuando no llegan alertas.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from queue import Empty, Full, Queue
+from typing import Deque, Optional, Tuple
+
+import cv2
+
+from .config import Config
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+OWNER_FILE = ".writer"
+OWNER_TTL_SEC = 120.0
+
+
+def _safe_name(text: str) -> str:
+    return "".join(ch if ch.isalnum() else "_" for ch in text)
+
+
+class DirectoryClaim:
+    """Marca de "directorio indexado por un escritor vivo".
+
+    Caduca sola (``OWNER_TTL_SEC``) si el proceso muere sin liberarla.
+    """
+
+    def __init__(self, directory: str, interval: float = OWNER_TTL_SEC / 4):
+        self.path = os.path.join(directory, OWNER_FILE)
+        self.interval = interval
+        self._at: Optional[float] = None
+
+    def touch(self) -> None:
+        now = time.monotonic()
+        if self._at is not None and now - self._at < self.interval:
+            return
+        self._at = now
+        try:
+            with open(self.path, "w") as fh:
+                fh.write(str(os.getpid()))
+        except OSError as e:
+            logging.warning(f"[snapshots] no se pudo marcar {self.path}: {e}")
+
+    def release(self) -> None:
+        self._at = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def is_claimed(directory: str, ttl: float = OWNER_TTL_SEC) -> bool:
+    """``True`` si un escritor refrescó la marca de ``directory`` hace menos de ``ttl``."""
+    try:
+        mtime = os.stat(os.path.join(directory, OWNER_FILE)).st_mtime
+    except OSError:
+        return False
+    return time.time() - mtime < ttl
+
+
+class SnapshotWriter:
+    """Cola + hilo escritor; retención por cantidad, tamaño total y edad."""
+
+    def __init__(
+        self,
+        directory: str = Config.SAVE_IMG_DIR,
+        max_files: int = Config.MAX_ALERT_IMGS,
+        max_bytes: int = Config.MAX_ALERT_IMG_MB * 1024 * 1024,
+        max_age_sec: float = Config.ALERT_IMG_MAX_AGE_DAYS * 86400,
+        quality: int = Config.TELEGRAM_JPEG_QLTY,
+        queue_size: int = 32,
+    ):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_age_sec = max_age_sec
+        self.quality = quality
+        self._queue: Queue = Queue(maxsize=queue_size)
+        self._index: Deque[Tuple[float, str, int]] = deque()
+        self._bytes = 0
+        self._thread: Optional[threading.Thread] = None
+        self._claim = DirectoryClaim(directory)
+        self.written = 0
+        self.dropped = 0
+        self.evicted = 0
+
+    # Índice ---------------------------------------------------------------
+    def _build_index(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTS):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, entry.path, st.st_size))
+        entries.sort()
+        self._index = deque(entries)
+        self._bytes = sum(e[2] for e in entries)
+
+    def _over_limit(self, now: float) -> bool:
+        if not self._index:
+            return False
+        if self.max_files > 0 and len(self._index) > self.max_files:
+            return True
+        if self.max_bytes > 0 and self._bytes > self.max_bytes:
+            return True
+        return self.max_age_sec > 0 and now - self._index[0][0] > self.max_age_sec
+
+    def _enforce(self) -> None:
+        now = time.time()
+        while self._over_limit(now):
+            _, path, size = self._index.popleft()
+            self._bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"[snapshots] no se pudo borrar {path}: {e}")
+            self.evicted += 1
+
+    # Ciclo de vida --------------------------------------------------------
+    def start(self) -> "SnapshotWriter":
+        if self._thread is None:
+            self._build_index()
+            self._claim.touch()
+            self._enforce()
+            self._thread = threading.Thread(target=self._loop, name="snapshots", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except Full:
+            pass
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        self._claim.release()
+
+    # Escritura ------------------------------------------------------------
+    def submit(self, frame_bgr, camera_name: str) -> Optional[str]:
+        """Encola la captura (el frame debe ser propio); ``None`` si se descartó."""
+        tsf = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(self.directory, f"alerta_{_safe_name(camera_name)}_{tsf}.jpg")
+        try:
+            self._queue.put_nowait((path, frame_bgr))
+        except Full:
+            self.dropped += 1
+            logging.warning("[snapshots] cola llena, captura descartada")
+            return None
+        return path
+
+    def _write(self, path: str, frame_bgr) -> None:
+        ok, buf = cv2.imencode(".jpg", frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("cv2.imencode falló")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(buf.tobytes())
+        os.replace(tmp, path)
+        self._index.append((time.time(), path, len(buf)))
+        self._bytes += len(buf)
+        self.written += 1
+        self._enforce()
+
+    def _loop(self) -> None:
+        while True:
+            self._claim.touch()
+            try:
+                item = self._queue.get(timeout=1.0)
+            except Empty:
+                # Sin alertas las capturas también envejecen; solo mira la más antigua
+                self._enforce()
+                continue
+            if item is None:
+                break
+            try:
+                self._write(*item)
+            except Exception as e:
+                logging.error(f"Guardar IMG: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._index),
+            "bytes": self._bytes,
+            "written": self.written,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,147 @@
+"""Ajustes de SQLite para producción y conexiones por hilo.
+
+Tanto la base de Django como la legacy de usuarios son SQLite por
+defecto. Con el journal clásico cada escritura bloquea a los lectores y,
+con varias peticiones a la vez, aparece "database is locked". Aquí se
+aplican los mismos PRAGMAs a ambas:
+
+- ``journal_mode=WAL``: lectores y un escritor concurrentes.
+- ``synchronous=NORMAL``: en WAL no corrompe; solo puede perder la última
+  transacción ante un corte de luz, a cambio de un fsync menos por commit.
+- ``busy_timeout``: espera al escritor en curso en vez de fallar.
+- ``mmap_size`` y ``cache_size``: lecturas desde memoria mapeada.
+
+Todo se configura con ``SQLITE_*`` en settings (0 desactiva cada ajuste).
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import sqlite3
+import threading
+import weakref
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+
+
+def pragmas() -> List[str]:
+    out = []
+    if getattr(settings, "SQLITE_WAL", True):
+        out.append("PRAGMA journal_mode=WAL")
+        out.append("PRAGMA synchronous=NORMAL")
+    busy = getattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 5000)
+    if busy:
+        out.append(f"PRAGMA busy_timeout={int(busy)}")
+    mmap_mb = getattr(settings, "SQLITE_MMAP_MB", 64)
+    if mmap_mb:
+        out.append(f"PRAGMA mmap_size={int(mmap_mb) * 1024 * 1024}")
+    cache_kb = getattr(settings, "SQLITE_CACHE_KB", 8192)
+    if cache_kb:
+        # Negativo = tamaño en KiB en vez de páginas
+        out.append(f"PRAGMA cache_size=-{int(cache_kb)}")
+    out.append("PRAGMA temp_store=MEMORY")
+    return out
+
+
+def tune(conn) -> None:
+    """Aplica los PRAGMAs a una conexión (``sqlite3`` o cursor DB-API de Django)."""
+    cur = conn.cursor()
+    try:
+        for stmt in pragmas():
+            try:
+                cur.execute(stmt)
+            except sqlite3.OperationalError as e:
+                # p. ej. WAL en sistemas de archivos de red o bases en memoria
+                logging.warning("[sqlite] %s falló: %s", stmt, e)
+    finally:
+        cur.close()
+
+
+def connect(path: str, tuned: bool = True) -> sqlite3.Connection:
+    busy = getattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 5000) or 5000
+    conn = sqlite3.connect(path, timeout=busy / 1000.0)
+    conn.execute("PRAGMA foreign_keys = ON")
+    if tuned:
+        tune(conn)
+    return conn
+
+
+class _Anchor:
+    """Ancla de la conexión en el ``threading.local`` de su hilo.
+
+    Cuando el hilo termina, el ``local`` suelta el ancla y su finalizador
+    cierra la conexión y la quita del registro del pool.
+    """
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+class ThreadLocalConnections:
+    """Una conexión por hilo sobre el mismo archivo (nada de compartir cursores).
+
+    Las conexiones de hilos que ya terminaron se cierran solas; el registro
+    solo guarda las de hilos vivos.
+    """
+
+    def __init__(self, path: str, on_connect: Optional[Callable[[sqlite3.Connection], None]] = None):
+        self.path = path
+        self.on_connect = on_connect
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: Dict[int, sqlite3.Connection] = {}
+        self._keys = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def get(self) -> sqlite3.Connection:
+        anchor = getattr(self._local, "anchor", None)
+        if anchor is None:
+            conn = connect(self.path)
+            if self.on_connect is not None:
+                self.on_connect(conn)
+            anchor = _Anchor(conn)
+            key = next(self._keys)
+            with self._lock:
+                self._all[key] = conn
+            weakref.finalize(anchor, self._release, key)
+            self._local.anchor = anchor
+        return anchor.conn
+
+    def _release(self, key: int) -> None:
+        with self._lock:
+            conn = self._all.pop(key, None)
+        if conn is None:
+            return
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            # Cerrada desde otro hilo: se libera igual al recolectarse
+            pass
+
+    def close_all(self) -> None:
+        """Cierra todas las conexiones (solo al apagar: otros hilos pueden estar usándolas)."""
+        with self._lock:
+            conns, self._all = list(self._all.values()), {}
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._local = threading.local()
+
+
+def tune_django_connection(sender, connection, **kwargs) -> None:
+    """Receptor de ``connection_created`` para el backend SQLite de Django."""
+    if connection.vendor != "sqlite":
+        return
+    if connection.settings_dict.get("NAME") in ("", ":memory:") or "mode=memory" in str(
+        connection.settings_dict.get("NAME")
+    ):
+        return
+    tune(connection.connection)
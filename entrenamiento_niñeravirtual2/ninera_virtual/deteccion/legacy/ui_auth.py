@@ -5,7 +5,8 @@ import sys
 import tkinter as tk
 from tkinter import messagebox, ttk
 
-from .config import DatabaseConnection, UserRepository
+from .config import Config, DatabaseConnection, UserRepository
+from .passwords import HasherBusy, PasswordHasher
 from .ui_main import CCTVMonitoringSystem
 
 
@@ -34,7 +35,10 @@ class AuthWindow:
     def __init__(self, root):
         self.root = root
         self.db = DatabaseConnection.get_instance()
-        self.users = UserRepository(self.db)
+        # Un solo usuario en la GUI: el hash va en línea, sin pool de procesos
+        self.users = UserRepository(
+            self.db, hasher=PasswordHasher(0, Config.PASSWORD_MAX_PENDING, Config.PASSWORD_WAIT_SEC)
+        )
 
         self.status_var = tk.StringVar(value="")
         self.mode = tk.StringVar(value="login")
@@ -570,7 +574,11 @@ class AuthWindow:
             self._set_status("Completa email y contrasena para ingresar.", "info")
             return
 
-        user = self.users.verify_credentials(email, password)
+        try:
+            user = self.users.verify_credentials(email, password)
+        except HasherBusy:
+            self._set_status("Hay un inicio de sesion en curso. Intenta de nuevo en unos segundos.", "info")
+            return
         if not user:
             self._set_status("Credenciales invalidas. Revisa los datos e intenta de nuevo.", "error")
             messagebox.showerror("Login", "Credenciales invalidas.")
@@ -613,6 +621,12 @@ class AuthWindow:
             self._pending_registration = None
             self._validate_register_fields()
             return
+        except HasherBusy:
+            # Los datos siguen verificados: basta con volver a confirmar
+            msg = "Hay otra operacion en curso. Presiona Confirmar registro de nuevo en unos segundos."
+            self._set_register_feedback(msg, "info")
+            self._set_status(msg, "info")
+            return
         except Exception as exc:
             msg = f"Error creando la cuenta: {exc}"
             self._set_register_feedback(msg, "error")
@@ -8,7 +8,6 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from queue import Empty, Full, Queue
 from threading import Thread
 from typing import Dict, Optional
 
@@ -18,20 +17,17 @@ import tkinter as tk
 from PIL import Image, ImageTk
 from tkinter import filedialog, messagebox, simpledialog, ttk
 
-from .adapters import VideoSourceFactory
+from .batch import SOURCES, DetectionBatch
 from .config import Config
-from .detection import (
-    FusionDetectionStrategy,
-    RiskAnalysisFacade,
-    RiskEvent,
-    YOLOCustomStrategy,
-    YOLOCocoStrategy,
-)
-from .notifications import NotificationMediator
+from .detection import RiskEvent
+from .engine import MonitoringEngine
+from .framebuffer import FrameRing
+from .mosaic import MosaicCanvas
+from .render import EmaTimer, TkFrameView, fit_size
 
 
 class CCTVMonitoringSystem:
-    """Ventana principal (Observer de RiskAnalysisFacade)."""
+    """Ventana principal (Observer de MonitoringEngine)."""
 
     DARK = {
         "bg": "#0f172a",
@@ -86,17 +82,30 @@ class CCTVMonitoringSystem:
 
         self.running = True
         self.current_camera_id: Optional[str] = None
-        self.cameras: Dict[str, dict] = {}
-        self.frame_queues: Dict[str, Queue] = {}
-        self.infer_queues: Dict[str, Queue] = {}
-        self.display_queues: Dict[str, Queue] = {}
-        self.infer_threads: Dict[str, Thread] = {}
+        self._shown_key = None
+        self.mosaic_var = tk.BooleanVar(value=False)
+        # Copia del estado del mosaico para los hilos de captura (las
+        # variables Tk solo se leen desde el hilo de la GUI)
+        self.mosaic_on = False
+        self.mosaic: Optional[MosaicCanvas] = None
+        self._mosaic_at = 0.0
         self.alert_history = []
         self.per_camera_polygons: Dict[str, dict] = {}
 
-        self._build_detector_and_facade()
-        self.mediator = NotificationMediator()
-        self.facade.subscribe(self)
+        try:
+            self.engine = MonitoringEngine(visible=self._is_visible)
+        except Exception as e:
+            messagebox.showerror("Modelo", f"No pudo cargarse el modelo custom: {e}")
+            raise
+        self.engine.subscribe(self)
+        self.engine.start()
+        # Vistas del motor: la GUI dibuja las últimas detecciones sobre el
+        # último frame crudo de cada ring.
+        self.facade = self.engine.facade
+        self.scheduler = self.engine.scheduler
+        self.cameras: Dict[str, dict] = self.engine.cameras
+        self.frame_rings: Dict[str, FrameRing] = self.engine.frame_rings
+        self.latest_detections: Dict[str, tuple] = self.engine.latest_detections
 
         self.object_colors = {
             "nino": (72, 187, 120),
@@ -135,38 +144,45 @@ class CCTVMonitoringSystem:
         self._configure_style()
         self._build_menu()
         self._build_layout()
+        self.live_view = TkFrameView(self.video_label)
+        self.video_label.bind("<Double-Button-1>", self._on_view_double_click)
+        self._gui_timer = EmaTimer()
+        self._gui_report_at = 0.0
 
         self.root.after(Config.UPDATE_MS, self._update_gui_frame)
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     # Observer interface -------------------------------------------------
     def on_alert(self, event: RiskEvent):
+        # Captura en disco y Telegram los hace el motor
         text = " | ".join(sorted(set(event.messages)))
         self._append_feed(f"[{event.camera_name}] {text}")
         self._update_banner(text, danger=True)
-        self._save_alert_image(event.frame_bgr, event.camera_name)
         self._bump_metrics(text)
         self._beep()
-        if Config.SEND_TELEGRAM:
-            self.mediator.notify(
-                f"🚨 ALERTA ({event.camera_name}): {text}", frame_bgr=event.frame_bgr
-            )
 
-    # Detector setup ----------------------------------------------------
-    def _build_detector_and_facade(self):
-        try:
-            custom = YOLOCustomStrategy(Config.YOLO_MODEL_PATH)
-        except Exception as e:
-            messagebox.showerror("Modelo", f"No pudo cargarse el modelo custom: {e}")
-            raise
-        coco = None
-        if Config.USE_COCO_MODEL:
-            try:
-                coco = YOLOCocoStrategy(Config.COCO_MODEL_PATH)
-            except Exception as e:
-                logging.error(f"No se cargó COCO: {e}")
-        fusion = FusionDetectionStrategy(custom, coco)
-        self.facade = RiskAnalysisFacade(fusion)
+    # Estado -------------------------------------------------------------
+    def _is_visible(self, camera_id):
+        return self.mosaic_on or camera_id == self.current_camera_id
+
+    def _infer_status(self, camera_id):
+        fps = self.scheduler.fps(camera_id)
+        text = f" · inferencia {fps:.1f} FPS" if fps > 0 else ""
+        ring = self.frame_rings.get(camera_id)
+        if ring is not None and ring.seq:
+            st = ring.stats()
+            text += f" · {st['copies_per_frame']} copias/frame, {st['alloc_per_frame']} asign./frame"
+        cam = self.cameras.get(camera_id)
+        if cam is not None and cam["decimator"].grabbed:
+            text += f" · {cam['decimator'].skip_ratio:.0%} frames sin decodificar"
+        return text
+
+    def _cascade_status(self, camera_id):
+        det = self.facade.camera_detectors.get(camera_id)
+        stats = getattr(det, "stats", None)
+        if stats is None or not stats.frames:
+            return ""
+        return f" · modelo pesado en {stats.heavy_ratio:.0%} de {stats.frames} frames"
 
     # UI setup -----------------------------------------------------------
     def _configure_style(self):
@@ -233,6 +249,9 @@ class CCTVMonitoringSystem:
         m.add_cascade(label="Zonas", menu=zm)
 
         settings = tk.Menu(m, tearoff=0)
+        settings.add_checkbutton(
+            label="Vista mosaico (todas las cámaras)", variable=self.mosaic_var, command=self.toggle_mosaic
+        )
         settings.add_command(label="Tema: Oscuro/Claro", command=self.toggle_theme)
         m.add_cascade(label="Ajustes", menu=settings)
 
@@ -283,6 +302,8 @@ class CCTVMonitoringSystem:
         status.pack(side=tk.BOTTOM, fill=tk.X)
         self.status_label = ttk.Label(status, text="Listo.", style="Muted.TLabel")
         self.status_label.pack(side=tk.LEFT, padx=10, pady=6)
+        self.render_label = ttk.Label(status, text="", style="Muted.TLabel")
+        self.render_label.pack(side=tk.RIGHT, padx=10, pady=6)
 
     def _build_left_panel(self, parent):
         c = self.colors
@@ -405,46 +426,12 @@ class CCTVMonitoringSystem:
 
     # Fuentes ------------------------------------------------------------
     def _add_source(self, target, kind):
-        adapter = VideoSourceFactory.create(kind, target)
-        if not adapter.open():
+        display = os.path.basename(str(target)) if isinstance(target, str) else f"Cámara {target}"
+        camera_id = self.engine.add_source(kind, target, name=display, display_fps=self._display_fps())
+        if camera_id is None:
             messagebox.showerror("Fuente", f"No se pudo abrir {kind}: {target}")
             return
 
-        camera_id = f"{kind}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
-        self.frame_queues[camera_id] = Queue(maxsize=2)
-        self.infer_queues[camera_id] = Queue(maxsize=2)
-        self.display_queues[camera_id] = Queue(maxsize=2)
-
-        display = os.path.basename(str(target)) if isinstance(target, str) else f"Cámara {target}"
-
-        fps = 25.0
-        try:
-            if hasattr(adapter, "cap"):
-                val = adapter.cap.get(
-                    cv2.CV_CAP_PROP_FPS if hasattr(cv2, "CV_CAP_PROP_FPS") else cv2.CAP_PROP_FPS
-                )
-                if val and val > 0:
-                    fps = float(val)
-        except Exception:
-            pass
-        frame_duration = 1.0 / max(fps, 1.0)
-
-        self.cameras[camera_id] = {
-            "adapter": adapter,
-            "type": kind,
-            "source_name": display,
-            "thread": None,
-            "active": True,
-            "frame_duration": frame_duration,
-        }
-
-        t = Thread(target=self._capture_loop, args=(camera_id,), daemon=True)
-        t.start()
-        self.cameras[camera_id]["thread"] = t
-        it = Thread(target=self._inference_loop, args=(camera_id,), daemon=True)
-        it.start()
-        self.infer_threads[camera_id] = it
-
         self.camera_list_box.insert(tk.END, display)
         if self.current_camera_id is None:
             self.camera_list_box.selection_set(0)
@@ -476,75 +463,16 @@ class CCTVMonitoringSystem:
         if not cam_id:
             return
 
-        self.cameras[cam_id]["active"] = False
-        if self.cameras[cam_id]["thread"].is_alive():
-            self.cameras[cam_id]["thread"].join(timeout=1.0)
-        self.cameras[cam_id]["adapter"].release()
-        del self.cameras[cam_id]
-
-        for m in (self.frame_queues, self.infer_queues, self.display_queues):
-            q = m.pop(cam_id, None)
-            if q:
-                while not q.empty():
-                    try:
-                        q.get_nowait()
-                    except Empty:
-                        break
+        self.engine.remove_source(cam_id)
 
         self.camera_list_box.delete(sel[0])
         if self.current_camera_id == cam_id:
             self.current_camera_id = None
             self.video_label.config(image="", text="Niñera Virtual\n\nSelecciona o agrega una fuente.")
-            if hasattr(self.video_label, "imgtk"):
-                self.video_label.imgtk = None
+            self.live_view.clear()
 
         self._set_status(f"Fuente eliminada: {name}")
 
-    def _capture_loop(self, camera_id):
-        cam = self.cameras[camera_id]
-        adapter = cam["adapter"]
-        is_video = isinstance(adapter.source, str)
-        fdur = cam["frame_duration"]
-        while self.running and cam.get("active", False) and adapter.is_opened():
-            t0 = time.perf_counter()
-            ret, frame = adapter.read()
-            if not ret:
-                if is_video and cam.get("active", False):
-                    try:
-                        adapter.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    except Exception:
-                        break
-                    continue
-                else:
-                    break
-            rq = self.frame_queues.get(camera_id)
-            if rq:
-                if rq.full():
-                    try:
-                        rq.get_nowait()
-                    except Empty:
-                        pass
-                try:
-                    rq.put_nowait(frame)
-                except Full:
-                    pass
-            iq = self.infer_queues.get(camera_id)
-            if iq:
-                if iq.full():
-                    try:
-                        iq.get_nowait()
-                    except Empty:
-                        pass
-                try:
-                    iq.put_nowait(frame)
-                except Full:
-                    pass
-            if is_video:
-                st = fdur - (time.perf_counter() - t0)
-                if st > 0:
-                    time.sleep(st)
-        adapter.release()
-
     def on_camera_select(self, _):
         sel = self.camera_list_box.curselection()
         if not sel:
@@ -556,85 +484,49 @@ class CCTVMonitoringSystem:
                 self.video_label.config(
                     image="", text="Niñera Virtual\n\nSelecciona o agrega una fuente."
                 )
-                if hasattr(self.video_label, "imgtk"):
-                    self.video_label.imgtk = None
+                self.live_view.clear()
                 return
         name = self.camera_list_box.get(sel[0])
         cam_id = next((cid for cid, d in self.cameras.items() if d["source_name"] == name), None)
         if cam_id and cam_id != self.current_camera_id:
             self.current_camera_id = cam_id
-            dq = self.display_queues.get(self.current_camera_id)
-            if dq:
-                while not dq.empty():
-                    try:
-                        dq.get_nowait()
-                    except Empty:
-                        break
+            self._shown_key = None
             self.video_label.config(image="", text="")
-            if hasattr(self.video_label, "imgtk"):
-                self.video_label.imgtk = None
-            self._set_status(f"Visualizando: {name}")
-
-    # Inferencia ---------------------------------------------------------
-    def _inference_loop(self, camera_id):
-        name = self.cameras[camera_id]["source_name"]
-        while self.running and self.cameras.get(camera_id, {}).get("active", False):
-            try:
-                frame = self.infer_queues[camera_id].get(timeout=0.2)
-            except Empty:
-                continue
-            try:
-                frame_proc = self._preprocess(frame)
-                detections = self.facade.detect_and_evaluate(frame_proc, camera_id, name)
-                annotated = self._draw(detections, frame)
-                dq = self.display_queues.get(camera_id)
-                if dq:
-                    if dq.full():
-                        try:
-                            dq.get_nowait()
-                        except Empty:
-                            pass
-                    try:
-                        dq.put_nowait(annotated)
-                    except Full:
-                        pass
-            except Exception as e:
-                logging.error(f"Inferencia {camera_id}: {e}")
-
-    def _preprocess(self, frame):
-        processed = frame.copy()
-        try:
-            if Config.GRAYSCALE:
-                gray = cv2.cvtColor(processed, cv2.COLOR_BGR2GRAY)
-                if Config.CLAHE:
-                    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-                    gray = clahe.apply(gray)
-                processed = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-            elif Config.CLAHE:
-                lab = cv2.cvtColor(processed, cv2.COLOR_BGR2LAB)
-                l, a, b = cv2.split(lab)
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-                cl = clahe.apply(l)
-                limg = cv2.merge((cl, a, b))
-                processed = cv2.cvtColor(limg, cv2.COLOR_LAB2BGR)
-        except Exception as e:
-            logging.warning(f"Preprocesado: {e}")
-        return processed
+            self.live_view.clear()
+            self._set_status(f"Visualizando: {name}{self._infer_status(cam_id)}{self._cascade_status(cam_id)}")
 
-    def _draw(self, detections, frame):
+    # Dibujo -------------------------------------------------------------
+    def _draw(self, detections: DetectionBatch, frame):
         out = frame.copy()
-        for d in detections:
-            x1, y1, x2, y2 = d.box
-            color = self.object_colors.get(d.label, self.object_colors["default"])
-            cv2.rectangle(out, (x1, y1), (x2, y2), color, 2)
+        self._draw_into(detections, out)
+        return out
+
+    def _draw_into(self, detections: DetectionBatch, out, sx: float = 1.0, sy: float = 1.0):
+        """Dibuja sobre ``out`` (ya propio); ``sx/sy`` escalan las cajas."""
+        if not len(detections):
+            return out
+        vocab = detections.vocab
+        colors = vocab.table("draw", self.object_colors, self.object_colors["default"])
+        boxes = detections.boxes
+        if sx != 1.0 or sy != 1.0:
+            boxes = (boxes * np.array([sx, sy, sx, sy], dtype=np.float32)).astype(np.int32)
+        thick = 2 if min(sx, sy) >= 0.5 else 1
+        for (x1, y1, x2, y2), conf, cls, src in zip(
+            boxes.tolist(),
+            detections.conf.tolist(),
+            detections.cls.tolist(),
+            detections.src.tolist(),
+        ):
+            color = colors[cls]
+            cv2.rectangle(out, (x1, y1), (x2, y2), color, thick)
             cv2.putText(
                 out,
-                f"{d.label} {d.confidence:.2f} ({d.src})",
+                f"{vocab.labels[cls]} {conf:.2f} ({SOURCES[src]})",
                 (x1, max(14, y1 - 6)),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.5,
                 color,
-                2,
+                thick,
             )
         return out
 
@@ -644,20 +536,8 @@ class CCTVMonitoringSystem:
             messagebox.showinfo("Zonas", "Selecciona una camara activa.")
             return
 
-        frame = None
-        frame_queue = self.frame_queues.get(self.current_camera_id)
-        if frame_queue is not None:
-            try:
-                frame = frame_queue.get_nowait()
-            except Empty:
-                frame = None
-        if frame is None:
-            display_queue = self.display_queues.get(self.current_camera_id)
-            if display_queue is not None:
-                try:
-                    frame = display_queue.get_nowait()
-                except Empty:
-                    frame = None
+        ring = self.frame_rings.get(self.current_camera_id)
+        frame = ring.snapshot() if ring is not None else None
         if frame is None:
             messagebox.showinfo("Zonas", "No hay imagen disponible en este momento. Intenta de nuevo.")
             return
@@ -1035,20 +915,115 @@ class CCTVMonitoringSystem:
         ttk.Button(btns, text="Cancelar", style="Ghost.TButton", command=win.destroy).pack(side=tk.RIGHT, padx=8)
 
     # Render -------------------------------------------------------------
+    def _view_size(self, frame):
+        """Tamaño del frame ajustado al espacio real del label de video."""
+        h, w = frame.shape[:2]
+        # Margen para que la imagen no empuje al label a crecer en cada frame
+        return fit_size(w, h, self.video_label.winfo_width() - 4, self.video_label.winfo_height() - 4)
+
     def _update_gui_frame(self):
-        if self.current_camera_id and self.current_camera_id in self.display_queues:
-            try:
-                frame = self.display_queues[self.current_camera_id].get_nowait()
-                img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img_pil = Image.fromarray(img_rgb)
-                self.video_label.imgtk = ImageTk.PhotoImage(image=img_pil)
-                self.video_label.configure(image=self.video_label.imgtk)
-            except Empty:
-                pass
-            except Exception as e:
-                logging.error(f"Update frame: {e}")
+        cam_id = self.current_camera_id
+        ring = self.frame_rings.get(cam_id) if cam_id else None
+        if self.mosaic_var.get():
+            self._update_mosaic()
+        elif ring is not None:
+            dets_seq, dets = self.latest_detections.get(cam_id, (0, None))
+            key = (cam_id, ring.seq, dets_seq)
+            lease = ring.latest() if key != self._shown_key else None
+            if lease is not None:
+                t0 = time.perf_counter()
+                try:
+                    with lease:
+                        draw = None
+                        if dets is not None and len(dets):
+                            draw = lambda img, sx, sy: self._draw_into(dets, img, sx, sy)
+                        self.live_view.render(lease.frame, self._view_size(lease.frame), draw)
+                    self._shown_key = key
+                except Exception as e:
+                    logging.error(f"Update frame: {e}")
+                self._gui_timer.add((time.perf_counter() - t0) * 1000.0)
+        self._report_gui_time()
         self.root.after(Config.UPDATE_MS, self._update_gui_frame)
 
+    # Mosaico -------------------------------------------------------------
+    def _display_fps(self):
+        return Config.MOSAIC_FPS if self.mosaic_var.get() else Config.DISPLAY_FPS
+
+    def toggle_mosaic(self):
+        self.mosaic_on = self.mosaic_var.get()
+        self.engine.set_display_fps(self._display_fps())
+        self.mosaic = None
+        self._shown_key = None
+        self.live_view.clear()
+        self.video_label.config(image="", text="")
+        if self.mosaic_var.get():
+            self._set_status(f"Vista mosaico: {len(self.cameras)} cámaras (doble clic para ampliar)")
+        else:
+            self._set_status("Vista individual")
+
+    def _on_view_double_click(self, event):
+        if not self.mosaic_var.get() or self.mosaic is None:
+            return
+        w, h = self.mosaic.size
+        # La imagen va centrada dentro del label
+        x = event.x - (self.video_label.winfo_width() - w) // 2
+        y = event.y - (self.video_label.winfo_height() - h) // 2
+        cam_id = self.mosaic.tile_at(x, y)
+        if cam_id is None:
+            return
+        self.mosaic_var.set(False)
+        self.toggle_mosaic()
+        names = list(self.camera_list_box.get(0, tk.END))
+        name = self.cameras[cam_id]["source_name"]
+        if name in names:
+            self.camera_list_box.selection_clear(0, tk.END)
+            self.camera_list_box.selection_set(names.index(name))
+            self.on_camera_select(None)
+
+    def _update_mosaic(self):
+        now = time.monotonic()
+        if Config.MOSAIC_FPS > 0 and now - self._mosaic_at < 1.0 / Config.MOSAIC_FPS:
+            return
+        self._mosaic_at = now
+        size = (self.video_label.winfo_width() - 4, self.video_label.winfo_height() - 4)
+        if size[0] < 16 or size[1] < 16:
+            return
+        cam_ids = list(self.cameras)
+        if self.mosaic is None or not self.mosaic.matches(size, cam_ids):
+            self.mosaic = MosaicCanvas(size, cam_ids)
+        t0 = time.perf_counter()
+        changed = self.mosaic.size != self._shown_key
+        for cam_id in cam_ids:
+            ring = self.frame_rings.get(cam_id)
+            if ring is None or not ring.seq:
+                continue
+            dets_seq, dets = self.latest_detections.get(cam_id, (0, None))
+            alert = now - self.engine.last_alert_at.get(cam_id, -1e9) < Config.MOSAIC_ALERT_SEC
+            key = (ring.seq, dets_seq, alert)
+            if self.mosaic.is_current(cam_id, key):
+                continue
+            lease = ring.latest()
+            if lease is None:
+                continue
+            with lease:
+                draw = None
+                if dets is not None and len(dets):
+                    draw = lambda img, sx, sy, d=dets: self._draw_into(d, img, sx, sy)
+                changed |= self.mosaic.update_tile(
+                    cam_id, lease.frame, key, self.cameras[cam_id]["source_name"], alert, draw
+                )
+        if changed:
+            self.live_view.show_bgr(self.mosaic.canvas)
+            self._shown_key = self.mosaic.size
+            self._gui_timer.add((time.perf_counter() - t0) * 1000.0)
+
+    def _report_gui_time(self):
+        now = time.monotonic()
+        if now - self._gui_report_at < 1.0 or not self._gui_timer.count:
+            return
+        self._gui_report_at = now
+        self.render_label.config(text=f"GUI {self._gui_timer.ms:.1f} ms/frame")
+
     # Utilidades ---------------------------------------------------------
     def _set_fullscreen(self, enabled: bool):
         try:
@@ -1151,27 +1126,6 @@ class CCTVMonitoringSystem:
 
         Thread(target=t, daemon=True).start()
 
-    def _save_alert_image(self, frame, camera_name):
-        clean = "".join(ch if ch.isalnum() else "_" for ch in camera_name)
-        tsf = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        path = os.path.join(Config.SAVE_IMG_DIR, f"alerta_{clean}_{tsf}.jpg")
-        try:
-            cv2.imwrite(path, frame, [cv2.IMWRITE_JPEG_QUALITY, Config.TELEGRAM_JPEG_QLTY])
-        except Exception as e:
-            logging.error(f"Guardar IMG: {e}")
-        try:
-            files = [
-                os.path.join(Config.SAVE_IMG_DIR, f)
-                for f in os.listdir(Config.SAVE_IMG_DIR)
-                if f.lower().endswith((".jpg", ".jpeg", ".png"))
-            ]
-            files.sort(key=os.path.getmtime)
-            while len(files) > Config.MAX_ALERT_IMGS:
-                os.remove(files[0])
-                files.pop(0)
-        except Exception:
-            pass
-
     def _set_status(self, text, tone="info"):
         palette = self.colors
         color_map = {
@@ -1194,19 +1148,7 @@ class CCTVMonitoringSystem:
     # Cierre -------------------------------------------------------------
     def on_close(self):
         self.running = False
-        for d in list(self.cameras.values()):
-            d["active"] = False
-        for d in list(self.cameras.values()):
-            if d.get("thread") and d["thread"].is_alive():
-                d["thread"].join(timeout=0.8)
-            d["adapter"].release()
-        for m in (self.frame_queues, self.infer_queues, self.display_queues):
-            for q in list(m.values()):
-                while not q.empty():
-                    try:
-                        q.get_nowait()
-                    except Empty:
-                        break
+        self.engine.stop()
         try:
             self.root.destroy()
         except Exception:
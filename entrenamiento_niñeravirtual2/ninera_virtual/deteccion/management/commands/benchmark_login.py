@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...legacy.config import DatabaseConnection, UserRepository
+from ...legacy.passwords import HasherBusy, PasswordHasher
+
+
+def _pct(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    help = "Mide la latencia de login (p50/p99) con clientes concurrentes: hash en línea vs. pool de procesos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=16, help="Logins simultáneos.")
+        parser.add_argument("--logins", type=int, default=10, help="Logins por cliente.")
+        parser.add_argument("--workers", type=int, default=2, help="Procesos del pool.")
+        parser.add_argument("--max-pending", type=int, default=8, help="Admisión del pool.")
+        parser.add_argument("--wait", type=float, default=2.0, help="Espera máxima por turno (s).")
+
+    def _run(self, db: DatabaseConnection, hasher: PasswordHasher, clients: int, logins: int) -> dict:
+        repo = UserRepository(db, hasher=hasher)
+        latencies, probes = [], []
+        counts = {"rejected": 0, "wrong": 0}
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def client(n: int):
+            local = []
+            for i in range(logins):
+                t0 = time.perf_counter()
+                # Uno de cada cuatro intentos usa una contraseña incorrecta
+                valid = bool(i % 4)
+                try:
+                    user = repo.verify_credentials("bench@x.co", "secreto" if valid else "incorrecta")
+                except HasherBusy:
+                    with lock:
+                        counts["rejected"] += 1
+                    continue
+                if bool(user) != valid:
+                    with lock:
+                        counts["wrong"] += 1
+                local.append((time.perf_counter() - t0) * 1000)
+            with lock:
+                latencies.extend(local)
+
+        def probe():
+            # Trabajo corto de otro request (p. ej. una lectura de la API) mientras hay logins
+            while not done.is_set():
+                t0 = time.perf_counter()
+                sum(i * i for i in range(2000))
+                probes.append((time.perf_counter() - t0) * 1000)
+                time.sleep(0.005)
+
+        prober = threading.Thread(target=probe)
+        prober.start()
+        pool = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        t0 = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        done.set()
+        prober.join()
+        return {
+            "p50": _pct(latencies, 0.50),
+            "p99": _pct(latencies, 0.99),
+            "rate": len(latencies) / elapsed,
+            "rejected": counts["rejected"],
+            "wrong": counts["wrong"],
+            "probe_p99": _pct(probes, 0.99),
+        }
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseConnection(os.path.join(tmp, "users.db"))
+            UserRepository(db, hasher=PasswordHasher(workers=0)).create_user("bench", "bench@x.co", "secreto")
+
+            modes = {
+                "inline": PasswordHasher(workers=0, max_pending=options["clients"], wait_sec=options["wait"]),
+                "pool": PasswordHasher(options["workers"], options["max_pending"], options["wait"]),
+            }
+            # Arranque de los procesos fuera de la medición
+            modes["pool"].hash("x", "00", 1)
+            wrong = 0
+            try:
+                for name, hasher in modes.items():
+                    r = self._run(db, hasher, options["clients"], options["logins"])
+                    self.stdout.write(
+                        f"{name:>6}: p50 {r['p50']:.0f} ms · p99 {r['p99']:.0f} ms · {r['rate']:.1f} logins/s"
+                        f" · {r['rejected']} rechazados (429) · sonda p99 {r['probe_p99']:.2f} ms"
+                    )
+                    wrong += r["wrong"]
+            finally:
+                modes["pool"].shutdown()
+                db.connections.close_all()
+            if wrong:
+                raise CommandError(f"{wrong} logins devolvieron un resultado incorrecto")
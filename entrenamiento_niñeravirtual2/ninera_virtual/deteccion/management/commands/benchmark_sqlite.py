@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...legacy.sqlite import ThreadLocalConnections
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    salt TEXT NOT NULL,
+    created_at TEXT NOT NULL
+)
+"""
+
+
+def _seed(path: str, rows: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.executemany(
+        "INSERT INTO users (name, email, password_hash, salt, created_at) VALUES (?, ?, ?, ?, '2024-01-01')",
+        ((f"u{i}", f"u{i}@x.co", "h" * 64, "s" * 32) for i in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _run(get_conn, threads: int, seconds: float, write_ratio: float, rows: int) -> dict:
+    stop = time.monotonic() + seconds
+    counts = {"reads": 0, "writes": 0, "locked": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def worker(n: int):
+        rnd = random.Random(n)
+        local = dict.fromkeys(counts, 0)
+        seq = 0
+        while time.monotonic() < stop:
+            try:
+                conn = get_conn()
+                if rnd.random() < write_ratio:
+                    seq += 1
+                    conn.execute(
+                        "INSERT INTO users (name, email, password_hash, salt, created_at)"
+                        " VALUES (?, ?, 'h', 's', '2024-01-01')",
+                        (f"t{n}", f"t{n}-{seq}-{time.monotonic_ns()}@x.co"),
+                    )
+                    conn.commit()
+                    local["writes"] += 1
+                else:
+                    conn.execute(
+                        "SELECT id, name, email, password_hash, salt FROM users WHERE email = ?",
+                        (f"u{rnd.randrange(rows)}@x.co",),
+                    ).fetchone()
+                    local["reads"] += 1
+            except sqlite3.OperationalError as e:
+                local["locked" if "locked" in str(e) else "errors"] += 1
+            except sqlite3.Error:
+                local["errors"] += 1
+        with lock:
+            for k, v in local.items():
+                counts[k] += v
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    counts["ops_s"] = (counts["reads"] + counts["writes"]) / elapsed
+    return counts
+
+
+class Command(BaseCommand):
+    help = "Compara lecturas/escrituras concurrentes: conexión compartida (antes) vs. por hilo con WAL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--write-ratio", type=float, default=0.2, help="Fracción de operaciones que escriben.")
+        parser.add_argument("--rows", type=int, default=10_000, help="Usuarios precargados.")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            results = {}
+            for mode in ("shared", "tuned"):
+                path = os.path.join(tmp, f"{mode}.db")
+                _seed(path, options["rows"])
+                if mode == "shared":
+                    # Comportamiento anterior: una conexión para todos los hilos, journal clásico
+                    shared = sqlite3.connect(path, check_same_thread=False)
+                    get_conn = lambda: shared  # noqa: E731
+                    closer = shared.close
+                else:
+                    pool = ThreadLocalConnections(path)
+                    get_conn = pool.get
+                    closer = pool.close_all
+                try:
+                    results[mode] = _run(
+                        get_conn, options["threads"], options["seconds"], options["write_ratio"], options["rows"]
+                    )
+                finally:
+                    closer()
+                r = results[mode]
+                self.stdout.write(
+                    f"{mode:>6}: {r['ops_s']:.0f} ops/s · {r['reads']} lecturas · {r['writes']} escrituras"
+                    f" · {r['locked']} bloqueos · {r['errors']} errores"
+                )
+            base = results["shared"]["ops_s"]
+            if base:
+                self.stdout.write(self.style.SUCCESS(f"Mejora: x{results['tuned']['ops_s'] / base:.2f}"))
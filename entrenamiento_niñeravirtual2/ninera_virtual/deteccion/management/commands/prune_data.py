@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from ...services.retention import run_retention
+from ...services.rollups import compact_rollups
+
+
+class Command(BaseCommand):
+    help = "Aplica la retención: borra alertas, subidas y capturas antiguas (y compacta los acumulados)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alert-days", type=int, default=None, help="Días de alertas (0 = no borrar).")
+        parser.add_argument("--upload-days", type=int, default=None, help="Días de subidas (0 = no borrar).")
+        parser.add_argument("--snapshot-days", type=int, default=None, help="Días de capturas/clips (0 = no borrar).")
+        parser.add_argument("--archive-dir", default=None, help="Archivar filas borradas en NDJSON gzip por día.")
+
+    def handle(self, *args, **options):
+        result = run_retention(
+            alert_days=options["alert_days"],
+            upload_days=options["upload_days"],
+            snapshot_days=options["snapshot_days"],
+            archive_dir=options["archive_dir"],
+        )
+        compacted = compact_rollups()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Borrados: {result['alerts']} alertas, {result['uploads']} subidas, "
+                f"{result['snapshots']} capturas · acumulados compactados: {compacted}"
+            )
+        )
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from ...services.alerts import record_alert
+from ...services.live import publish_camera
+
+
+def load_camera_config(path: str) -> List[Dict]:
+    """Lee el JSON de cámaras: ``{"cameras": [{"id", "name", "source", "zones"}]}``.
+
+    ``source`` puede ser un índice de cámara local (entero), una ruta de
+    video o una URL RTSP/HTTP. ``zones`` usa el mismo formato que las
+    zonas de la GUI legacy: ``{nombre: [[[x, y], ...], ...]}`` en píxeles.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError) as e:
+        raise CommandError(f"No se pudo leer {path}: {e}")
+
+    entries = data.get("cameras") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise CommandError("El archivo debe contener una lista 'cameras' no vacía.")
+
+    cameras, seen = [], set()
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or entry.get("source") in (None, ""):
+            raise CommandError(f"Cámara #{i}: falta 'source'.")
+        source = entry["source"]
+        if isinstance(source, str) and source.isdigit():
+            source = int(source)
+        cam_id = str(entry.get("id") or f"cam{i}")
+        if cam_id in seen:
+            raise CommandError(f"Cámara #{i}: id repetido '{cam_id}'.")
+        seen.add(cam_id)
+        zones = entry.get("zones") or {}
+        if not isinstance(zones, dict):
+            raise CommandError(f"Cámara '{cam_id}': 'zones' debe ser un objeto.")
+        cameras.append(
+            {
+                "id": cam_id,
+                "name": str(entry.get("name") or cam_id),
+                "source": source,
+                "kind": "live" if isinstance(source, int) else "video",
+                "zones": zones,
+            }
+        )
+    return cameras
+
+
+class StreamAlertObserver:
+    """Observer del motor: persiste cada alerta como ``StreamAlert``."""
+
+    def __init__(self, session: str = "daemon"):
+        self.session = session
+
+    def on_alert(self, event) -> None:
+        text = " | ".join(sorted(set(event.messages)))
+        close_old_connections()
+        try:
+            record_alert(
+                risks=event.risks,
+                detections=event.detections,
+                camera=event.camera_id or "",
+                session=self.session,
+                text=f"[{event.camera_name}] {text}",
+            )
+        finally:
+            close_old_connections()
+
+
+def _stats_server(engine, host: str, port: int) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/healthz"):
+                ok = engine.healthy()
+                body, status = {"status": "ok" if ok else "degraded"}, 200 if ok else 503
+            elif self.path.startswith("/stats"):
+                body, status = engine.stats(), 200
+            else:
+                body, status = {"error": "not found"}, 404
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):  # noqa: A002 - firma de BaseHTTPRequestHandler
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="daemon-stats", daemon=True).start()
+    return server
+
+
+class Command(BaseCommand):
+    help = "Ejecuta la detección multi-cámara sin interfaz y guarda las alertas en la BD."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--config", required=True, help="JSON con las cámaras a vigilar.")
+        parser.add_argument("--workers", type=int, default=0, help="Workers de inferencia (0 = automático).")
+        parser.add_argument("--stats-interval", type=float, default=30.0, help="Segundos entre reportes de stats.")
+        parser.add_argument("--stats-port", type=int, default=0, help="Puerto HTTP para /stats y /healthz (0 = off).")
+        parser.add_argument("--stats-host", default="127.0.0.1")
+        parser.add_argument("--no-snapshots", action="store_true", help="No guardar capturas de alerta.")
+        parser.add_argument("--no-clips", action="store_true", help="No grabar clips de alerta.")
+
+    def handle(self, *args, **options):
+        cameras = load_camera_config(options["config"])
+
+        # Import diferido: torch/ultralytics/cv2 solo cuando de verdad se ejecuta
+        from ...legacy.config import Config
+        from ...legacy.engine import MonitoringEngine
+
+        try:
+            engine = MonitoringEngine(
+                save_snapshots=not options["no_snapshots"],
+                record_clips=Config.ALERT_CLIPS and not options["no_clips"],
+                workers=options["workers"] or None,
+            )
+        except Exception as e:
+            raise CommandError(f"No pudo cargarse el modelo: {e}")
+        engine.subscribe(StreamAlertObserver(session=f"daemon-{os.getpid()}"))
+        engine.start()
+
+        for cam in cameras:
+            if engine.add_source(cam["kind"], cam["source"], camera_id=cam["id"], name=cam["name"]) is None:
+                self.stderr.write(f"No se pudo abrir {cam['name']}: {cam['source']}")
+                continue
+            if cam["zones"]:
+                engine.facade.set_polygons(cam["id"], cam["zones"])
+        if not engine.cameras:
+            engine.stop()
+            raise CommandError("Ninguna cámara pudo abrirse.")
+
+        server = None
+        if options["stats_port"]:
+            server = _stats_server(engine, options["stats_host"], options["stats_port"])
+
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Daemon de detección: {len(engine.cameras)} cámaras, {engine.scheduler.workers} workers")
+        )
+        try:
+            while not stop.wait(options["stats_interval"]):
+                stats = engine.stats()
+                logging.info("[daemon] %s", json.dumps(stats, ensure_ascii=False))
+                for cam_id, st in stats["cameras"].items():
+                    publish_camera(cam_id, st["status"], name=st["name"], fps=round(st["infer"]["fps"], 1))
+                    self.stdout.write(
+                        f"{st['name']}: {st['status']} · inferencia {st['infer']['fps']:.1f} FPS"
+                        f" ({st['infer']['infer_ms']:.0f} ms) · {st['capture']['skip_ratio']:.0%} sin decodificar"
+                    )
+        finally:
+            if server is not None:
+                server.shutdown()
+            engine.stop()
+            self.stdout.write("Daemon detenido.")
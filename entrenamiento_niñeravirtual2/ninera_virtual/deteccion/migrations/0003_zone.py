@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("deteccion", "0002_stream_alert"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Zone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("camera", models.CharField(db_index=True, max_length=64)),
+                ("name", models.CharField(max_length=64)),
+                ("points", models.JSONField()),
+                ("active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["camera", "name"],
+                "verbose_name": "Zona de riesgo",
+                "verbose_name_plural": "Zonas de riesgo",
+            },
+        ),
+    ]
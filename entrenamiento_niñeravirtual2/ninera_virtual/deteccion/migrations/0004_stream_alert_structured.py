@@ -0,0 +1,151 @@
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia congelada de deteccion.risks al escribir esta migración: si las
+# tablas cambian después, la migración debe seguir haciendo lo mismo.
+RISK_CHOICES = [
+    ("knife", "Cuchillo"),
+    ("scissors", "Tijeras"),
+    ("stove", "Estufa/Cocina"),
+    ("stairs", "Escaleras"),
+    ("high", "Altura"),
+    ("pot", "Olla/Recipiente caliente"),
+    ("zone", "Zona"),
+    ("railing", "Baranda"),
+]
+ZONE = "zone"
+LABEL_RISKS = {
+    **dict.fromkeys(["knife", "cuchillo"], "knife"),
+    **dict.fromkeys(["scissors", "tijera", "tijeras"], "scissors"),
+    **dict.fromkeys(["kitchen", "cocina", "cooker", "stove", "horno", "oven"], "stove"),
+    **dict.fromkeys(["stairs", "escalera", "escaleras"], "stairs"),
+    **dict.fromkeys(
+        ["chair", "silla", "bar", "barra", "table", "mesa", "stool", "taburete",
+         "counter", "mostrador", "shelf", "estante"],
+        "high",
+    ),
+    **dict.fromkeys(["pot", "olla", "pan"], "pot"),
+}
+
+# "[coco] knife 0.83" dentro del texto libre de las alertas existentes
+_DET_RE = re.compile(r"\[([a-z_]+)\] ([^\[\]|·]+?) (\d+(?:\.\d+)?)")
+_NAME_RISKS = {label.lower(): code for code, label in RISK_CHOICES}
+# Alertas sin prefijo "Riesgo:" (motor legacy, consumer antiguo)
+_KEYWORDS = (
+    ("knife", ("cuchillo", "knife")),
+    ("scissors", ("tijera", "scissors")),
+    ("stove", ("estufa", "cocina", "kitchen", "cooker", "stove", "horno", "oven")),
+    ("stairs", ("escalera", "stairs")),
+    ("high", ("sobre", "altura")),
+    ("pot", ("olla", "sartén")),
+    ("zone", ("zona",)),
+    ("railing", ("baranda", "handrail")),
+)
+
+
+def _ordered(risks):
+    found = set(risks)
+    return [code for code, _ in RISK_CHOICES if code in found]
+
+
+def _parse(text):
+    text = text or ""
+    detections = [
+        {"src": src, "label": label.strip(), "conf": float(conf)} for src, label, conf in _DET_RE.findall(text)
+    ]
+    risks = [LABEL_RISKS[d["label"].lower()] for d in detections if d["label"].lower() in LABEL_RISKS]
+    head = text.split("|", 1)[0].strip()
+    if head.startswith("Riesgo:"):
+        for name in head[len("Riesgo:"):].split(","):
+            name = name.strip().lower()
+            risks.append(ZONE if name.startswith("zona") else _NAME_RISKS.get(name))
+    elif not detections:
+        low = text.lower()
+        risks += [code for code, words in _KEYWORDS if any(w in low for w in words)]
+    max_conf = max((d["conf"] for d in detections), default=None)
+    return _ordered(r for r in risks if r), detections, max_conf
+
+
+def backfill(apps, schema_editor):
+    StreamAlert = apps.get_model("deteccion", "StreamAlert")
+    StreamAlertRisk = apps.get_model("deteccion", "StreamAlertRisk")
+    batch, risks = [], []
+    for alert in StreamAlert.objects.order_by("pk").iterator(chunk_size=1000):
+        alert.risk_types, alert.detections, alert.max_conf = _parse(alert.text)
+        batch.append(alert)
+        risks += [StreamAlertRisk(alert_id=alert.pk, risk=r, created_at=alert.created_at) for r in alert.risk_types]
+        if len(batch) >= 1000:
+            StreamAlert.objects.bulk_update(batch, ["risk_types", "detections", "max_conf"])
+            StreamAlertRisk.objects.bulk_create(risks)
+            batch, risks = [], []
+    if batch:
+        StreamAlert.objects.bulk_update(batch, ["risk_types", "detections", "max_conf"])
+        StreamAlertRisk.objects.bulk_create(risks)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("deteccion", "0003_zone"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="streamalert",
+            name="camera",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="streamalert",
+            name="session",
+            field=models.CharField(blank=True, default="", max_length=128),
+        ),
+        migrations.AddField(
+            model_name="streamalert",
+            name="risk_types",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="streamalert",
+            name="max_conf",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="streamalert",
+            name="detections",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name="streamalert",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name="streamalert",
+            index=models.Index(fields=["camera", "created_at"], name="streamalert_cam_created_idx"),
+        ),
+        migrations.CreateModel(
+            name="StreamAlertRisk",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("risk", models.CharField(choices=RISK_CHOICES, max_length=16)),
+                ("camera", models.CharField(blank=True, default="", max_length=64)),
+                ("created_at", models.DateTimeField()),
+                (
+                    "alert",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="risks",
+                        to="deteccion.streamalert",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Riesgo de alerta",
+                "verbose_name_plural": "Riesgos de alerta",
+                "indexes": [models.Index(fields=["risk", "created_at"], name="alertrisk_risk_created_idx")],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils import timezone
+
+
+def backfill(apps, schema_editor):
+    StreamAlert = apps.get_model("deteccion", "StreamAlert")
+    StreamAlertRisk = apps.get_model("deteccion", "StreamAlertRisk")
+    AlertRollup = apps.get_model("deteccion", "AlertRollup")
+    minute_floor = timezone.now() - timedelta(hours=settings.ALERT_ROLLUP_MINUTE_HOURS)
+    tz = timezone.get_current_timezone()
+    rows = []
+    for gran, trunc in (("m", TruncMinute), ("h", TruncHour), ("d", TruncDay)):
+        alerts = StreamAlert.objects.all()
+        risks = StreamAlertRisk.objects.all()
+        if gran == "m":
+            alerts = alerts.filter(created_at__gte=minute_floor)
+            risks = risks.filter(created_at__gte=minute_floor)
+        totals = alerts.annotate(b=trunc("created_at", tzinfo=tz)).values("b", "camera").annotate(n=Count("id"))
+        rows += [AlertRollup(granularity=gran, bucket=r["b"], camera=r["camera"], risk="", count=r["n"]) for r in totals]
+        per_risk = risks.annotate(b=trunc("created_at", tzinfo=tz)).values("b", "camera", "risk").annotate(n=Count("id"))
+        rows += [
+            AlertRollup(granularity=gran, bucket=r["b"], camera=r["camera"], risk=r["risk"], count=r["n"])
+            for r in per_risk
+        ]
+    AlertRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("deteccion", "0004_stream_alert_structured"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlertRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "granularity",
+                    models.CharField(choices=[("m", "Minuto"), ("h", "Hora"), ("d", "Día")], max_length=1),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("camera", models.CharField(blank=True, default="", max_length=64)),
+                ("risk", models.CharField(blank=True, default="", max_length=16)),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Acumulado de alertas",
+                "verbose_name_plural": "Acumulados de alertas",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("granularity", "bucket", "camera", "risk"), name="alertrollup_unique_bucket"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
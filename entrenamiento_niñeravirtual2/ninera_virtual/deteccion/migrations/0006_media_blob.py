@@ -0,0 +1,36 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+import deteccion.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deteccion", "0005_alert_rollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaBlob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("size", models.BigIntegerField()),
+                ("refcount", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_used_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name": "Archivo de subida",
+                "verbose_name_plural": "Archivos de subida",
+                "indexes": [models.Index(fields=["refcount", "last_used_at"], name="deteccion_m_refcoun_c9c51e_idx")],
+            },
+        ),
+        migrations.AlterField(
+            model_name="inferenceresult",
+            name="input_file",
+            field=models.FileField(storage=deteccion.storage.upload_storage, upload_to="deteccion/uploads/"),
+        ),
+    ]
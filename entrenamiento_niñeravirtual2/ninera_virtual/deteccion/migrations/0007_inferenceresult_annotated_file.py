@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deteccion", "0006_media_blob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inferenceresult",
+            name="annotated_file",
+            field=models.FileField(blank=True, upload_to="deteccion/renders/"),
+        ),
+    ]
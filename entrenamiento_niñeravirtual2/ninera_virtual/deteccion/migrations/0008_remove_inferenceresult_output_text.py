@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deteccion", "0007_inferenceresult_annotated_file"),
+    ]
+
+    operations = [
+        # El modelo ya no tiene output_text; la columna NOT NULL impedía crear resultados
+        migrations.RemoveField(
+            model_name="inferenceresult",
+            name="output_text",
+        ),
+    ]
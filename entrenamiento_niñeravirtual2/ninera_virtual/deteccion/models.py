@@ -1,4 +1,8 @@
 from django.db import models
+from django.utils import timezone
+
+from .risks import RISK_CHOICES, risk_display
+from .storage import upload_storage
 
 
 class InferenceResult(models.Model):
@@ -14,8 +18,11 @@ class InferenceResult(models.Model):
         (STATUS_FAILED, "Fallido"),
     ]
 
-    input_file = models.FileField(upload_to="deteccion/uploads/")
+    # Direccionado por contenido: subidas idénticas comparten archivo (ver MediaBlob)
+    input_file = models.FileField(upload_to="deteccion/uploads/", storage=upload_storage)
     output_data = models.JSONField(blank=True, null=True)
+    # Imagen anotada (u hoja de contactos para videos), generada una vez
+    annotated_file = models.FileField(upload_to="deteccion/renders/", blank=True)
     status = models.CharField(
         max_length=32,
         choices=STATUS_CHOICES,
@@ -33,19 +40,141 @@ class InferenceResult(models.Model):
         return f"Inferencia {self.pk} - {self.get_status_display()}"
 
 
+class MediaBlob(models.Model):
+    """Archivo subido, guardado una vez por contenido (SHA-256).
+
+    ``refcount`` cuenta las ``InferenceResult`` que lo usan; con 0 queda
+    como candidato a expulsión por antigüedad de ``last_used_at``.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["refcount", "last_used_at"])]
+        verbose_name = "Archivo de subida"
+        verbose_name_plural = "Archivos de subida"
+
+    def __str__(self) -> str:  # pragma: no cover - presentacional
+        return f"{self.sha256[:12]} ({self.refcount} refs)"
+
+
 class StreamAlert(models.Model):
     """Alerta generada desde el streaming en tiempo real.
 
-    Guarda solo texto y timestamp para mantenerlo ligero en Render Free.
+    ``text`` queda como resumen legible; cámara, sesión, tipos de riesgo
+    (códigos de ``deteccion.risks``), confianza máxima y detecciones van en
+    columnas propias para filtrar y agregar sin parsear texto.
     """
 
     text = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    camera = models.CharField(max_length=64, blank=True, default="")
+    session = models.CharField(max_length=128, blank=True, default="")
+    risk_types = models.JSONField(default=list, blank=True)
+    max_conf = models.FloatField(null=True, blank=True)
+    detections = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["camera", "created_at"], name="streamalert_cam_created_idx")]
         verbose_name = "Alerta de streaming"
         verbose_name_plural = "Alertas de streaming"
 
     def __str__(self) -> str:  # pragma: no cover - presentacional
         return f"{self.created_at:%Y-%m-%d %H:%M:%S} · {self.text[:48]}"
+
+    @property
+    def risk_display(self) -> str:
+        return risk_display(self.risk_types or [])
+
+
+class StreamAlertRisk(models.Model):
+    """Un tipo de riesgo de una alerta (fila por riesgo, para índices y conteos).
+
+    ``camera`` y ``created_at`` se copian de la alerta para que los conteos
+    por riesgo y periodo se resuelvan con el índice, sin join.
+    """
+
+    alert = models.ForeignKey(StreamAlert, on_delete=models.CASCADE, related_name="risks")
+    risk = models.CharField(max_length=16, choices=RISK_CHOICES)
+    camera = models.CharField(max_length=64, blank=True, default="")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["risk", "created_at"], name="alertrisk_risk_created_idx")]
+        verbose_name = "Riesgo de alerta"
+        verbose_name_plural = "Riesgos de alerta"
+
+    def __str__(self) -> str:  # pragma: no cover - presentacional
+        return f"{self.alert_id} · {self.risk}"
+
+
+class AlertRollup(models.Model):
+    """Contador de alertas por cubeta de tiempo, cámara y tipo de riesgo.
+
+    Se incrementa en la misma transacción que inserta la alerta; ``risk``
+    vacío cuenta el total de alertas. Las métricas leen estas cubetas
+    (O(cubetas)) y nunca las filas de ``StreamAlert``.
+    """
+
+    MINUTE = "m"
+    HOUR = "h"
+    DAY = "d"
+    GRANULARITY_CHOICES = [(MINUTE, "Minuto"), (HOUR, "Hora"), (DAY, "Día")]
+
+    granularity = models.CharField(max_length=1, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()
+    camera = models.CharField(max_length=64, blank=True, default="")
+    risk = models.CharField(max_length=16, blank=True, default="")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["granularity", "bucket", "camera", "risk"], name="alertrollup_unique_bucket"
+            )
+        ]
+        verbose_name = "Acumulado de alertas"
+        verbose_name_plural = "Acumulados de alertas"
+
+    def __str__(self) -> str:  # pragma: no cover - presentacional
+        return f"{self.granularity} {self.bucket:%Y-%m-%d %H:%M} {self.camera or '*'} {self.risk or 'total'}: {self.count}"
+
+
+class Zone(models.Model):
+    """Zona poligonal de riesgo definida para una cámara.
+
+    Los puntos se guardan normalizados (0..1) respecto al ancho/alto del
+    frame, así la zona no depende de la resolución con la que llegue cada
+    imagen al servidor.
+    """
+
+    camera = models.CharField(max_length=64, db_index=True)
+    name = models.CharField(max_length=64)
+    points = models.JSONField()
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["camera", "name"]
+        verbose_name = "Zona de riesgo"
+        verbose_name_plural = "Zonas de riesgo"
+
+    def __str__(self) -> str:  # pragma: no cover - presentacional
+        return f"{self.camera} · {self.name}"
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.pk,
+            "camera": self.camera,
+            "name": self.name,
+            "points": self.points,
+            "active": self.active,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
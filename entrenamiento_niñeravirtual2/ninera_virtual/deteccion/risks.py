@@ -0,0 +1,73 @@
+"""Tipos de riesgo canónicos de las alertas.
+
+Un solo vocabulario para el consumer web, el motor legacy y el dashboard:
+cada alerta guarda códigos cortos (``knife``, ``stairs``...) en columnas
+propias en vez de depender del texto libre, y las métricas se agregan por
+código directamente en la BD.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List
+
+KNIFE = "knife"
+SCISSORS = "scissors"
+STOVE = "stove"
+STAIRS = "stairs"
+HIGH = "high"
+POT = "pot"
+ZONE = "zone"
+RAILING = "railing"
+
+# Orden de presentación = orden de las métricas del dashboard
+RISK_LABELS: Dict[str, str] = {
+    KNIFE: "Cuchillo",
+    SCISSORS: "Tijeras",
+    STOVE: "Estufa/Cocina",
+    STAIRS: "Escaleras",
+    HIGH: "Altura",
+    POT: "Olla/Recipiente caliente",
+    ZONE: "Zona",
+    RAILING: "Baranda",
+}
+RISK_CHOICES = list(RISK_LABELS.items())
+
+# Etiquetas de detección (modelo custom y COCO, es/en) que implican cada riesgo
+LABEL_RISKS: Dict[str, str] = {
+    **dict.fromkeys(["knife", "cuchillo"], KNIFE),
+    **dict.fromkeys(["scissors", "tijera", "tijeras"], SCISSORS),
+    **dict.fromkeys(["kitchen", "cocina", "cooker", "stove", "horno", "oven"], STOVE),
+    **dict.fromkeys(["stairs", "escalera", "escaleras"], STAIRS),
+    **dict.fromkeys(
+        ["chair", "silla", "bar", "barra", "table", "mesa", "stool", "taburete",
+         "counter", "mostrador", "shelf", "estante"],
+        HIGH,
+    ),
+    **dict.fromkeys(["pot", "olla", "pan"], POT),
+}
+
+# Reglas del motor legacy (RiskAnalysisFacade) -> riesgo
+RULE_RISKS: Dict[str, str] = {
+    "CHILD_NEAR_KNIFE": KNIFE,
+    "CHILD_NEAR_STAIRS": STAIRS,
+    "CHILD_NEAR_STOVE": STOVE,
+    "CHILD_NEAR_POT": POT,
+    "CHILD_NEAR_OVEN": STOVE,
+    "CHILD_NEAR_RAILING": RAILING,
+    "CHILD_NEAR_SCISSORS": SCISSORS,
+    "CHILD_ON_HIGH_SURFACE": HIGH,
+}
+
+
+def ordered(risks: Iterable[str]) -> List[str]:
+    """Códigos válidos, sin repetir y en el orden de ``RISK_LABELS``."""
+    found = set(risks)
+    return [code for code in RISK_LABELS if code in found]
+
+
+def risks_for_labels(labels: Iterable[str]) -> List[str]:
+    return ordered(LABEL_RISKS[lbl] for lbl in (str(x).lower() for x in labels) if lbl in LABEL_RISKS)
+
+
+def risk_display(risks: Iterable[str]) -> str:
+    return ", ".join(RISK_LABELS[code] for code in ordered(risks))
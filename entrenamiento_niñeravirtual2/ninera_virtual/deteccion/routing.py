@@ -1,8 +1,9 @@
 from django.urls import path
 
-from .consumers_ws import StreamConsumer
+from .consumers_ws import DashboardConsumer, StreamConsumer
 
 
 websocket_urlpatterns = [
     path("ws/stream", StreamConsumer.as_asgi()),
+    path("ws/dashboard", DashboardConsumer.as_asgi()),
 ]
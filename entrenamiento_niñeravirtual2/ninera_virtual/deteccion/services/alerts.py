@@ -0,0 +1,93 @@
+"""Persistencia y métricas de alertas de streaming.
+
+Todos los productores (consumer web, daemon legacy) pasan por
+``record_alert``: la alerta se guarda con columnas estructuradas y una fila
+``StreamAlertRisk`` por tipo de riesgo en la misma transacción, que
+también suma los acumulados de ``AlertRollup`` (ver ``services.rollups``).
+``risk_counts`` cuenta sobre las filas crudas (índice riesgo/fecha) y sirve
+de referencia exacta; las métricas del dashboard leen los acumulados.
+Tras el commit la alerta se publica una vez a los dashboards abiertos
+(``services.live``).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from django.db import transaction
+from django.db.models import Count
+
+from ..models import StreamAlert, StreamAlertRisk
+from ..risks import RISK_LABELS, ordered, risk_display
+from .live import publish_alert_on_commit
+from .rollups import bump_rollups, maybe_compact_async
+
+
+def _clean_detections(detections: Iterable[Mapping]) -> List[dict]:
+    out = []
+    for d in detections:
+        item = {"label": str(d.get("label", "")), "conf": round(float(d.get("conf", 0.0)), 4)}
+        if d.get("src") is not None:
+            item["src"] = str(d["src"])
+        if d.get("box") is not None:
+            item["box"] = [int(v) for v in d["box"]]
+        out.append(item)
+    return out
+
+
+def format_alert_text(risks: Iterable[str], detections: Iterable[Mapping], extra: Iterable[str] = ()) -> str:
+    """Resumen legible: ``Riesgo: Cuchillo, Zona cocina | [coco] knife 0.83 · ...``."""
+    names = [n for n in [risk_display(risks)] + list(extra) if n]
+    details = " · ".join(f"[{d.get('src')}] {d.get('label')} {float(d.get('conf', 0.0)):.2f}" for d in detections)
+    prefix = f"Riesgo: {', '.join(names)}" if names else ""
+    return " | ".join(p for p in (prefix, details) if p)
+
+
+def record_alert(
+    *,
+    risks: Iterable[str] = (),
+    detections: Iterable[Mapping] = (),
+    camera: str = "",
+    session: str = "",
+    text: Optional[str] = None,
+) -> StreamAlert:
+    risk_types = ordered(risks)
+    dets = _clean_detections(detections)
+    max_conf = max((d["conf"] for d in dets), default=None)
+    with transaction.atomic():
+        alert = StreamAlert.objects.create(
+            text=text if text is not None else format_alert_text(risk_types, dets),
+            camera=camera[:64],
+            session=session[:128],
+            risk_types=risk_types,
+            max_conf=max_conf,
+            detections=dets,
+        )
+        if risk_types:
+            StreamAlertRisk.objects.bulk_create(
+                [
+                    StreamAlertRisk(alert=alert, risk=r, camera=alert.camera, created_at=alert.created_at)
+                    for r in risk_types
+                ]
+            )
+        bump_rollups(alert.created_at, alert.camera, risk_types)
+        publish_alert_on_commit(alert)
+    maybe_compact_async()
+    return alert
+
+
+def risk_counts(since: Optional[datetime] = None, camera: Optional[str] = None) -> Dict[str, int]:
+    """``{"total": n, "knife": n, ...}`` con todos los códigos (0 si no hay)."""
+    alerts = StreamAlert.objects.all()
+    risks = StreamAlertRisk.objects.all()
+    if since is not None:
+        alerts = alerts.filter(created_at__gte=since)
+        risks = risks.filter(created_at__gte=since)
+    if camera:
+        alerts = alerts.filter(camera=camera)
+        risks = risks.filter(camera=camera)
+    counts = dict.fromkeys(RISK_LABELS, 0)
+    counts.update(risks.values_list("risk").annotate(n=Count("id")).order_by())
+    counts["total"] = alerts.count()
+    return counts
@@ -0,0 +1,245 @@
+"""Exportación en streaming de alertas (CSV, NDJSON y Parquet opcional).
+
+Las filas salen de ``values_list(...).iterator(chunk_size)`` (tuplas, sin
+instanciar modelos) filtradas por los índices de fecha y de riesgo. Se
+escriben con ``csv``/``json`` sobre un buffer que solo se entrega al
+cliente al pasar de ``FLUSH_BYTES``, y opcionalmente se comprimen en
+streaming con gzip (``zlib`` con ``wbits=31``).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+import time
+import zlib
+from datetime import datetime, time as dtime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ..models import StreamAlert, StreamAlertRisk
+from ..risks import RISK_LABELS
+
+try:  # Parquet es opcional (pyarrow no va en requirements)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # pragma: no cover - dependencia opcional
+    pa = None  # type: ignore
+    pq = None  # type: ignore
+
+FIELDS = ("id", "created_at", "camera", "session", "risk_types", "max_conf", "text")
+HEADER = ("id", "timestamp", "camera", "session", "risks", "max_conf", "text")
+CHUNK_ROWS = 2000
+FLUSH_BYTES = 64 * 1024
+
+FORMATS: Dict[str, Tuple[str, str]] = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson; charset=utf-8", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportFilters:
+    def __init__(self, since=None, until=None, risks: Optional[List[str]] = None, camera: str = ""):
+        self.since = since
+        self.until = until
+        self.risks = risks or []
+        self.camera = camera
+
+
+def _parse_bound(value: str, end: bool) -> datetime:
+    dt = parse_datetime(value)
+    if dt is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Fecha inválida: {value!r} (use AAAA-MM-DD o ISO 8601).")
+        # 'to' con solo fecha incluye el día completo
+        dt = datetime.combine(day + timedelta(days=1) if end else day, dtime.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def parse_filters(params) -> ExportFilters:
+    """``from``/``to`` (fecha o ISO), ``risk`` (códigos separados por coma), ``camera``."""
+    since = _parse_bound(params["from"], end=False) if params.get("from") else None
+    until = _parse_bound(params["to"], end=True) if params.get("to") else None
+    risks = [r.strip() for r in (params.get("risk") or "").split(",") if r.strip()]
+    unknown = [r for r in risks if r not in RISK_LABELS]
+    if unknown:
+        raise ValueError(f"Riesgo desconocido: {', '.join(unknown)}.")
+    return ExportFilters(since, until, risks, (params.get("camera") or "").strip())
+
+
+def alert_rows(filters: ExportFilters, chunk_size: int = CHUNK_ROWS) -> Iterator[tuple]:
+    qs = StreamAlert.objects.all()
+    if filters.since is not None:
+        qs = qs.filter(created_at__gte=filters.since)
+    if filters.until is not None:
+        qs = qs.filter(created_at__lt=filters.until)
+    if filters.camera:
+        qs = qs.filter(camera=filters.camera)
+    if filters.risks:
+        # Índice (risk, created_at) de la tabla hija
+        risk_qs = StreamAlertRisk.objects.filter(risk__in=filters.risks)
+        if filters.since is not None:
+            risk_qs = risk_qs.filter(created_at__gte=filters.since)
+        if filters.until is not None:
+            risk_qs = risk_qs.filter(created_at__lt=filters.until)
+        qs = qs.filter(pk__in=risk_qs.values("alert_id"))
+    return qs.order_by("-created_at").values_list(*FIELDS).iterator(chunk_size=chunk_size)
+
+
+def _csv_chunks(rows: Iterable[tuple], tz) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(HEADER)
+    for pk, created, camera, session, risks, max_conf, text in rows:
+        writer.writerow(
+            (
+                pk,
+                created.astimezone(tz).strftime("%Y-%m-%d %H:%M:%S"),
+                camera,
+                session,
+                ";".join(risks or ()),
+                "" if max_conf is None else f"{max_conf:.3f}",
+                text,
+            )
+        )
+        if buf.tell() >= FLUSH_BYTES:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(rows: Iterable[tuple], tz) -> Iterator[bytes]:
+    parts: List[str] = []
+    size = 0
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for pk, created, camera, session, risks, max_conf, text in rows:
+        line = dumps(
+            {
+                "id": pk,
+                "timestamp": created.astimezone(tz).isoformat(),
+                "camera": camera,
+                "session": session,
+                "risks": risks or [],
+                "max_conf": max_conf,
+                "text": text,
+            }
+        )
+        parts.append(line)
+        size += len(line) + 1
+        if size >= FLUSH_BYTES:
+            parts.append("")
+            yield "\n".join(parts).encode("utf-8")
+            parts, size = [], 0
+    if parts:
+        parts.append("")
+        yield "\n".join(parts).encode("utf-8")
+
+
+class _Sink(io.RawIOBase):
+    """File-like de solo escritura que acumula bytes para entregarlos por partes."""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self.parts.append(data)
+        self.pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.pos
+
+    def drain(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _parquet_chunks(rows: Iterable[tuple], tz, group_rows: int = 16 * 1024) -> Iterator[bytes]:
+    """Un row group (columnar) cada ``group_rows`` filas."""
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("timestamp", pa.timestamp("us", tz=str(tz))),
+            ("camera", pa.string()),
+            ("session", pa.string()),
+            ("risks", pa.list_(pa.string())),
+            ("max_conf", pa.float32()),
+            ("text", pa.string()),
+        ]
+    )
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    cols: List[list] = [[] for _ in FIELDS]
+
+    def flush():
+        writer.write_table(pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(cols, schema)], schema=schema))
+        for c in cols:
+            c.clear()
+
+    for row in rows:
+        for col, value in zip(cols, row):
+            col.append(value)
+        if len(cols[0]) >= group_rows:
+            flush()
+            yield sink.drain()
+    if cols[0]:
+        flush()
+    writer.close()
+    yield sink.drain()
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    comp = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.flush()
+
+
+class _Counted:
+    """Cuenta filas al pasar y registra el rendimiento al agotarse."""
+
+    def __init__(self, rows: Iterable[tuple], fmt: str):
+        self.rows = rows
+        self.fmt = fmt
+        self.count = 0
+
+    def __iter__(self):
+        t0 = time.perf_counter()
+        for row in self.rows:
+            self.count += 1
+            yield row
+        dt = time.perf_counter() - t0
+        logging.info(
+            "[export] %s: %d filas en %.2fs (%.0f filas/s)", self.fmt, self.count, dt, self.count / dt if dt > 0 else 0
+        )
+
+
+def available_formats() -> List[str]:
+    return [f for f in FORMATS if f != "parquet" or pq is not None]
+
+
+def export_stream(filters: ExportFilters, fmt: str = "csv", gzip: bool = False) -> Iterator[bytes]:
+    if fmt not in available_formats():
+        raise ValueError(f"Formato no disponible: {fmt!r} (opciones: {', '.join(available_formats())}).")
+    rows = _Counted(alert_rows(filters), fmt)
+    tz = timezone.get_current_timezone()
+    chunks = {"csv": _csv_chunks, "ndjson": _ndjson_chunks, "parquet": _parquet_chunks}[fmt](rows, tz)
+    # Parquet ya va comprimido por columna
+    return _gzip(chunks) if gzip and fmt != "parquet" else chunks
@@ -1,9 +1,12 @@
 ﻿from pathlib import Path
-from typing import Dict, Union, List
+from typing import Dict, Union, List, Tuple
 import os
 
 import cv2
 
+from ..legacy.batch import VOCAB, DetectionBatch, source_id
+from .preload import PRELOAD
+
 FilePath = Union[str, Path]
 
 
@@ -12,13 +15,21 @@ def _ensure_yolo(model_obj):
         if hasattr(model_obj, "predict"):
             return model_obj
         if isinstance(model_obj, dict) and "path" in model_obj:
-            from ultralytics import YOLO  # type: ignore
-            return YOLO(str(model_obj["path"]))
+            # Modelo compartido del proceso (cargado y calentado al arrancar)
+            return PRELOAD.model_at(str(model_obj["path"]))
     except Exception:
         return None
     return None
 
 
+def infer_frame_size(w: int, h: int) -> Tuple[int, int]:
+    """Tamaño al que ``run_inference`` reduce un frame de ``w x h`` (ancho máximo ``INFER_IMG_W``)."""
+    w_limit = int(os.getenv("INFER_IMG_W", "416"))
+    if w > w_limit:
+        return w_limit, int(h * (w_limit / w))
+    return w, h
+
+
 def run_inference(file_path: FilePath, models: Dict[str, object]) -> Dict[str, object]:
     """Inferencia con Niñera.pt y yolov8s.pt si están disponibles.
 
@@ -36,16 +47,15 @@ def run_inference(file_path: FilePath, models: Dict[str, object]) -> Dict[str, o
         if ok:
             img = frame
     if img is None:
-        return {"output_path": str(resolved_path), "detections": [], "models_used": []}
+        return {"output_path": str(resolved_path), "detections": [], "models_used": [], "frame_size": None}
 
     h, w = img.shape[:2]
-    w_limit = int(os.getenv("INFER_IMG_W", "416"))
-    if w > w_limit:
-        new_h = int(h * (w_limit / w))
-        img = cv2.resize(img, (w_limit, new_h))
+    size = infer_frame_size(w, h)
+    if size != (w, h):
+        img = cv2.resize(img, size)
 
     used: List[str] = []
-    detections: List[dict] = []
+    batches: List[DetectionBatch] = []
 
     for key in ("primary", "detector"):
         yolo = _ensure_yolo(models.get(key))
@@ -53,23 +63,22 @@ def run_inference(file_path: FilePath, models: Dict[str, object]) -> Dict[str, o
             continue
         try:
             used.append(key)
-            res = yolo.predict(
-                source=img,
-                imgsz=640,
-                conf=0.35 if key == "primary" else 0.25,
-                iou=0.45,
-                device="cpu",
-                verbose=False,
-            )
-            if res and res[0].boxes is not None:
-                names = getattr(yolo, "names", {})
-                for b in res[0].boxes:
-                    xyxy = b.xyxy.cpu().numpy().astype(int)[0].tolist()
-                    conf = float(b.conf.item())
-                    cls = int(b.cls.item())
-                    label = str(names.get(cls, key)).lower()
-                    detections.append({"label": label, "conf": conf, "box": xyxy, "src": key})
+            with PRELOAD.lock_for(yolo):
+                res = yolo.predict(
+                    source=img,
+                    imgsz=640,
+                    conf=0.35 if key == "primary" else 0.25,
+                    iou=0.45,
+                    device="cpu",
+                    verbose=False,
+                )
+            if res:
+                lut = VOCAB.lut_for(getattr(yolo, "names", {}) or {})
+                batches.append(DetectionBatch.from_yolo(res[0], lut, source_id(key)))
         except Exception:
             continue
 
-    return {"output_path": str(resolved_path), "detections": detections, "models_used": used}
+    detections = DetectionBatch.concat(batches).to_items()
+    # Tamaño del frame analizado: las cajas están en estas coordenadas
+    frame_size = [int(img.shape[1]), int(img.shape[0])]
+    return {"output_path": str(resolved_path), "detections": detections, "models_used": used, "frame_size": frame_size}
@@ -0,0 +1,86 @@
+"""Eventos en vivo para los dashboards abiertos (grupo ``DASHBOARD_GROUP``).
+
+Los productores publican una sola vez al channel layer (Redis o en
+memoria) y cada ``DashboardConsumer`` suscrito reenvía el evento a su
+navegador sin tocar la BD. Tipos de evento:
+
+- ``alert``: la alerta ya guardada más los incrementos de métricas
+  (``{"total": 1, "<riesgo>": 1}``), que el dashboard suma a sus contadores.
+- ``camera``: estado de una cámara (``online``/``offline`` en web,
+  ``ok``/``stale``/``down`` en el daemon).
+
+Publicar nunca debe romper al productor: los errores solo se registran.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+DASHBOARD_GROUP = "dashboard"
+
+
+def alert_event(alert) -> dict:
+    deltas = {"total": 1}
+    for risk in alert.risk_types or ():
+        deltas[risk] = 1
+    return {
+        "kind": "alert",
+        "alert": {
+            "id": alert.pk,
+            "created_at": timezone.localtime(alert.created_at).isoformat(),
+            "camera": alert.camera,
+            "risks": list(alert.risk_types or ()),
+            "risk_display": alert.risk_display,
+            "max_conf": alert.max_conf,
+            "text": alert.text,
+        },
+        "deltas": deltas,
+    }
+
+
+def camera_event(camera: str, status: str, **extra) -> dict:
+    return {"kind": "camera", "camera": camera, "status": status, "at": timezone.localtime().isoformat(), **extra}
+
+
+def _message(event: dict) -> dict:
+    return {"type": "dashboard.event", "event": event}
+
+
+def publish(event: dict) -> None:
+    """Envío síncrono (hilos, comandos, ``database_sync_to_async``)."""
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        layer = get_channel_layer()
+        if layer is not None:
+            async_to_sync(layer.group_send)(DASHBOARD_GROUP, _message(event))
+    except Exception:
+        logging.exception("[live] no se pudo publicar %s", event.get("kind"))
+
+
+async def apublish(event: dict, layer=None) -> None:
+    """Envío desde código async (consumers), sin saltar de hilo."""
+    try:
+        if layer is None:
+            from channels.layers import get_channel_layer
+
+            layer = get_channel_layer()
+        if layer is not None:
+            await layer.group_send(DASHBOARD_GROUP, _message(event))
+    except Exception:
+        logging.exception("[live] no se pudo publicar %s", event.get("kind"))
+
+
+def publish_alert_on_commit(alert) -> None:
+    """Publica la alerta cuando su transacción confirma (nunca una alerta revertida)."""
+    event = alert_event(alert)
+    transaction.on_commit(lambda: publish(event))
+
+
+def publish_camera(camera: str, status: str, name: Optional[str] = None, **extra) -> None:
+    publish(camera_event(camera, status, name=name or camera, **extra))
@@ -0,0 +1,110 @@
+"""Referencias y expulsión de los blobs de subidas (``MediaBlob``).
+
+``InferenceResult`` suma una referencia al crearse y la resta al
+borrarse (también en borrados masivos, que envían ``post_delete`` por
+fila). Un blob sin referencias queda en disco como cache: si vuelve a
+subirse el mismo archivo no se escribe de nuevo. Cuando el total supera
+``MEDIA_BLOB_BUDGET_MB`` se borran los huérfanos menos usados
+recientemente; los referenciados nunca se expulsan.
+
+Para no carrerear con una subida del mismo contenido, el archivo se
+aparta (rename) antes de borrar la fila y solo se elimina si la fila
+seguía huérfana y sin uso reciente; si no, vuelve a su sitio.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from ..models import InferenceResult, MediaBlob
+from ..storage import BLOB_PREFIX
+
+
+def _blob_name(instance) -> str:
+    name = instance.input_file.name if instance.input_file else ""
+    return name if name.startswith(BLOB_PREFIX) else ""
+
+
+def on_result_saved(sender, instance, created, **kwargs) -> None:
+    name = _blob_name(instance)
+    if created and name:
+        MediaBlob.objects.filter(name=name).update(refcount=F("refcount") + 1, last_used_at=timezone.now())
+        evict_blobs()
+
+
+def on_result_deleted(sender, instance, **kwargs) -> None:
+    name = _blob_name(instance)
+    if name:
+        MediaBlob.objects.filter(name=name).update(refcount=Greatest(F("refcount") - 1, 0))
+
+
+def connect_signals() -> None:
+    from django.db.models.signals import post_delete, post_save
+
+    post_save.connect(on_result_saved, sender=InferenceResult, dispatch_uid="deteccion.media.saved")
+    post_delete.connect(on_result_deleted, sender=InferenceResult, dispatch_uid="deteccion.media.deleted")
+
+
+def _park(path: str) -> Optional[str]:
+    """Aparta el archivo de un blob que se va a expulsar; ``None`` si ya no estaba."""
+    parked = path + ".evicting"
+    try:
+        os.replace(path, parked)
+    except FileNotFoundError:
+        return None
+    return parked
+
+
+def evict_blobs(budget_bytes: Optional[int] = None, grace_sec: Optional[float] = None) -> int:
+    """Expulsa huérfanos (LRU) hasta quedar bajo el presupuesto; devuelve cuántos."""
+    if budget_bytes is None:
+        if settings.MEDIA_BLOB_BUDGET_MB <= 0:
+            return 0
+        budget_bytes = settings.MEDIA_BLOB_BUDGET_MB * 1024 * 1024
+    grace = settings.MEDIA_BLOB_GRACE_SEC if grace_sec is None else grace_sec
+    total = MediaBlob.objects.aggregate(s=Sum("size"))["s"] or 0
+    if total <= budget_bytes:
+        return 0
+
+    from ..storage import upload_storage
+
+    storage = upload_storage()
+    # Margen: los recién guardados aún no tienen su fila InferenceResult
+    cutoff = timezone.now() - timedelta(seconds=grace)
+    candidates = MediaBlob.objects.filter(refcount=0, last_used_at__lt=cutoff).order_by("last_used_at")
+    evicted = 0
+    for blob in candidates.iterator():
+        if total <= budget_bytes:
+            break
+        path = storage.path(blob.name)
+        try:
+            parked = _park(path)
+        except OSError as e:
+            logging.warning("[media] no se pudo apartar %s: %s", blob.name, e)
+            continue
+        # Se borra la fila solo si sigue huérfana y nadie la usó mientras tanto
+        if not MediaBlob.objects.filter(pk=blob.pk, refcount=0, last_used_at__lt=cutoff).delete()[0]:
+            if parked is not None:
+                # Reclamada por otra subida: mismo contenido, reponerlo es inocuo
+                os.replace(parked, path)
+            continue
+        if parked is not None:
+            try:
+                os.remove(parked)
+            except OSError as e:
+                logging.warning("[media] no se pudo borrar %s: %s", blob.name, e)
+        total -= blob.size
+        evicted += 1
+    if total > budget_bytes:
+        logging.warning("[media] %d MB referenciados superan el presupuesto", total // (1024 * 1024))
+    elif evicted:
+        logging.info("[media] %d blobs huérfanos expulsados", evicted)
+    return evicted
@@ -0,0 +1,237 @@
+"""Carga del stack de inferencia en segundo plano.
+
+Importar ``ultralytics`` (y con él torch) y leer los pesos tarda varios
+segundos; antes ocurría al importar ``consumers_ws`` desde ``asgi.py`` y
+el servidor no respondía HTTP (ni health checks) hasta terminar. Ahora
+``asgi.py`` arranca un hilo que importa YOLO, carga los modelos del
+stream y corre una predicción en vacío para calentarlos. Mientras tanto
+``ws/stream`` acepta conexiones pero contesta ``loading`` a cada frame.
+
+Sólo los modelos que el entorno activa para el stream (``USE_PRIMARY``,
+``USE_COCO``, ``CASCADE``) son obligatorios: cada uno se calienta al
+tamaño con que se usa (``STREAM_IMG_W``, ``CASCADE_GATE_IMGSZ``) y
+``/readyz`` responde 200 recién cuando están listos. Los de
+``run_inference`` se calientan después, sin bloquear, y se informan
+aparte en ``status()["inference"]``. Si un modelo obligatorio no carga o
+no se calienta, la carga queda en ``FAILED`` pero vuelve a intentarse en
+el siguiente ``start()`` pasado un backoff (de ``RETRY_MIN_SEC`` a
+``RETRY_MAX_SEC``).
+
+Los modelos quedan compartidos por proceso. El predictor de ultralytics
+no es thread-safe, así que cada modelo tiene su lock (``lock_for``).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+IDLE, LOADING, READY, FAILED = "idle", "loading", "ready", "failed"
+RETRY_MIN_SEC = 5.0
+RETRY_MAX_SEC = 300.0
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in {"1", "true", "yes"}
+
+
+def stream_model_files() -> Dict[str, Optional[str]]:
+    """Pesos que usa ``ws/stream`` según el entorno (``None`` = desactivado)."""
+    return {
+        "primary": os.getenv("PRIMARY_MODEL_FILE", "NineraV.pt") if _flag("USE_PRIMARY", "1") else None,
+        "coco": os.getenv("COCO_MODEL_FILE", "yolov8n.pt") if _flag("USE_COCO", "0") else None,
+        "gate": os.getenv("CASCADE_GATE_MODEL_FILE", "yolov8n.pt") if _flag("CASCADE", "0") else None,
+    }
+
+
+def warmup_plan() -> List[Tuple[str, int, int]]:
+    """``(archivo, ancho del frame, imgsz)`` de los modelos que el stream tiene activos."""
+    stream_w = int(os.getenv("STREAM_IMG_W", "416"))
+    gate_imgsz = int(os.getenv("CASCADE_GATE_IMGSZ", "256"))
+    stream = stream_model_files()
+    plan = [(stream[k], stream_w, stream_w) for k in ("primary", "coco") if stream[k]]
+    if stream["gate"]:
+        plan.append((stream["gate"], stream_w, gate_imgsz))
+    return list(dict.fromkeys(plan))
+
+
+def inference_plan() -> List[Tuple[str, int, int]]:
+    """Lo mismo para ``run_inference``: no es obligatorio para estar listo."""
+    from .model_loader import MODEL_FILENAMES
+
+    infer_w = int(os.getenv("INFER_IMG_W", "416"))
+    # run_inference redimensiona a INFER_IMG_W y predice con imgsz=640
+    plan = [(name, infer_w, 640) for name in MODEL_FILENAMES.values()]
+    return [p for p in dict.fromkeys(plan) if p not in warmup_plan()]
+
+
+def yolo_class():
+    """Clase ``YOLO`` importada al primer uso, o ``None`` si no está instalada."""
+    try:
+        from ultralytics import YOLO  # type: ignore
+    except Exception:  # pragma: no cover - dependencia pesada
+        return None
+    return YOLO
+
+
+class Preloader:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._models: Dict[str, object] = {}
+        self._locks: Dict[int, threading.Lock] = {}
+        self.warmed: List[str] = []
+        self.inference: Dict[str, str] = {}
+        self.state = IDLE
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.attempts = 0
+        self.retry_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    @property
+    def done(self) -> bool:
+        """Terminó (bien o mal): el stream deja de esperar y sigue como pueda."""
+        return self._done.is_set()
+
+    def start(self) -> bool:
+        """Lanza la carga; ``False`` si ya corre, ya terminó bien o el backoff no venció.
+
+        Tras un ``FAILED`` se puede relanzar: los modelos ya cargados se
+        reutilizan y sólo se reintenta lo que faltó.
+        """
+        with self._lock:
+            if self.state in (LOADING, READY):
+                return False
+            if self.state == FAILED and time.monotonic() < (self.retry_at or 0.0):
+                return False
+            self.state = LOADING
+            self.attempts += 1
+            self.warmed = []
+            self.started_at = time.monotonic()
+            self._done.clear()
+            self._thread = threading.Thread(target=self._run, name="preload", daemon=True)
+            self._thread.start()
+            return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._done.wait(timeout)
+        return self.ready
+
+    def _run(self) -> None:
+        try:
+            if yolo_class() is None:
+                raise RuntimeError("ultralytics no está instalado")
+            missing, cold = [], []
+            for name, width, imgsz in warmup_plan():
+                model = self.model(name)
+                if model is None:
+                    missing.append(name)
+                elif self._warm(model, width, imgsz):
+                    self.warmed.append(f"{name}@{imgsz}")
+                else:
+                    cold.append(f"{name}@{imgsz}")
+            if missing:
+                raise RuntimeError(f"no se pudieron cargar {missing}")
+            if cold:
+                raise RuntimeError(f"falló el calentamiento de {cold}")
+            self.error = None
+            self.retry_at = None
+            self.state = READY
+        except Exception as e:
+            delay = min(RETRY_MIN_SEC * 2 ** (self.attempts - 1), RETRY_MAX_SEC)
+            self.error = str(e)
+            self.retry_at = time.monotonic() + delay
+            self.state = FAILED
+            logging.warning("[preload] stack de inferencia no disponible (reintento en %.0fs): %s", delay, e)
+        finally:
+            self.seconds = time.monotonic() - (self.started_at or time.monotonic())
+            self._done.set()
+        if self.ready:
+            logging.info("[preload] %d modelos listos en %.1fs", len(self._models), self.seconds)
+            self._warm_inference()
+
+    def _warm_inference(self) -> None:
+        # Ya está listo: un fallo aquí sólo se informa; run_inference reintenta la carga al usarse
+        for name, width, imgsz in inference_plan():
+            key = f"{name}@{imgsz}"
+            if self.inference.get(key) == "ok":
+                continue
+            model = self.model(name)
+            if model is None:
+                self.inference[key] = "missing"
+            else:
+                self.inference[key] = "ok" if self._warm(model, width, imgsz) else "cold"
+
+    def _warm(self, model, width: int, imgsz: int) -> bool:
+        # La primera predicción fusiona capas y reserva buffers; mejor aquí que en el primer frame
+        import numpy as np
+
+        blank = np.zeros((width * 9 // 16, width, 3), dtype=np.uint8)
+        try:
+            with self.lock_for(model):
+                model.predict(source=blank, imgsz=imgsz, device="cpu", verbose=False)
+        except Exception:
+            logging.exception("[preload] falló el calentamiento")
+            return False
+        return True
+
+    def model(self, filename: str):
+        """Modelo compartido para ``filename`` (cargado una vez), o ``None``."""
+        from ml_models import get_model_path
+
+        return self.model_at(str(get_model_path(filename)))
+
+    def model_at(self, path: str):
+        """Como ``model`` pero con la ruta ya resuelta."""
+        with self._lock:
+            if path in self._models:
+                return self._models[path]
+        YOLO = yolo_class()
+        if YOLO is None:
+            return None
+        try:
+            model = YOLO(path)
+        except Exception:
+            logging.exception("[preload] no se pudo cargar %s", path)
+            return None
+        with self._lock:
+            model = self._models.setdefault(path, model)
+        logging.info("[preload] modelo %s cargado", os.path.basename(path))
+        return model
+
+    def lock_for(self, model) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(id(model), threading.Lock())
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "seconds": None if self.seconds is None else round(self.seconds, 2),
+            "models": sorted(os.path.basename(p) for p in self._models),
+            "warmed": list(self.warmed),
+            "attempts": self.attempts,
+            "retry_in": None if self.retry_at is None else max(0.0, round(self.retry_at - time.monotonic(), 1)),
+            "inference": dict(self.inference),
+        }
+
+
+PRELOAD = Preloader()
+
+
+def start_preload() -> bool:
+    """Arranca la carga en segundo plano si ``PRELOAD_MODELS`` está activo."""
+    if not settings.PRELOAD_MODELS:
+        return False
+    return PRELOAD.start()
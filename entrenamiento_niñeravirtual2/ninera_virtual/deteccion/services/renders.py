@@ -0,0 +1,144 @@
+"""Imagen anotada de cada ``InferenceResult``, generada una sola vez.
+
+Para imágenes se dibujan las cajas sobre el archivo original (escalado a
+``RENDER_MAX_W``); para videos se arma una hoja de contactos con
+``RENDER_SHEET_FRAMES`` frames repartidos en el video, con las
+detecciones sobre el primero (el que analiza ``run_inference``). El JPEG
+queda en ``annotated_file`` y la vista lo sirve con ETag y cache larga:
+volver a ver un resultado no gasta CPU.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import cv2
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .inference import infer_frame_size
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp"}
+COLORS = {"custom": (178, 227, 32), "coco": (11, 158, 245)}  # BGR, como el overlay del dashboard
+DEFAULT_COLOR = (240, 240, 240)
+
+
+def draw_detections(img: np.ndarray, detections: Sequence[dict], sx: float = 1.0, sy: float = 1.0) -> np.ndarray:
+    thickness = max(1, round(img.shape[1] / 320))
+    for d in detections:
+        box = d.get("box")
+        if not box:
+            continue
+        x1, y1, x2, y2 = (int(round(v * s)) for v, s in zip(box, (sx, sy, sx, sy)))
+        color = COLORS.get(d.get("src"), DEFAULT_COLOR)
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, thickness, cv2.LINE_AA)
+        label = f"{d.get('label', '')} {float(d.get('conf', 0.0)):.2f}"
+        (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1)
+        ty = max(y1, th + 4)
+        cv2.rectangle(img, (x1, ty - th - 4), (x1 + tw + 4, ty), color, -1)
+        cv2.putText(img, label, (x1 + 2, ty - 3), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (20, 20, 20), 1, cv2.LINE_AA)
+    return img
+
+
+def _fit_width(img: np.ndarray, max_w: int) -> np.ndarray:
+    h, w = img.shape[:2]
+    if w <= max_w:
+        return img
+    return cv2.resize(img, (max_w, int(h * max_w / w)), interpolation=cv2.INTER_AREA)
+
+
+def _scale(frame_size: Optional[Sequence[int]], img: np.ndarray, original: np.ndarray):
+    """Factor de las cajas (coordenadas del frame inferido) al tamaño de ``img``.
+
+    Los resultados anteriores a ``frame_size`` no lo guardan: sus cajas están
+    en el frame original reducido por ``run_inference``, que se recalcula.
+    """
+    if frame_size:
+        fw, fh = frame_size
+    else:
+        fw, fh = infer_frame_size(original.shape[1], original.shape[0])
+    return img.shape[1] / max(1, fw), img.shape[0] / max(1, fh)
+
+
+def render_image(path: Path, detections: Sequence[dict], frame_size=None) -> Optional[np.ndarray]:
+    original = cv2.imread(str(path))
+    if original is None:
+        return None
+    img = _fit_width(original, settings.RENDER_MAX_W)
+    return draw_detections(img, detections, *_scale(frame_size, img, original))
+
+
+def _sample_frames(path: Path, count: int):
+    cap = cv2.VideoCapture(str(path))
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        indices = [0] if total <= 1 else sorted({round(i * (total - 1) / max(1, count - 1)) for i in range(count)})
+        frames = []
+        for idx in indices:
+            if idx:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            ok, frame = cap.read()
+            if ok:
+                frames.append((idx / fps if fps > 0 else None, frame))
+        return frames
+    finally:
+        cap.release()
+
+
+def contact_sheet(path: Path, detections: Sequence[dict], frame_size=None) -> Optional[np.ndarray]:
+    frames = _sample_frames(path, max(1, settings.RENDER_SHEET_FRAMES))
+    if not frames:
+        return None
+    tile_w = settings.RENDER_TILE_W
+    tiles: List[np.ndarray] = []
+    for i, (ts, frame) in enumerate(frames):
+        tile = _fit_width(frame, tile_w)
+        if tile.shape[1] < tile_w:
+            tile = cv2.resize(tile, (tile_w, int(tile.shape[0] * tile_w / tile.shape[1])))
+        if i == 0:
+            draw_detections(tile, detections, *_scale(frame_size, tile, frame))
+        caption = f"{ts:.1f}s" if ts is not None else f"#{i + 1}"
+        cv2.putText(tile, caption, (6, 16), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 0), 3, cv2.LINE_AA)
+        cv2.putText(tile, caption, (6, 16), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1, cv2.LINE_AA)
+        tiles.append(tile)
+    tile_h = max(t.shape[0] for t in tiles)
+    cols = math.ceil(math.sqrt(len(tiles)))
+    rows = math.ceil(len(tiles) / cols)
+    sheet = np.zeros((rows * tile_h, cols * tile_w, 3), dtype=np.uint8)
+    for i, tile in enumerate(tiles):
+        r, c = divmod(i, cols)
+        sheet[r * tile_h : r * tile_h + tile.shape[0], c * tile_w : (c + 1) * tile_w] = tile
+    return sheet
+
+
+def render_result(result) -> bool:
+    """Genera y guarda ``annotated_file`` si falta; ``True`` si hay render disponible."""
+    if result.annotated_file:
+        return True
+    payload = result.output_data or {}
+    if payload.get("error") or not result.input_file:
+        return False
+    try:
+        path = Path(result.input_file.path)
+        detections = payload.get("detections") or []
+        frame_size = payload.get("frame_size")
+        if path.suffix.lower() in IMAGE_EXTS:
+            img = render_image(path, detections, frame_size)
+        else:
+            img = contact_sheet(path, detections, frame_size)
+        if img is None:
+            return False
+        ok, buf = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), settings.RENDER_JPEG_QUALITY])
+        if not ok:
+            return False
+        result.annotated_file.save(f"{result.pk}.jpg", ContentFile(buf.tobytes()), save=False)
+        result.save(update_fields=["annotated_file"])
+        return True
+    except Exception:
+        logging.exception("[renders] no se pudo generar el render de %s", result.pk)
+        return False
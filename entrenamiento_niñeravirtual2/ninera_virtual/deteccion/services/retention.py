@@ -0,0 +1,188 @@
+"""Retención por antigüedad de alertas, subidas y capturas.
+
+Cada política borra por lotes de ``RETENTION_CHUNK`` filas (una
+transacción corta por lote, con una pausa entre lotes) para no tener
+bloqueada la base SQLite mientras el consumer sigue insertando. Los
+archivos asociados se borran después del commit. Si
+``RETENTION_ARCHIVE_DIR`` está definido, las filas de cada lote se leen
+dentro de su transacción y se guardan, ya confirmado el borrado, en
+``<dir>/<tabla>/AAAA-MM-DD.ndjson.gz`` (un miembro gzip por lote, el
+archivo sigue siendo un gzip válido); un lote que falla no deja filas
+archivadas que sigan en la base.
+
+Los directorios de capturas y clips marcados por un escritor vivo
+(``legacy.snapshots.DirectoryClaim``) se saltan: el escritor aplica su
+propia retención sobre su índice en memoria, con la misma antigüedad
+(``ALERT_IMG_MAX_AGE_DAYS``/``CLIP_MAX_AGE_DAYS`` toman por defecto
+``RETENTION_SNAPSHOT_DAYS``) y también mientras no recibe alertas.
+
+Los acumulados de ``AlertRollup`` no se tocan: las métricas históricas
+sobreviven al borrado de las alertas crudas. Las subidas deduplicadas
+(``MediaBlob``) solo pierden una referencia; sus archivos los expulsa
+``services.media`` según el presupuesto de disco.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from ..models import InferenceResult, StreamAlert, StreamAlertRisk
+from .media import evict_blobs
+
+ALERT_FIELDS = ("id", "created_at", "camera", "session", "risk_types", "max_conf", "detections", "text")
+UPLOAD_FIELDS = ("id", "uploaded_at", "status", "notes", "input_file", "annotated_file", "output_data")
+SNAPSHOT_EXTS = (".jpg", ".jpeg", ".png", ".mp4")
+
+
+def _archive(table: str, rows: Iterable[dict], date_field: str, archive_dir: str) -> None:
+    by_day: Dict[str, List[str]] = defaultdict(list)
+    for row in rows:
+        day = timezone.localtime(row[date_field]).date().isoformat()
+        by_day[day].append(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+    folder = os.path.join(archive_dir, table)
+    os.makedirs(folder, exist_ok=True)
+    for day, lines in by_day.items():
+        with gzip.open(os.path.join(folder, f"{day}.ndjson.gz"), "ab") as fh:
+            fh.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def prune_alerts(cutoff: datetime, chunk: int, archive_dir: str = "", pause: float = 0.05) -> int:
+    removed = 0
+    while True:
+        ids = list(
+            StreamAlert.objects.filter(created_at__lt=cutoff).order_by("pk").values_list("pk", flat=True)[:chunk]
+        )
+        if not ids:
+            return removed
+        with transaction.atomic():
+            rows = list(StreamAlert.objects.filter(pk__in=ids).values(*ALERT_FIELDS)) if archive_dir else []
+            StreamAlertRisk.objects.filter(alert_id__in=ids).delete()
+            StreamAlert.objects.filter(pk__in=ids).delete()
+        if rows:
+            _archive("stream_alerts", rows, "created_at", archive_dir)
+        removed += len(ids)
+        time.sleep(pause)
+
+
+def prune_uploads(cutoff: datetime, chunk: int, archive_dir: str = "", pause: float = 0.05) -> int:
+    storages = {f: InferenceResult._meta.get_field(f).storage for f in ("input_file", "annotated_file")}
+    removed = 0
+    while True:
+        rows = list(
+            InferenceResult.objects.filter(uploaded_at__lt=cutoff).order_by("pk").values(*UPLOAD_FIELDS)[:chunk]
+        )
+        if not rows:
+            return removed
+        with transaction.atomic():
+            # Borrado por queryset: post_delete por fila descuenta las referencias de MediaBlob
+            InferenceResult.objects.filter(pk__in=[r["id"] for r in rows]).delete()
+        if archive_dir:
+            _archive("inference_results", rows, "uploaded_at", archive_dir)
+        for field, name in ((f, r[f]) for r in rows for f in storages):
+            if not name:
+                continue
+            try:
+                storages[field].delete(name)
+            except Exception as e:
+                logging.warning("[retention] no se pudo borrar %s: %s", name, e)
+        removed += len(rows)
+        time.sleep(pause)
+
+
+def prune_files(directory: str, cutoff: datetime, exts=SNAPSHOT_EXTS) -> int:
+    """Borra archivos de ``directory`` con mtime anterior a ``cutoff``."""
+    from ..legacy.snapshots import is_claimed
+
+    if not os.path.isdir(directory):
+        return 0
+    if is_claimed(directory):
+        logging.info("[retention] %s lo gestiona un escritor activo, se omite", directory)
+        return 0
+    limit = cutoff.timestamp()
+    removed = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not (entry.is_file() and entry.name.lower().endswith(exts)):
+                continue
+            try:
+                if entry.stat().st_mtime < limit:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning("[retention] no se pudo borrar %s: %s", entry.path, e)
+    return removed
+
+
+def snapshot_dirs() -> List[str]:
+    from ..legacy.config import Config
+
+    return [Config.SAVE_IMG_DIR, Config.CLIP_DIR]
+
+
+def run_retention(
+    now: Optional[datetime] = None,
+    alert_days: Optional[int] = None,
+    upload_days: Optional[int] = None,
+    snapshot_days: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+) -> Dict[str, int]:
+    """Aplica todas las políticas; los ``None`` toman el valor de settings."""
+    now = now or timezone.now()
+    chunk = max(1, settings.RETENTION_CHUNK)
+    archive = settings.RETENTION_ARCHIVE_DIR if archive_dir is None else archive_dir
+    alert_days = settings.RETENTION_ALERT_DAYS if alert_days is None else alert_days
+    upload_days = settings.RETENTION_UPLOAD_DAYS if upload_days is None else upload_days
+    snapshot_days = settings.RETENTION_SNAPSHOT_DAYS if snapshot_days is None else snapshot_days
+
+    t0 = time.perf_counter()
+    result = {"alerts": 0, "uploads": 0, "snapshots": 0, "blobs": 0}
+    if alert_days > 0:
+        result["alerts"] = prune_alerts(now - timedelta(days=alert_days), chunk, archive)
+    if upload_days > 0:
+        result["uploads"] = prune_uploads(now - timedelta(days=upload_days), chunk, archive)
+    result["blobs"] = evict_blobs()
+    if snapshot_days > 0:
+        cutoff = now - timedelta(days=snapshot_days)
+        result["snapshots"] = sum(prune_files(d, cutoff) for d in snapshot_dirs())
+    logging.info("[retention] %s en %.2fs", result, time.perf_counter() - t0)
+    return result
+
+
+_thread: Optional[threading.Thread] = None
+
+
+def start_retention_thread() -> bool:
+    """Hilo del servidor que aplica la retención cada ``RETENTION_INTERVAL_SEC``."""
+    global _thread
+    interval = settings.RETENTION_INTERVAL_SEC
+    if interval <= 0 or _thread is not None:
+        return False
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                run_retention()
+            except Exception:
+                logging.exception("[retention] falló la pasada periódica")
+            finally:
+                close_old_connections()
+
+    _thread = threading.Thread(target=loop, name="retention", daemon=True)
+    _thread.start()
+    return True
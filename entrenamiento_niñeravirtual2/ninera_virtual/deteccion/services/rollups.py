@@ -0,0 +1,151 @@
+"""Acumulados de alertas por minuto/hora/día (``AlertRollup``).
+
+Cada alerta suma 1 a su cubeta de minuto, hora y día (total y por cada
+riesgo) dentro de la transacción de ``record_alert``. Un conteo de "hoy",
+"últimos 7 días" o "siempre" se resuelve sumando unas pocas cubetas: los
+minutos del borde inicial, las horas hasta el siguiente día y los días
+completos. Las cubetas finas se compactan (se borran) cuando las más
+gruesas ya cubren ese tramo.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from ..models import AlertRollup
+from ..risks import RISK_LABELS
+
+GRANULARITIES = (AlertRollup.MINUTE, AlertRollup.HOUR, AlertRollup.DAY)
+
+
+def bucket_start(dt: datetime, granularity: str) -> datetime:
+    """Inicio de la cubeta en hora local (los días cortan a medianoche local)."""
+    local = timezone.localtime(dt).replace(second=0, microsecond=0)
+    if granularity in (AlertRollup.HOUR, AlertRollup.DAY):
+        local = local.replace(minute=0)
+    if granularity == AlertRollup.DAY:
+        local = local.replace(hour=0)
+    return local
+
+
+def _ceil(dt: datetime, granularity: str) -> datetime:
+    start = bucket_start(dt, granularity)
+    if start == dt:
+        return start
+    step = timedelta(hours=1) if granularity == AlertRollup.HOUR else timedelta(days=1)
+    return bucket_start(start + step, granularity)
+
+
+def _bump(granularity: str, bucket: datetime, camera: str, risk: str) -> None:
+    key = {"granularity": granularity, "bucket": bucket, "camera": camera, "risk": risk}
+    if AlertRollup.objects.filter(**key).update(count=F("count") + 1):
+        return
+    try:
+        with transaction.atomic():
+            AlertRollup.objects.create(count=1, **key)
+    except IntegrityError:
+        # Otro proceso creó la cubeta entre el UPDATE y el INSERT
+        AlertRollup.objects.filter(**key).update(count=F("count") + 1)
+
+
+def bump_rollups(created_at: datetime, camera: str, risks: Iterable[str]) -> None:
+    """Suma una alerta; llamar dentro de la transacción que la inserta."""
+    keys = [""] + list(risks)
+    for gran in GRANULARITIES:
+        bucket = bucket_start(created_at, gran)
+        for risk in keys:
+            _bump(gran, bucket, camera, risk)
+
+
+def _coverage(since: datetime, now: datetime) -> Q:
+    """Cubetas que suman [since, ahora] usando la granularidad más gruesa posible."""
+    minute_floor = now - timedelta(hours=settings.ALERT_ROLLUP_MINUTE_HOURS)
+    hour_floor = now - timedelta(days=settings.ALERT_ROLLUP_HOUR_DAYS)
+    q = Q()
+    hour_from = _ceil(since, AlertRollup.HOUR)
+    if since >= minute_floor:
+        q |= Q(granularity=AlertRollup.MINUTE, bucket__gte=bucket_start(since, AlertRollup.MINUTE), bucket__lt=hour_from)
+    else:
+        # Minutos ya compactados: se toma la hora completa del borde
+        hour_from = bucket_start(since, AlertRollup.HOUR)
+    day_from = _ceil(hour_from, AlertRollup.DAY)
+    if hour_from < hour_floor:
+        day_from = bucket_start(hour_from, AlertRollup.DAY)
+    else:
+        q |= Q(granularity=AlertRollup.HOUR, bucket__gte=hour_from, bucket__lt=day_from)
+    q |= Q(granularity=AlertRollup.DAY, bucket__gte=day_from)
+    return q
+
+
+def rollup_counts(since: Optional[datetime] = None, camera: Optional[str] = None) -> Dict[str, int]:
+    """``{"total": n, "knife": n, ...}`` desde ``since`` (o siempre) hasta ahora."""
+    if since is None:
+        qs = AlertRollup.objects.filter(granularity=AlertRollup.DAY)
+    else:
+        qs = AlertRollup.objects.filter(_coverage(since, timezone.now()))
+    if camera:
+        qs = qs.filter(camera=camera)
+    counts = dict.fromkeys(RISK_LABELS, 0)
+    counts["total"] = 0
+    for risk, n in qs.values_list("risk").annotate(n=Sum("count")).order_by():
+        counts[risk or "total"] = n
+    return counts
+
+
+def period_counts(camera: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """Hoy (desde medianoche local), últimos 7 días y siempre."""
+    now = timezone.now()
+    return {
+        "today": rollup_counts(bucket_start(now, AlertRollup.DAY), camera),
+        "week": rollup_counts(now - timedelta(days=7), camera),
+        "all": rollup_counts(None, camera),
+    }
+
+
+def compact_rollups(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Borra minutos/horas que ya cubren las cubetas de hora/día."""
+    now = now or timezone.now()
+    minutes, _ = AlertRollup.objects.filter(
+        granularity=AlertRollup.MINUTE,
+        bucket__lt=bucket_start(now - timedelta(hours=settings.ALERT_ROLLUP_MINUTE_HOURS), AlertRollup.HOUR),
+    ).delete()
+    hours, _ = AlertRollup.objects.filter(
+        granularity=AlertRollup.HOUR,
+        bucket__lt=bucket_start(now - timedelta(days=settings.ALERT_ROLLUP_HOUR_DAYS), AlertRollup.DAY),
+    ).delete()
+    return {"minutes": minutes, "hours": hours}
+
+
+_compact_lock = threading.Lock()
+_compact_at = time.monotonic()
+
+
+def maybe_compact_async() -> None:
+    """Compacta en un hilo aparte como mucho cada ``ALERT_ROLLUP_COMPACT_SEC``."""
+    global _compact_at
+    interval = settings.ALERT_ROLLUP_COMPACT_SEC
+    if interval <= 0 or time.monotonic() - _compact_at < interval:
+        return
+    with _compact_lock:
+        if time.monotonic() - _compact_at < interval:
+            return
+        _compact_at = time.monotonic()
+
+    def run():
+        try:
+            logging.info("[rollups] compactado: %s", compact_rollups())
+        except Exception:
+            logging.exception("[rollups] compactado falló")
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=run, name="rollups-compact", daemon=True).start()
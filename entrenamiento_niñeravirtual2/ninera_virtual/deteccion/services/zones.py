@@ -0,0 +1,158 @@
+"""Zonas de riesgo compiladas en memoria para el streaming web.
+
+Las zonas viven en la BD (modelo ``Zone``) pero el consumer no debe
+consultarla en cada frame: se compilan una vez por cámara a arreglos
+NumPy y se guardan en un cache local del proceso. Cuando alguien edita
+una zona se invalida el cache local y se avisa al resto de procesos a
+través del grupo ``ZONES_GROUP`` del channel layer.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ZONES_GROUP = "zones"
+
+
+@dataclass(frozen=True)
+class CompiledZone:
+    name: str
+    polygon: np.ndarray  # (N, 2) float32, coordenadas normalizadas
+    bbox: Tuple[float, float, float, float]
+
+
+def compile_zone(name: str, points: Iterable[Sequence[float]]) -> CompiledZone:
+    poly = np.asarray(list(points), dtype=np.float32).reshape(-1, 2)
+    if len(poly) < 3:
+        raise ValueError("Una zona necesita al menos 3 puntos.")
+    x_min, y_min = poly.min(axis=0)
+    x_max, y_max = poly.max(axis=0)
+    return CompiledZone(
+        name=str(name),
+        polygon=poly,
+        bbox=(float(x_min), float(y_min), float(x_max), float(y_max)),
+    )
+
+
+def _points_in_polygon(px: np.ndarray, py: np.ndarray, poly: np.ndarray) -> np.ndarray:
+    """Ray casting vectorizado (mismo criterio que ``RiskAnalysisFacade``)."""
+    x1 = poly[:, 0][None, :]
+    y1 = poly[:, 1][None, :]
+    x2 = np.roll(poly[:, 0], -1)[None, :]
+    y2 = np.roll(poly[:, 1], -1)[None, :]
+    px = px[:, None]
+    py = py[:, None]
+    crosses = (y1 > py) != (y2 > py)
+    x_cut = (x2 - x1) * (py - y1) / (y2 - y1 + 1e-9) + x1
+    return np.count_nonzero(crosses & (px < x_cut), axis=1) % 2 == 1
+
+
+def zones_hit(
+    zones: Sequence[CompiledZone],
+    boxes: Sequence[Sequence[float]],
+    frame_w: int,
+    frame_h: int,
+) -> List[str]:
+    """Nombres de las zonas que contienen algún punto de sonda de ``boxes``.
+
+    Las sondas son el centro y las 4 esquinas de cada caja, igual que en
+    el escritorio.
+    """
+    if not zones or not len(boxes) or frame_w <= 0 or frame_h <= 0:
+        return []
+    b = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    b = b / np.array([frame_w, frame_h, frame_w, frame_h], dtype=np.float32)
+    cx = (b[:, 0] + b[:, 2]) / 2
+    cy = (b[:, 1] + b[:, 3]) / 2
+    px = np.concatenate([cx, b[:, 0], b[:, 2], b[:, 2], b[:, 0]])
+    py = np.concatenate([cy, b[:, 1], b[:, 1], b[:, 3], b[:, 3]])
+    hits: List[str] = []
+    for zone in zones:
+        x_min, y_min, x_max, y_max = zone.bbox
+        near = (px >= x_min) & (px <= x_max) & (py >= y_min) & (py <= y_max)
+        if not near.any():
+            continue
+        if _points_in_polygon(px[near], py[near], zone.polygon).any():
+            if zone.name not in hits:
+                hits.append(zone.name)
+    return hits
+
+
+class ZoneCache:
+    """Cache por cámara de zonas compiladas (thread-safe).
+
+    ``load`` lee la BD fuera del lock; cada ``invalidate`` sube una
+    generación (por cámara, o la global si invalida todo) y una carga que
+    empezó antes no guarda su resultado, que ya puede estar viejo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._zones: Dict[str, Tuple[CompiledZone, ...]] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+
+    def _generation(self, camera: str) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(camera, 0)
+
+    def peek(self, camera: str) -> Optional[Tuple[CompiledZone, ...]]:
+        """Zonas en cache o ``None`` si la cámara aún no se ha cargado."""
+        return self._zones.get(camera)
+
+    def load(self, camera: str) -> Tuple[CompiledZone, ...]:
+        """Carga desde la BD (llamar fuera del event loop)."""
+        from ..models import Zone
+
+        with self._lock:
+            generation = self._generation(camera)
+        compiled: List[CompiledZone] = []
+        rows = Zone.objects.filter(camera=camera, active=True).values_list("name", "points")
+        for name, points in rows:
+            try:
+                compiled.append(compile_zone(name, points))
+            except Exception:
+                logging.warning("[zones] zona inválida %s/%s", camera, name)
+        result = tuple(compiled)
+        with self._lock:
+            if self._generation(camera) == generation:
+                self._zones[camera] = result
+        return result
+
+    def get(self, camera: str) -> Tuple[CompiledZone, ...]:
+        cached = self.peek(camera)
+        if cached is None:
+            cached = self.load(camera)
+        return cached
+
+    def invalidate(self, camera: Optional[str] = None) -> None:
+        with self._lock:
+            if camera is None:
+                self._epoch += 1
+                self._zones.clear()
+            else:
+                self._generations[camera] = self._generations.get(camera, 0) + 1
+                self._zones.pop(camera, None)
+
+
+ZONE_CACHE = ZoneCache()
+
+
+def invalidate_zones(camera: Optional[str] = None) -> None:
+    """Invalida el cache local y notifica a los demás procesos."""
+    ZONE_CACHE.invalidate(camera)
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        layer = get_channel_layer()
+        if layer is not None:
+            async_to_sync(layer.group_send)(
+                ZONES_GROUP, {"type": "zones.invalidate", "camera": camera}
+            )
+    except Exception:
+        logging.exception("[zones] no se pudo propagar la invalidación")
@@ -0,0 +1,127 @@
+"""Almacenamiento direccionado por contenido para las subidas.
+
+Cada archivo se guarda una sola vez como ``deteccion/blobs/<ab>/<sha256>.<ext>``
+y se registra en ``MediaBlob``; varias ``InferenceResult`` con el mismo
+contenido apuntan al mismo archivo. El SHA-256 se calcula mientras llega
+la subida (``Hashing*UploadHandler``), así que guardar un duplicado no
+vuelve a leer ni a escribir el archivo. Los conteos de referencias y la
+expulsión LRU de huérfanos viven en ``services.media``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.utils import timezone
+
+BLOB_PREFIX = "deteccion/blobs/"
+CHUNK = 256 * 1024
+
+
+def blob_name(digest: str, ext: str) -> str:
+    return f"{BLOB_PREFIX}{digest[:2]}/{digest}{ext}"
+
+
+class _HashingMixin:
+    """Calcula el SHA-256 de cada chunk recibido y lo deja en ``file.sha256``."""
+
+    def new_file(self, *args, **kwargs):
+        self._sha = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        out = super().receive_data_chunk(raw_data, start)
+        # Si este handler no se quedó con el archivo, el siguiente también hashea
+        if out is None:
+            self._sha.update(raw_data)
+        return out
+
+    def file_complete(self, file_size):
+        f = super().file_complete(file_size)
+        if f is not None:
+            f.sha256 = self._sha.hexdigest()
+        return f
+
+
+class HashingMemoryFileUploadHandler(_HashingMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(_HashingMixin, TemporaryFileUploadHandler):
+    pass
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        ext = os.path.splitext(name)[1].lower()[:10]
+        digest = getattr(content, "sha256", None)
+        spooled = None
+        if digest is None:
+            spooled, digest, size = self._spool(content)
+        else:
+            size = content.size
+
+        blob = MediaBlob.objects.filter(sha256=digest).first()
+        # Si ``evict_blobs`` borró la fila entre la consulta y el update, se reescribe
+        if (
+            blob is not None
+            and self.exists(blob.name)
+            and MediaBlob.objects.filter(pk=blob.pk).update(last_used_at=timezone.now())
+        ):
+            if spooled:
+                os.remove(spooled)
+            return blob.name
+
+        target = blob.name if blob is not None else blob_name(digest, ext)
+        path = self.path(target)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if spooled:
+            # Mismo contenido: si otro proceso ganó la carrera, reemplazar es inocuo
+            os.replace(spooled, path)
+        elif not os.path.exists(path):
+            saved = super()._save(target, content)
+            if saved != target:
+                os.replace(self.path(saved), path)
+        # La fila pudo expulsarse mientras se escribía: se crea o se marca como usada
+        _, created = MediaBlob.objects.get_or_create(sha256=digest, defaults={"name": target, "size": size})
+        if not created:
+            MediaBlob.objects.filter(sha256=digest).update(last_used_at=timezone.now())
+        return target
+
+    def _spool(self, content):
+        """Copia a un temporal junto al destino calculando el hash (para contenido sin ``sha256``)."""
+        folder = self.path(BLOB_PREFIX)
+        os.makedirs(folder, exist_ok=True)
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".part")
+        with os.fdopen(fd, "wb") as out:
+            if hasattr(content, "seek"):
+                content.seek(0)
+            for chunk in content.chunks(CHUNK):
+                sha.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        return tmp, sha.hexdigest(), size
+
+    def delete(self, name):
+        # Los blobs compartidos no se borran aquí: los expulsa ``services.media``
+        if name and name.startswith(BLOB_PREFIX):
+            return
+        super().delete(name)
+
+
+_storage = None
+
+
+def upload_storage() -> ContentAddressedStorage:
+    global _storage
+    if _storage is None:
+        _storage = ContentAddressedStorage()
+    return _storage
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views, web_views
+from . import api_views, health_views, views, web_views
 
 app_name = "deteccion"
 
@@ -10,5 +10,11 @@ urlpatterns = [
     path("register/", web_views.web_register, name="web_register"),
     path("logout/", web_views.web_logout, name="web_logout"),
     path("procesar/", views.upload_view, name="upload"),
+    path("resultados/<int:pk>/render.jpg", views.result_render, name="result_render"),
     path("alerts/export.csv", web_views.export_alerts_csv, name="export_alerts_csv"),
+    path("api/zones/", api_views.zones_collection, name="api_zones"),
+    path("api/zones/<int:pk>/", api_views.zone_detail, name="api_zone_detail"),
+    path("api/metrics/", api_views.alert_metrics, name="api_metrics"),
+    path("healthz", health_views.healthz, name="healthz"),
+    path("readyz", health_views.readyz, name="readyz"),
 ]
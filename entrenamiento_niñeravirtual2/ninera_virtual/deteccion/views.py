@@ -1,9 +1,11 @@
-from django.http import HttpRequest, HttpResponse
-from django.shortcuts import redirect, render
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.http import quote_etag
 
 from .forms import UploadForm
 from .models import InferenceResult
 from .services import get_models, run_inference
+from .services.renders import render_result
 from .web_views import get_logged_user
 
 
@@ -36,6 +38,8 @@ def upload_view(request: HttpRequest) -> HttpResponse:
             context["model_error"] = str(exc)
 
         inference.save(update_fields=["output_data", "status"])
+        if inference.status == InferenceResult.STATUS_PROCESSED:
+            render_result(inference)
         payload_data = inference.output_data or {}
         context.update(
             {
@@ -48,3 +52,27 @@ def upload_view(request: HttpRequest) -> HttpResponse:
         return render(request, "deteccion/resultado.html", context)
 
     return redirect("deteccion:web_dashboard")
+
+
+def result_render(request: HttpRequest, pk: int) -> HttpResponse:
+    """Imagen anotada del resultado; se genera la primera vez y luego se sirve cacheada.
+
+    El nombre del archivo no se reutiliza (un render nuevo recibe otro
+    nombre), así que sirve de ETag y el contenido puede cachearse como
+    inmutable en el navegador.
+    """
+    if not get_logged_user(request):
+        return redirect("deteccion:web_login")
+    result = get_object_or_404(InferenceResult, pk=pk)
+    if not render_result(result):
+        raise Http404("Sin render para este resultado.")
+
+    etag = quote_etag(result.annotated_file.name)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(result.annotated_file.open("rb"), content_type="image/jpeg")
+    for key, value in headers.items():
+        response[key] = value
+    return response
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Dict, List
 
 from django.contrib import messages
@@ -11,7 +11,10 @@ from django.http import StreamingHttpResponse
 
 from .forms import UploadForm, WebLoginForm, WebRegisterForm
 from .legacy.config import DatabaseConnection, UserRepository
+from .legacy.passwords import HasherBusy
 from .models import InferenceResult, StreamAlert
+from .services.export import FORMATS, export_stream, parse_filters
+from .services.rollups import rollup_counts
 
 
 SESSION_KEY = "legacy_user"
@@ -48,7 +51,11 @@ def web_login(request: HttpRequest) -> HttpResponse:
     form = WebLoginForm(request.POST or None)
     if request.method == "POST" and form.is_valid():
         repo = _get_user_repo()
-        user = repo.verify_credentials(form.cleaned_data["email"], form.cleaned_data["password"])
+        try:
+            user = repo.verify_credentials(form.cleaned_data["email"], form.cleaned_data["password"])
+        except HasherBusy:
+            messages.error(request, "Hay demasiados inicios de sesión en curso. Intenta de nuevo en unos segundos.")
+            return render(request, "auth/login.html", {"form": form}, status=429)
         if user:
             _login_user(request, user)
             messages.success(request, f"¡Bienvenido {user['name']}! Has iniciado sesión correctamente.")
@@ -70,6 +77,9 @@ def web_register(request: HttpRequest) -> HttpResponse:
                 form.cleaned_data["email"],
                 form.cleaned_data["password"],
             )
+        except HasherBusy:
+            messages.error(request, "El servidor está ocupado. Intenta de nuevo en unos segundos.")
+            return render(request, "auth/register.html", {"form": form}, status=429)
         except Exception as exc:
             messages.error(request, f"No se pudo crear la cuenta: {exc}")
         else:
@@ -85,16 +95,25 @@ def web_logout(request: HttpRequest) -> HttpResponse:
 
 
 def export_alerts_csv(request: HttpRequest) -> HttpResponse:
-    """Exporta alertas de streaming a CSV sin bloquear (streaming)."""
-    def rows():
-        yield "timestamp,alerta\n"
-        for a in StreamAlert.objects.order_by("-created_at").iterator():
-            # Escapar comas y saltos de línea simples
-            text = (a.text or "").replace("\n", " ").replace(",", ";")
-            yield f"{a.created_at:%Y-%m-%d %H:%M:%S},{text}\n"
-
-    resp = StreamingHttpResponse(rows(), content_type="text/csv; charset=utf-8")
-    resp["Content-Disposition"] = 'attachment; filename="alertas_streaming.csv"'
+    """Exporta alertas de streaming en streaming.
+
+    Filtros: ``from``/``to`` (fecha o ISO), ``risk`` (códigos, coma),
+    ``camera``. ``format=csv|ndjson|parquet`` (parquet requiere pyarrow) y
+    ``gzip=1`` para comprimir al vuelo.
+    """
+    fmt = (request.GET.get("format") or "csv").lower()
+    gzip = request.GET.get("gzip", "").lower() in {"1", "true", "yes"}
+    try:
+        chunks = export_stream(parse_filters(request.GET), fmt, gzip=gzip)
+    except ValueError as exc:
+        return HttpResponse(str(exc), status=400, content_type="text/plain; charset=utf-8")
+
+    content_type, ext = FORMATS[fmt]
+    filename = f"alertas_streaming.{ext}"
+    if gzip and fmt != "parquet":
+        content_type, filename = "application/gzip", filename + ".gz"
+    resp = StreamingHttpResponse(chunks, content_type=content_type)
+    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
     return resp
 
 
@@ -140,34 +159,10 @@ def _build_metrics(results: List[InferenceResult]) -> MetricCounters:
     return counters
 
 
-def _build_metrics_from_alerts(alerts: List[StreamAlert]) -> MetricCounters:
-    counters = MetricCounters()
-    for a in alerts:
-        text = (a.text or "").lower()
-        # Heurística simple por palabras clave
-        if not text:
-            continue
-        # contar por clases conocidas
-        for token in [
-            "knife",
-            "cuchillo",
-            "kitchen",
-            "cocina",
-            "cooker",
-            "stove",
-            "horno",
-            "oven",
-            "pot",
-            "olla",
-            "stairs",
-            "escalera",
-            "scissors",
-            "tijera",
-        ]:
-            if token in text:
-                counters.bump(token)
-        counters.total += 1
-    return counters
+def _build_metrics_from_alerts() -> MetricCounters:
+    """Contadores del dashboard desde los acumulados diarios (``AlertRollup``)."""
+    counts = rollup_counts()
+    return MetricCounters(**{f.name: counts.get(f.name, 0) for f in fields(MetricCounters)})
 
 
 def web_dashboard(request: HttpRequest) -> HttpResponse:
@@ -178,7 +173,7 @@ def web_dashboard(request: HttpRequest) -> HttpResponse:
     recent_alerts = list(StreamAlert.objects.order_by("-created_at")[:12])
     recent_results = InferenceResult.objects.order_by("-uploaded_at")[:3]
     # Métricas a partir de alertas persistidas (stream)
-    metrics = _build_metrics_from_alerts(recent_alerts)
+    metrics = _build_metrics_from_alerts()
     stream_img_w = int(os.getenv("STREAM_IMG_W", "416"))
     context = {
         "user": user,
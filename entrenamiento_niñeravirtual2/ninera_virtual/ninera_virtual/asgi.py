@@ -17,6 +17,17 @@ except Exception:
     logging.exception("[asgi] No se pudieron importar rutas WS; usando lista vacía")
     websocket_urlpatterns = []  # type: ignore
 
+# Retención periódica en proceso (solo si RETENTION_INTERVAL_SEC > 0)
+from deteccion.services.retention import start_retention_thread  # noqa: E402
+
+start_retention_thread()
+
+# ultralytics/torch y los pesos se cargan en segundo plano: HTTP responde
+# de inmediato y ws/stream contesta "loading" hasta que el stack esté listo
+from deteccion.services.preload import start_preload  # noqa: E402
+
+start_preload()
+
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
@@ -92,6 +92,15 @@ else:
         "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
     }
 
+# Cache: Redis si está configurado (compartido entre procesos); si no, memoria local
+if _redis_url:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": _redis_url}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Sesiones leídas del cache (la BD solo se toca al escribir o en un fallo de cache)
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
 # Default DB: prefer DATABASE_URL (e.g., Postgres). If not provided, use
 # a SQLite file on the persistent disk (/data) to survive restarts.
 default_sqlite_path = Path(os.getenv("DJANGO_SQLITE_PATH", "/data/django.sqlite3"))
@@ -112,6 +121,16 @@ if DATABASES["default"]["ENGINE"].endswith("sqlite3"):
         if k in opts:
             del opts[k]
 
+# SQLite en producción (Django y base legacy de usuarios): WAL +
+# synchronous=NORMAL, espera ante bloqueos y lecturas con mmap. Se aplican
+# al abrir cada conexión (``deteccion.legacy.sqlite``); 0 desactiva.
+SQLITE_WAL = os.getenv("SQLITE_WAL", "1").lower() in {"1", "true", "yes"}
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "64"))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "8192"))
+if DATABASES["default"]["ENGINE"].endswith("sqlite3") and SQLITE_BUSY_TIMEOUT_MS:
+    DATABASES["default"]["OPTIONS"].setdefault("timeout", SQLITE_BUSY_TIMEOUT_MS / 1000)
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -139,11 +158,48 @@ STORAGES = {
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", BASE_DIR / "media"))
+# Subidas direccionadas por contenido: el SHA-256 se calcula al recibir
+FILE_UPLOAD_HANDLERS = [
+    "deteccion.storage.HashingMemoryFileUploadHandler",
+    "deteccion.storage.HashingTemporaryFileUploadHandler",
+]
+# Presupuesto de disco de las subidas (0 = sin límite); solo se expulsan
+# archivos sin referencias, empezando por los menos usados
+MEDIA_BLOB_BUDGET_MB = int(os.getenv("MEDIA_BLOB_BUDGET_MB", "2048"))
+MEDIA_BLOB_GRACE_SEC = int(os.getenv("MEDIA_BLOB_GRACE_SEC", "600"))
+# Render anotado de cada resultado (imagen o hoja de contactos del video)
+RENDER_MAX_W = int(os.getenv("RENDER_MAX_W", "1280"))
+RENDER_SHEET_FRAMES = int(os.getenv("RENDER_SHEET_FRAMES", "9"))
+RENDER_TILE_W = int(os.getenv("RENDER_TILE_W", "320"))
+RENDER_JPEG_QUALITY = int(os.getenv("RENDER_JPEG_QUALITY", "85"))
+
+# El servidor importa ultralytics y carga y calienta todos los modelos
+# configurados en un hilo al arrancar (/readyz da 200 al terminar); con 0
+# la carga empieza con la primera conexión a ws/stream.
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "1").lower() in {"1", "true", "yes"}
+
+# Rollups de alertas: cubetas por minuto/hora se compactan (borran) pasado
+# este tiempo; las diarias se conservan.
+ALERT_ROLLUP_MINUTE_HOURS = int(os.getenv("ALERT_ROLLUP_MINUTE_HOURS", "48"))
+ALERT_ROLLUP_HOUR_DAYS = int(os.getenv("ALERT_ROLLUP_HOUR_DAYS", "90"))
+ALERT_ROLLUP_COMPACT_SEC = int(os.getenv("ALERT_ROLLUP_COMPACT_SEC", "3600"))
+
+# Retención (días; 0 = conservar siempre). ``prune_data`` la aplica y, con
+# RETENTION_INTERVAL_SEC > 0, también un hilo periódico del servidor.
+RETENTION_ALERT_DAYS = int(os.getenv("RETENTION_ALERT_DAYS", "90"))
+RETENTION_UPLOAD_DAYS = int(os.getenv("RETENTION_UPLOAD_DAYS", "30"))
+RETENTION_SNAPSHOT_DAYS = int(os.getenv("RETENTION_SNAPSHOT_DAYS", "30"))
+RETENTION_CHUNK = int(os.getenv("RETENTION_CHUNK", "500"))
+RETENTION_INTERVAL_SEC = int(os.getenv("RETENTION_INTERVAL_SEC", "0"))
+# Si se define, las filas borradas se archivan en NDJSON gzip por día
+RETENTION_ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR", "")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 SECURE_SSL_REDIRECT = os.getenv("DJANGO_SECURE_SSL_REDIRECT", str(not DEBUG)).lower() in {"1", "true", "yes"}
+# Los health checks de la plataforma llegan por HTTP interno
+SECURE_REDIRECT_EXEMPT = [r"^healthz$", r"^readyz$"]
 SESSION_COOKIE_SECURE = not DEBUG
 CSRF_COOKIE_SECURE = not DEBUG
 USE_X_FORWARDED_HOST = True
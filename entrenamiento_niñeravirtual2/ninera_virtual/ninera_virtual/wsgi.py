@@ -5,3 +5,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ninera_virtual.settings")
 
 application = get_wsgi_application()
+
+# Retención periódica en proceso (solo si RETENTION_INTERVAL_SEC > 0)
+from deteccion.services.retention import start_retention_thread  # noqa: E402
+
+start_retention_thread()
+
+# Modelos cargados y calentados en segundo plano (ver /readyz)
+from deteccion.services.preload import start_preload  # noqa: E402
+
+start_preload()
@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import cv2
+import numpy as np
+from django.test import SimpleTestCase
+
+from deteccion.legacy import adapters
+from deteccion.legacy.adapters import FFmpegCaptureAdapter
+
+
+class FFmpegReconnectTests(SimpleTestCase):
+    """Sin ffmpeg real: se simulan el sondeo y el pipe."""
+
+    def _adapter(self, probes, reads):
+        adapter = FFmpegCaptureAdapter("rtsp://camara/sala", width=320, max_backoff=0.5)
+        patches = [
+            mock.patch.object(adapters.shutil, "which", return_value="/usr/bin/ffmpeg"),
+            mock.patch.object(adapters, "probe_stream", side_effect=probes),
+            mock.patch.object(adapters.time, "sleep"),
+            mock.patch.object(adapter, "_spawn", return_value=True),
+            mock.patch.object(adapter, "_read_into", side_effect=reads),
+            mock.patch.object(adapter, "_kill"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        return adapter
+
+    def test_initial_open_retries_with_backoff(self) -> None:
+        adapter = self._adapter([None, None, (640, 480, 25.0)], [])
+        with self.assertLogs(level="WARNING"):
+            self.assertTrue(adapter.open())
+        self.assertEqual(adapter.shape, (240, 320, 3))
+        self.assertEqual([c.args[0] for c in adapters.time.sleep.call_args_list], [0.5, 0.5])
+
+        failing = self._adapter([None] * 5, [])
+        with self.assertLogs(level="WARNING"):
+            self.assertFalse(failing.open())
+        self.assertFalse(failing.is_opened())
+
+    def test_reconnect_reprobes_frame_shape(self) -> None:
+        adapter = self._adapter([(640, 480, 25.0), (1280, 720, 25.0)], [False, True])
+        self.assertTrue(adapter.open())
+        out = np.empty(adapter.shape, dtype=np.uint8)
+
+        with self.assertLogs(level="INFO"):
+            ok, frame = adapter.read(out)
+        self.assertTrue(ok)
+        self.assertEqual(adapter.reconnects, 1)
+        self.assertEqual(adapter.shape, (180, 320, 3))
+        self.assertEqual(frame.shape, adapter.shape)
+        self.assertIsNot(frame, out)
+
+
+@unittest.skipUnless(shutil.which("ffmpeg") and shutil.which("ffprobe"), "ffmpeg no está instalado")
+class FFmpegFileTests(SimpleTestCase):
+    FRAMES = 12
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = str(Path(tmp.name) / "clip.avi")
+        writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (320, 240))
+        for i in range(self.FRAMES):
+            writer.write(np.full((240, 320, 3), i * 20, dtype=np.uint8))
+        writer.release()
+
+    def test_reads_generated_video_scaled_to_width(self) -> None:
+        adapter = FFmpegCaptureAdapter(self.path, width=160)
+        self.assertTrue(adapter.open())
+        self.addCleanup(adapter.release)
+        self.assertEqual(adapter.shape, (120, 160, 3))
+
+        ok, first = adapter.read()
+        self.assertTrue(ok)
+        self.assertEqual(first.shape, (120, 160, 3))
+
+        # grab sin retrieve descarta el frame; retrieve reutiliza el buffer dado
+        self.assertTrue(adapter.grab())
+        self.assertTrue(adapter.grab())
+        ok, frame = adapter.retrieve(first)
+        self.assertTrue(ok)
+        self.assertIs(frame, first)
+
+        read = 3
+        while adapter.read()[0]:
+            read += 1
+        self.assertEqual(read, self.FRAMES)
+        self.assertTrue(adapter.rewind())
+        self.assertTrue(adapter.read()[0])
@@ -0,0 +1,82 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from deteccion.models import AlertRollup, StreamAlertRisk
+from deteccion.services.alerts import record_alert, risk_counts
+from deteccion.services.rollups import bump_rollups, compact_rollups, rollup_counts
+
+
+_PLAIN_STATIC = {**settings.STORAGES, "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}}
+
+
+@override_settings(STORAGES=_PLAIN_STATIC)
+class AlertRecordTests(TestCase):
+    def test_record_alert_stores_structured_fields_and_counts(self) -> None:
+        alert = record_alert(
+            risks=["zone", "knife", "knife"],
+            detections=[{"label": "knife", "conf": 0.83, "src": "coco"}, {"label": "nino", "conf": 0.9, "src": "custom"}],
+            camera="cocina",
+            session="s1",
+        )
+        record_alert(risks=["stairs"], camera="patio")
+        record_alert(detections=[{"label": "cup", "conf": 0.5}])
+
+        self.assertEqual(alert.risk_types, ["knife", "zone"])
+        self.assertEqual(alert.max_conf, 0.9)
+        self.assertTrue(alert.text.startswith("Riesgo: Cuchillo, Zona | [coco] knife 0.83"))
+        self.assertEqual(StreamAlertRisk.objects.filter(alert=alert).count(), 2)
+
+        counts = risk_counts()
+        self.assertEqual((counts["total"], counts["knife"], counts["stairs"], counts["pot"]), (3, 1, 1, 0))
+        self.assertEqual(risk_counts(camera="cocina")["total"], 1)
+        self.assertEqual(rollup_counts(), counts)
+
+        session = self.client.session
+        session["legacy_user"] = {"id": 1, "name": "Test", "email": "t@example.com"}
+        session.save()
+        resp = self.client.get(reverse("deteccion:web_dashboard"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["metrics"].knife, 1)
+
+    def test_rollups_cover_periods_and_survive_compaction(self) -> None:
+        now = timezone.now()
+        bump_rollups(now - timedelta(days=3), "patio", ["knife"])
+        bump_rollups(now - timedelta(minutes=30), "patio", ["knife", "zone"])
+        bump_rollups(now, "cocina", [])
+
+        last_hour = rollup_counts(now - timedelta(hours=1))
+        self.assertEqual((last_hour["total"], last_hour["knife"], last_hour["zone"]), (2, 1, 1))
+        week = rollup_counts(now - timedelta(days=7))
+        self.assertEqual((week["total"], week["knife"]), (3, 2))
+        self.assertEqual(rollup_counts(camera="patio")["total"], 2)
+
+        removed = compact_rollups(now + timedelta(days=120))
+        self.assertGreater(removed["minutes"], 0)
+        self.assertEqual(rollup_counts()["total"], 3)
+        self.assertFalse(AlertRollup.objects.filter(granularity=AlertRollup.MINUTE).exists())
+
+    def test_export_filters_by_risk_and_streams_gzip(self) -> None:
+        record_alert(risks=["knife"], detections=[{"label": "knife", "conf": 0.8, "src": "coco"}], camera="cocina")
+        record_alert(risks=["stairs"], camera="patio", text='escalera, "con" comas\ny salto')
+        url = reverse("deteccion:export_alerts_csv")
+
+        resp = self.client.get(url, {"risk": "stairs", "gzip": "1"})
+        self.assertEqual(resp["Content-Type"], "application/gzip")
+        rows = list(csv.reader(io.StringIO(gzip.decompress(b"".join(resp.streaming_content)).decode("utf-8"))))
+        self.assertEqual(rows[0][:3], ["id", "timestamp", "camera"])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual((rows[1][2], rows[1][4], rows[1][6]), ("patio", "stairs", 'escalera, "con" comas\ny salto'))
+
+        resp = self.client.get(url, {"format": "ndjson", "from": timezone.localdate().isoformat()})
+        lines = b"".join(resp.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line)["camera"] for line in lines], ["patio", "cocina"])
+
+        self.assertEqual(self.client.get(url, {"risk": "fuego"}).status_code, 400)
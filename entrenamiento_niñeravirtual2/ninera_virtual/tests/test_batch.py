@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from deteccion.legacy.batch import VOCAB, DetectionBatch
+from deteccion.legacy.config import Config
+
+
+class _Boxes(SimpleNamespace):
+    def __len__(self) -> int:
+        return len(self.conf)
+
+
+def _result(xyxy, conf, cls):
+    return SimpleNamespace(
+        boxes=_Boxes(xyxy=np.array(xyxy, float), conf=np.array(conf, float), cls=np.array(cls))
+    )
+
+
+class DetectionBatchTests(SimpleTestCase):
+    def test_from_yolo_maps_classes_through_lut(self) -> None:
+        lut = VOCAB.lut_for({0: "person", 1: "knife", 2: "dog"}, Config.COCO_CLASS_MAP)
+        batch = DetectionBatch.from_yolo(
+            _result([[0, 0, 10, 10], [5, 5, 20, 20], [1, 1, 2, 2]], [0.9, 0.8, 0.9], [0, 1, 2]),
+            lut,
+            1,
+        )
+
+        self.assertEqual(batch.labels(), ["nino", "cuchillo"])
+        self.assertEqual(batch.boxes.dtype, np.int32)
+        self.assertEqual(batch.to_items()[1]["src"], "coco")
+
+    def test_nms_and_thresholds(self) -> None:
+        lut = VOCAB.lut_for({0: "nino"})
+        batch = DetectionBatch.from_yolo(
+            _result([[0, 0, 40, 80], [2, 1, 41, 79], [100, 0, 140, 80]], [0.6, 0.9, 0.1], [0, 0, 0]),
+            lut,
+            0,
+        ).nms_by_label()
+
+        self.assertEqual(len(batch), 2)
+        self.assertAlmostEqual(float(batch.conf[0]), 0.9, places=5)
+        self.assertEqual(len(batch.above_thresholds(0.5)), 1)
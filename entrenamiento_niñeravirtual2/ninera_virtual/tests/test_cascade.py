@@ -0,0 +1,142 @@
+import base64
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+import cv2
+import numpy as np
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.test import SimpleTestCase
+
+from deteccion.consumers_ws import StreamConsumer
+from deteccion.legacy.cascade import CascadePolicy, crop_region
+from deteccion.legacy.config import Config
+from deteccion.services.preload import READY, Preloader
+
+
+def _cameras(value):
+    raw = value if isinstance(value, str) else json.dumps(value)
+    return mock.patch.object(Config, "CASCADE_CAMERAS", raw)
+
+
+class CascadePolicyTests(SimpleTestCase):
+    def test_first_matching_key_wins(self) -> None:
+        overrides = {"3": {"gate_conf": 0.5}, "cocina": {"gate_conf": 0.7, "crop": False}}
+        with _cameras(overrides):
+            self.assertEqual(CascadePolicy.for_camera(3, "cocina").gate_conf, 0.5)
+            by_name = CascadePolicy.for_camera(None, "cocina")
+            self.assertEqual((by_name.gate_conf, by_name.crop), (0.7, False))
+            self.assertEqual(CascadePolicy.for_camera("patio"), CascadePolicy())
+
+    def test_values_are_coerced_and_unknown_fields_ignored(self) -> None:
+        overrides = {"sala": {"enabled": "yes", "gate_imgsz": "320", "crop_margin": 1, "crop": 0, "nope": 1}}
+        with _cameras(overrides):
+            policy = CascadePolicy.for_camera("sala")
+        self.assertIs(policy.enabled, True)
+        self.assertEqual(policy.gate_imgsz, 320)
+        self.assertIsInstance(policy.crop_margin, float)
+        self.assertIs(policy.crop, False)
+
+    def test_invalid_values_and_non_object_json_fall_back(self) -> None:
+        with _cameras({"sala": {"gate_imgsz": "grande", "gate_conf": 0.4}}), self.assertLogs(level="ERROR"):
+            policy = CascadePolicy.for_camera("sala")
+        self.assertEqual((policy.gate_imgsz, policy.gate_conf), (CascadePolicy().gate_imgsz, 0.4))
+
+        for raw in ("[]", "3", "{no json"):
+            with _cameras(raw), self.assertLogs(level="ERROR"):
+                self.assertEqual(CascadePolicy.for_camera("sala"), CascadePolicy())
+
+
+class CropRegionTests(SimpleTestCase):
+    def test_margin_and_union(self) -> None:
+        region = crop_region([[100, 100, 120, 140], [300, 200, 310, 210]], (480, 640, 3), 0.5, min_margin_px=10)
+        self.assertEqual(region, (80, 80, 320, 220))
+
+    def test_clamps_to_frame_and_rejects_empty(self) -> None:
+        self.assertEqual(crop_region([[5, 5, 630, 470]], (480, 640, 3), 0.5, min_margin_px=50), (0, 0, 640, 480))
+        self.assertIsNone(crop_region([], (480, 640, 3), 0.5))
+        self.assertIsNone(crop_region([[700, 500, 710, 510]], (480, 640, 3), 0.0, min_margin_px=0))
+
+
+class _Boxes(SimpleNamespace):
+    def __len__(self) -> int:
+        return len(self.conf)
+
+
+class FakeModel:
+    def __init__(self, names, boxes=()):
+        self.names = names
+        self.boxes = list(boxes)
+        self.sources = []
+
+    def predict(self, source, **kwargs):
+        self.sources.append(source.shape)
+        xyxy = np.array([b[:4] for b in self.boxes], float).reshape(-1, 4)
+        conf = np.full(len(self.boxes), 0.9)
+        return [SimpleNamespace(boxes=_Boxes(xyxy=xyxy, conf=conf, cls=np.zeros(len(self.boxes))))]
+
+
+class StreamCascadeTests(SimpleTestCase):
+    POLICY = CascadePolicy(enabled=True, gate_imgsz=256, gate_conf=0.3, crop=True, crop_margin=0.5)
+
+    def _stream(self, gate, primary, scene_map, busy=()):
+        loader = Preloader()
+        loader.state = READY
+        loader._done.set()
+        loader.model = lambda name: gate if name.startswith("yolov8") else primary
+        for model in busy:
+            # Como si run_inference estuviera usando el modelo en otro hilo
+            loader.lock_for(model).acquire()
+        _, jpg = cv2.imencode(".jpg", np.zeros((234, 416, 3), np.uint8))
+        frame = {"type": "frame", "data": "data:image/jpeg;base64," + base64.b64encode(jpg.tobytes()).decode()}
+
+        async def scenario():
+            comm = ApplicationCommunicator(StreamConsumer.as_asgi(), {"type": "websocket", "path": "/ws/stream"})
+            await comm.send_input({"type": "websocket.connect"})
+            await comm.receive_output()  # accept
+            await comm.receive_output()  # ready
+            await comm.send_input({"type": "websocket.receive", "text": json.dumps(frame)})
+            msg = json.loads((await comm.receive_output())["text"])
+            await comm.send_input({"type": "websocket.disconnect", "code": 1000})
+            await comm.wait()
+            return msg
+
+        env = {"USE_PRIMARY": "1", "USE_COCO": "0", "STREAM_IMG_W": "416"}
+        with mock.patch.dict("os.environ", env), mock.patch("deteccion.consumers_ws.PRELOAD", loader), \
+                mock.patch.object(CascadePolicy, "for_camera", return_value=self.POLICY), \
+                mock.patch.object(Config, "SCENE_MAP", scene_map), \
+                mock.patch("deteccion.consumers_ws.NotificationMediator"), \
+                mock.patch.object(StreamConsumer, "_zones", mock.AsyncMock(return_value=[])), \
+                mock.patch.object(StreamConsumer, "_create_stream_alert", mock.AsyncMock()):
+            return async_to_sync(scenario)()
+
+    def test_primary_skipped_without_child_even_on_full_pass(self) -> None:
+        for scene_map in (True, False):
+            gate, primary = FakeModel({0: "dog"}), FakeModel({0: "nino"})
+            msg = self._stream(gate, primary, scene_map)
+            self.assertEqual(len(gate.sources), 1)
+            self.assertEqual(primary.sources, [], scene_map)
+            self.assertEqual(msg["cascade"]["heavy_runs"], 0)
+
+    def test_child_runs_primary_on_crop(self) -> None:
+        for scene_map in (True, False):
+            gate = FakeModel({0: "person"}, [(200, 60, 240, 140)])
+            primary = FakeModel({0: "nino"}, [(10, 10, 30, 40)])
+            msg = self._stream(gate, primary, scene_map)
+            # Margen mínimo PROXIMITY_PX (120) alrededor de la caja, recortado al frame
+            self.assertEqual(primary.sources, [(234, 280, 3)], scene_map)
+            self.assertEqual((msg["cascade"]["crop_runs"], msg["cascade"]["full_runs"]), (1, 0))
+            custom = [d for d in msg["items"] if d["src"] == "custom"]
+            self.assertEqual(custom[0]["box"], [90, 10, 110, 40])
+
+    def test_busy_model_skips_frame_without_blocking(self) -> None:
+        gate = FakeModel({0: "person"}, [(200, 60, 240, 140)])
+        primary = FakeModel({0: "nino"}, [(10, 10, 30, 40)])
+        msg = self._stream(gate, primary, True, busy=[primary])
+        self.assertEqual((msg["type"], msg["message"]), ("busy", "modelo ocupado (custom)"))
+        self.assertEqual((len(gate.sources), primary.sources), (1, []))
+
+        msg = self._stream(gate, primary, True, busy=[gate])
+        self.assertEqual(msg["type"], "busy")
+        self.assertEqual(len(gate.sources), 1)
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from deteccion.legacy.clips import ClipRecorder
+from deteccion.legacy.snapshots import OWNER_FILE
+
+
+class ClipRecorderTests(SimpleTestCase):
+    def test_alert_flushes_pre_and_post_frames(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            rec = ClipRecorder(tmp, pre_sec=1.0, post_sec=1.0, max_sec=10, fps=4, width=32).start()
+            rec.ffmpeg = None  # cv2.VideoWriter, sin depender de ffmpeg
+            frame = np.zeros((48, 64, 3), dtype=np.uint8)
+
+            t = 100.0
+            for _ in range(12):  # 3 s a 4 fps: el ring solo guarda el último segundo
+                rec.feed("c1", frame, now=t)
+                t += 0.25
+            self.assertEqual(rec.stats()["ring_frames"], 4)
+            self.assertEqual(os.listdir(tmp), [OWNER_FILE])
+
+            path = rec.trigger("c1", "Cocina", now=t)
+            self.assertEqual(rec.trigger("c1", "Cocina", now=t), path)
+            for _ in range(6):
+                rec.feed("c1", frame, now=t)
+                t += 0.25
+            rec.stop()
+
+            self.assertTrue(os.path.exists(path))
+            self.assertNotIn(OWNER_FILE, os.listdir(tmp))
+            st = rec.stats()
+            self.assertEqual((st["triggered"], st["written"], st["recording"]), (1, 1, 0))
+
+    def test_old_clips_expire_by_age(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, age in (("clip_viejo.mp4", 7200), ("clip_nuevo.mp4", 60)):
+                path = os.path.join(tmp, name)
+                open(path, "wb").close()
+                os.utime(path, (time.time() - age, time.time() - age))
+            rec = ClipRecorder(tmp, max_files=10, max_age_sec=3600).start()
+            rec.stop()
+            self.assertEqual(sorted(os.listdir(tmp)), ["clip_nuevo.mp4"])
+            self.assertEqual(rec.stats()["files"], 1)
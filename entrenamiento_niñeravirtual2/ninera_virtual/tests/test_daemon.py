@@ -0,0 +1,38 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from deteccion.management.commands.run_detection_daemon import load_camera_config
+
+
+class CameraConfigTests(SimpleTestCase):
+    def _write(self, tmp, data) -> str:
+        path = os.path.join(tmp, "cameras.json")
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        return path
+
+    def test_parses_sources_and_rejects_duplicates(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cams = load_camera_config(
+                self._write(
+                    tmp,
+                    {
+                        "cameras": [
+                            {"id": "cocina", "name": "Cocina", "source": "rtsp://cam/1"},
+                            {"source": "0", "zones": {"escalera": [[[0, 0], [10, 0], [10, 10]]]}},
+                        ]
+                    },
+                )
+            )
+            self.assertEqual([c["id"] for c in cams], ["cocina", "cam1"])
+            self.assertEqual(cams[0]["kind"], "video")
+            self.assertEqual((cams[1]["kind"], cams[1]["source"]), ("live", 0))
+            self.assertIn("escalera", cams[1]["zones"])
+
+            dup = self._write(tmp, [{"id": "a", "source": "x.mp4"}, {"id": "a", "source": "y.mp4"}])
+            with self.assertRaises(CommandError):
+                load_camera_config(dup)
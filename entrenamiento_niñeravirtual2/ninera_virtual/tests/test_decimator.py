@@ -0,0 +1,37 @@
+from django.test import SimpleTestCase
+
+from deteccion.legacy.decimator import FrameDecimator
+
+# Cámara a 32 fps: los instantes (k/32) son exactos en binario
+CAMERA_FPS = 32
+
+
+def _decoded(decimator: FrameDecimator, visible: bool, seconds: float = 1.0, start: float = 0.0) -> int:
+    frames = int(seconds * CAMERA_FPS)
+    return sum(decimator.should_decode(visible, now=start + i / CAMERA_FPS) for i in range(frames))
+
+
+class FrameDecimatorTests(SimpleTestCase):
+    def test_hidden_camera_decodes_only_for_inference(self) -> None:
+        decimator = FrameDecimator(infer_fps=4, display_fps=8)
+        self.assertEqual(_decoded(decimator, visible=False), 4)
+        self.assertEqual(decimator.stats(), {"grabbed": 32, "decoded": 4, "skip_ratio": 0.875})
+
+    def test_visible_camera_also_decodes_for_display(self) -> None:
+        decimator = FrameDecimator(infer_fps=4, display_fps=8)
+        self.assertEqual(_decoded(decimator, visible=True), 8)
+
+        decimator.set_display_fps(16)
+        self.assertEqual(_decoded(decimator, visible=True, start=1.0), 16)
+
+    def test_zero_fps_decodes_every_frame(self) -> None:
+        self.assertEqual(_decoded(FrameDecimator(infer_fps=0, display_fps=8), visible=False), CAMERA_FPS)
+        self.assertEqual(_decoded(FrameDecimator(infer_fps=4, display_fps=0), visible=True), CAMERA_FPS)
+
+    def test_stall_does_not_accumulate_debt(self) -> None:
+        decimator = FrameDecimator(infer_fps=4, display_fps=8)
+        self.assertTrue(decimator.should_decode(False, now=0.0))
+        # La cámara se atrasa 2 s: se decodifica una vez y se retoma la cadencia normal
+        self.assertTrue(decimator.should_decode(False, now=2.0))
+        self.assertFalse(decimator.should_decode(False, now=2.0 + 1 / CAMERA_FPS))
+        self.assertEqual(_decoded(decimator, visible=False, start=2.25), 4)
@@ -0,0 +1,76 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from deteccion.legacy.framebuffer import FrameRing
+
+
+def _write(ring: FrameRing, value: int):
+    """Como la captura: decodifica sobre el buffer del slot libre (o uno nuevo)."""
+    slot, buf = ring.write_slot()
+    if slot is None:
+        return None
+    if buf is None:
+        buf = np.empty((4, 6, 3), dtype=np.uint8)
+    buf[:] = value
+    return ring.commit(slot, buf)
+
+
+class FrameRingTests(SimpleTestCase):
+    def test_leased_slot_is_never_overwritten(self) -> None:
+        ring = FrameRing(size=2, max_size=3)
+        _write(ring, 1)
+        lease = ring.latest()
+        for value in range(2, 12):
+            _write(ring, value)
+        self.assertTrue((lease.frame == 1).all())
+        self.assertEqual(lease.seq, 1)
+
+        # Con todos los slots fijados y el ring al máximo, el frame se descarta
+        leases = [lease, ring.latest()]
+        self.assertIsNotNone(_write(ring, 12))
+        leases.append(ring.latest())
+        self.assertIsNone(_write(ring, 99))
+        self.assertEqual(ring.stats()["dropped"], 1)
+        for held in leases:
+            held.release()
+        self.assertIsNotNone(_write(ring, 13))
+        self.assertEqual(len({id(s.buf) for s in ring._slots}), 3)
+
+    def test_lease_view_is_read_only(self) -> None:
+        ring = FrameRing()
+        _write(ring, 7)
+        with ring.latest() as lease:
+            with self.assertRaises(ValueError):
+                lease.frame[0, 0, 0] = 0
+        copy = ring.snapshot()
+        copy[0, 0, 0] = 0
+        self.assertEqual(ring.copies, 1)
+
+    def test_sequence_numbers_are_monotonic(self) -> None:
+        ring = FrameRing()
+        seqs = [_write(ring, v) for v in range(5)]
+        self.assertEqual(seqs, [1, 2, 3, 4, 5])
+
+        lease = ring.latest()
+        self.assertEqual(lease.seq, ring.seq)
+        lease.release()
+        self.assertIsNone(ring.latest(after_seq=ring.seq))
+
+    def test_no_allocations_or_copies_in_steady_state(self) -> None:
+        ring = FrameRing(size=3)
+        seq = -1
+        for value in range(10):
+            _write(ring, value)
+            with ring.latest(after_seq=seq) as lease:
+                seq = lease.seq
+        warm = ring.stats()
+
+        for value in range(200):
+            _write(ring, value)
+            with ring.latest(after_seq=seq) as lease:
+                seq = lease.seq
+        stats = ring.stats()
+        self.assertEqual(stats["allocations"], warm["allocations"])
+        self.assertLessEqual(stats["allocations"], 3)
+        self.assertEqual(ring.copies, 0)
+        self.assertEqual(stats["slots"], 3)
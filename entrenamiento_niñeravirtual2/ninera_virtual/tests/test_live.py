@@ -0,0 +1,67 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from django.test import SimpleTestCase, TestCase
+
+from deteccion.consumers_ws import DashboardConsumer
+from deteccion.services.alerts import record_alert
+from deteccion.services.live import DASHBOARD_GROUP, camera_event, publish
+
+
+class DashboardPublishTests(TestCase):
+    def test_alert_is_published_once_after_commit(self) -> None:
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(DASHBOARD_GROUP, channel)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            alert = record_alert(risks=["knife", "zone"], camera="cocina", text="Riesgo: Cuchillo")
+        self.assertEqual(len(callbacks), 1)
+
+        message = async_to_sync(layer.receive)(channel)
+        event = message["event"]
+        self.assertEqual(message["type"], "dashboard.event")
+        self.assertEqual(event["alert"]["id"], alert.pk)
+        self.assertEqual(event["deltas"], {"total": 1, "knife": 1, "zone": 1})
+        async_to_sync(layer.group_discard)(DASHBOARD_GROUP, channel)
+
+
+class DashboardConsumerTests(SimpleTestCase):
+    def test_requires_session_and_forwards_events(self) -> None:
+        def communicator(session):
+            scope = {"type": "websocket", "path": "/ws/dashboard", "session": session}
+            return ApplicationCommunicator(DashboardConsumer.as_asgi(), scope)
+
+        async def scenario():
+            anon = communicator({})
+            await anon.send_input({"type": "websocket.connect"})
+            closed = await anon.receive_output()
+            self.assertEqual((closed["type"], closed["code"]), ("websocket.close", 4401))
+
+            comm = communicator({"legacy_user": {"id": 1}})
+            await comm.send_input({"type": "websocket.connect"})
+            self.assertEqual((await comm.receive_output())["type"], "websocket.accept")
+            await get_channel_layer().group_send(
+                DASHBOARD_GROUP, {"type": "dashboard.event", "event": camera_event("patio", "online")}
+            )
+            event = json.loads((await comm.receive_output())["text"])
+            self.assertEqual((event["kind"], event["camera"], event["status"]), ("camera", "patio", "online"))
+            await comm.send_input({"type": "websocket.disconnect", "code": 1000})
+            await comm.wait()
+
+        async_to_sync(scenario)()
+
+    def test_publish_without_layer_members_is_harmless(self) -> None:
+        with self.assertNoLogs(level="ERROR"):
+            publish(camera_event("nadie", "offline"))
+
+        # Un layer caído (p. ej. Redis) se registra y no rompe al que publica
+        broken = mock.Mock(group_send=mock.AsyncMock(side_effect=ConnectionError("redis")))
+        with mock.patch("channels.layers.get_channel_layer", return_value=broken), \
+                self.assertLogs(level="ERROR") as logs:
+            publish(camera_event("nadie", "offline"))
+        broken.group_send.assert_awaited_once()
+        self.assertIn("[live] no se pudo publicar camera", logs.output[0])
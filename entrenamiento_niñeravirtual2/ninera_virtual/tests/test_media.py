@@ -0,0 +1,86 @@
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from deteccion.models import InferenceResult, MediaBlob
+from deteccion.services import media
+from deteccion.services.media import evict_blobs, on_result_deleted, on_result_saved
+from deteccion.storage import upload_storage
+
+
+class MediaBlobTests(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(MEDIA_ROOT=tmp.name, MEDIA_BLOB_BUDGET_MB=0)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _reference(self, name: str) -> InferenceResult:
+        result = InferenceResult(input_file=name)
+        on_result_saved(InferenceResult, result, created=True)
+        return result
+
+    def test_identical_uploads_share_one_refcounted_file(self) -> None:
+        storage = upload_storage()
+        first = storage.save("deteccion/uploads/b.jpg", ContentFile(b"frame-bytes"))
+        # Como lo deja HashingTemporaryFileUploadHandler: el hash ya viene calculado
+        hashed = SimpleUploadedFile("otra.JPG", b"frame-bytes")
+        hashed.sha256 = hashlib.sha256(b"frame-bytes").hexdigest()
+        second = storage.save("deteccion/uploads/otra.JPG", hashed)
+        other = storage.save("deteccion/uploads/c.jpg", ContentFile(b"distinto"))
+
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith(f"deteccion/blobs/{hashed.sha256[:2]}/{hashed.sha256}"))
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(os.listdir(os.path.dirname(storage.path(first)))), 1)
+
+        a, b = self._reference(first), self._reference(second)
+        self._reference(other)
+        blob = MediaBlob.objects.get(name=first)
+        self.assertEqual((blob.refcount, blob.size), (2, len(b"frame-bytes")))
+
+        for result in (a, b):
+            on_result_deleted(InferenceResult, result)
+        storage.delete(first)  # no-op para blobs compartidos
+        blob.refresh_from_db()
+        self.assertEqual(blob.refcount, 0)
+        self.assertTrue(storage.exists(first))
+
+        # Solo el huérfano sale; el referenciado se queda aunque supere el presupuesto
+        self.assertEqual(evict_blobs(budget_bytes=0, grace_sec=0), 1)
+        self.assertFalse(storage.exists(first))
+        self.assertTrue(storage.exists(other))
+        self.assertEqual(list(MediaBlob.objects.values_list("refcount", flat=True)), [1])
+
+    def test_upload_during_eviction_keeps_file_and_row(self) -> None:
+        storage = upload_storage()
+        name = storage.save("deteccion/uploads/a.jpg", ContentFile(b"frame-bytes"))
+        MediaBlob.objects.filter(name=name).update(last_used_at=timezone.now() - timedelta(hours=1))
+        park = media._park
+
+        def upload_same_file_meanwhile(path):
+            parked = park(path)
+            # Otra petición sube el mismo contenido justo después de apartar el archivo
+            self.assertEqual(storage.save("deteccion/uploads/otra.jpg", ContentFile(b"frame-bytes")), name)
+            return parked
+
+        with mock.patch.object(media, "_park", side_effect=upload_same_file_meanwhile):
+            self.assertEqual(evict_blobs(budget_bytes=0, grace_sec=60), 0)
+
+        self.assertTrue(storage.exists(name))
+        self.assertTrue(MediaBlob.objects.filter(name=name).exists())
+        self.assertEqual(os.listdir(os.path.dirname(storage.path(name))), [os.path.basename(name)])
+
+        # Sin subidas concurrentes, el huérfano viejo sí sale
+        MediaBlob.objects.filter(name=name).update(last_used_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(evict_blobs(budget_bytes=0, grace_sec=60), 1)
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(os.listdir(os.path.dirname(storage.path(name))))
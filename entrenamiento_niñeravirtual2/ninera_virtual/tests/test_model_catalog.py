@@ -0,0 +1,47 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from ml_models.catalog import ModelCatalog, candidate_names
+
+
+class ModelCatalogTests(SimpleTestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.first, self.second = Path(tmp.name, "a"), Path(tmp.name, "b")
+        self.first.mkdir()
+        self.second.mkdir()
+        (self.second / "ninera.pt").write_bytes(b"custom")
+        (self.second / "yolov8n.pt").write_bytes(b"nano")
+        (self.first / "vacío.pt").write_bytes(b"")
+        self.catalog = ModelCatalog([self.first, self.second])
+
+    def test_aliases_and_cached_resolution(self) -> None:
+        self.assertEqual(candidate_names("NineraV.pt")[:2], ("NineraV.pt", "ninera.pt"))
+        self.assertEqual(self.catalog.resolve("NiñeraV.pt"), (self.second / "ninera.pt").resolve())
+        self.assertEqual(self.catalog.resolve("yolov8s.pt"), (self.second / "yolov8n.pt").resolve())
+        self.assertEqual(self.catalog.resolve("vacío.pt").name, "vacío.pt")  # vacío: no cuenta
+        self.assertIsNone(self.catalog.find("vacío.pt"))
+        self.catalog.resolve("NiñeraV.pt")
+        self.assertEqual(self.catalog.scans, 1)
+
+        entry = self.catalog.find("ninera.pt")
+        self.assertEqual(entry.sha256, hashlib.sha256(b"custom").hexdigest())
+        self.assertEqual(self.catalog.entries()["yolov8n.pt"]["size"], 4)
+
+    def test_reindexes_on_file_or_directory_change(self) -> None:
+        target = self.second / "ninera.pt"
+        self.catalog.resolve("ninera.pt")
+        target.write_bytes(b"custom-v2")
+        os.utime(target, ns=(1, 1))
+        self.assertEqual(self.catalog.find("ninera.pt").size, len(b"custom-v2"))
+        self.assertEqual(self.catalog.scans, 2)
+
+        # Un archivo nuevo con más prioridad aparece tras un fallo con el directorio cambiado
+        (self.first / "yolov8m.pt").write_bytes(b"medium")
+        os.utime(self.first, ns=(2, 2))
+        self.assertEqual(self.catalog.resolve("yolov8m.pt"), (self.first / "yolov8m.pt").resolve())
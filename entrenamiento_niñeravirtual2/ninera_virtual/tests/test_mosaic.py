@@ -0,0 +1,55 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from deteccion.legacy.mosaic import MosaicCanvas, grid_shape
+
+
+def _frame(value: int, w: int = 320, h: int = 240) -> np.ndarray:
+    return np.full((h, w, 3), value, dtype=np.uint8)
+
+
+class MosaicCanvasTests(SimpleTestCase):
+    def test_tiles_follow_grid(self) -> None:
+        self.assertEqual([grid_shape(n) for n in (0, 1, 2, 3, 5)], [(0, 0), (1, 1), (1, 2), (2, 2), (2, 3)])
+
+        mosaic = MosaicCanvas((204, 104), ["a", "b", "c"], gap=4)
+        self.assertEqual(mosaic.canvas.shape, (104, 204, 3))
+        self.assertEqual(
+            mosaic.tiles, {"a": (4, 4, 96, 46), "b": (104, 4, 96, 46), "c": (4, 54, 96, 46)}
+        )
+        self.assertEqual(mosaic.tile_at(150, 20), "b")
+        self.assertIsNone(mosaic.tile_at(150, 80))  # hueco de la cuarta celda
+        self.assertIsNone(mosaic.tile_at(2, 2))  # separación
+
+    def test_same_key_skips_redraw(self) -> None:
+        mosaic = MosaicCanvas((204, 104), ["a", "b"])
+        self.assertTrue(mosaic.update_tile("a", _frame(200), key=(1, 0, False)))
+        self.assertFalse(mosaic.update_tile("a", _frame(50), key=(1, 0, False)))
+        self.assertEqual(int(mosaic.canvas[25, 50, 0]), 200)
+
+        self.assertTrue(mosaic.update_tile("a", _frame(50), key=(2, 0, False)))
+        self.assertEqual(int(mosaic.canvas[25, 50, 0]), 50)
+        self.assertFalse(mosaic.update_tile("zz", _frame(50), key=1))
+
+    def test_frame_is_fitted_inside_its_tile(self) -> None:
+        mosaic = MosaicCanvas((204, 104), ["a", "b"], gap=4)
+        x, y, w, h = mosaic.tiles["b"]
+        seen = []
+        # 4:3 en un tile 96x96: franjas de fondo arriba y abajo
+        mosaic.update_tile("b", _frame(255), key=1, draw=lambda img, sx, sy: seen.append((img.shape, sx, sy)))
+        tile = mosaic.canvas[y:y + h, x:x + w]
+        self.assertEqual(seen, [((72, 96, 3), 0.3, 0.3)])
+        self.assertTrue((tile[12:84] == 255).all())
+        self.assertTrue((tile[:12] == MosaicCanvas.BG).all())
+        self.assertTrue((mosaic.canvas[:, :x - 1] == MosaicCanvas.BG).all())
+
+    def test_resize_needs_new_canvas(self) -> None:
+        mosaic = MosaicCanvas((204, 104), ["a", "b"])
+        self.assertTrue(mosaic.matches((204, 104), ["a", "b"]))
+        self.assertFalse(mosaic.matches((408, 208), ["a", "b"]))
+        self.assertFalse(mosaic.matches((204, 104), ["a", "b", "c"]))
+
+        bigger = MosaicCanvas((408, 208), ["a", "b"])
+        self.assertEqual(bigger.canvas.shape, (208, 408, 3))
+        self.assertGreater(bigger.tiles["a"][2], mosaic.tiles["a"][2])
+        self.assertFalse(bigger.is_current("a", 1))
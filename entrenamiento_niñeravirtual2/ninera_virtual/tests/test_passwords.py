@@ -0,0 +1,71 @@
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from deteccion.legacy import passwords
+from deteccion.legacy.config import Config, DatabaseConnection, UserRepository
+from deteccion.legacy.passwords import HasherBusy, PasswordHasher, pbkdf2_hex
+
+
+class PasswordTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseConnection(os.path.join(self.tmp.name, "users.db"))
+        self.repo = UserRepository(self.db)
+        patcher = mock.patch.object(passwords, "_hasher", PasswordHasher(workers=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.db.connections.close_all()
+        self.tmp.cleanup()
+
+    def test_upgrades_iterations_on_login(self) -> None:
+        with mock.patch.object(Config, "PASSWORD_ITERATIONS", 1000):
+            self.repo.create_user("Ana", "ana@x.co", "secreto")
+        with mock.patch.object(Config, "PASSWORD_ITERATIONS", 2000):
+            self.assertIsNone(self.repo.verify_credentials("ana@x.co", "otra"))
+            self.assertIsNone(self.repo.verify_credentials("nadie@x.co", "secreto"))
+            user = self.repo.verify_credentials("ana@x.co", "secreto")
+            self.assertEqual(user["iterations"], 2000)
+
+            stored = self.repo.find_by_email("ana@x.co")
+            self.assertEqual(stored["iterations"], 2000)
+            self.assertEqual(stored["password_hash"], pbkdf2_hex("secreto", stored["salt"], 2000))
+            self.assertIsNotNone(self.repo.verify_credentials("ana@x.co", "secreto"))
+
+    def test_admission_limit_rejects_when_saturated(self) -> None:
+        hasher = PasswordHasher(workers=0, max_pending=1, wait_sec=0.01)
+        entered, release = threading.Event(), threading.Event()
+
+        def slow(*args):
+            entered.set()
+            release.wait(2)
+            return "00"
+
+        with mock.patch.object(passwords, "pbkdf2_hex", slow):
+            worker = threading.Thread(target=hasher.hash, args=("a", "00", 1))
+            worker.start()
+            entered.wait(2)
+            with self.assertRaises(HasherBusy):
+                hasher.hash("b", "00", 1)
+            release.set()
+            worker.join()
+        self.assertEqual(hasher.rejected, 1)
+
+    def test_repository_uses_the_hasher_it_was_given(self) -> None:
+        inline = PasswordHasher(workers=0, max_pending=1, wait_sec=0)
+        repo = UserRepository(self.db, hasher=inline)
+        with mock.patch("deteccion.legacy.config.get_hasher", side_effect=AssertionError("pool compartido")), \
+                mock.patch.object(Config, "PASSWORD_ITERATIONS", 1000):
+            repo.create_user("Ana", "ana@x.co", "secreto")
+            self.assertIsNotNone(repo.verify_credentials("ana@x.co", "secreto"))
+
+            # Sin turno en su propio hasher, el repositorio propaga HasherBusy (la GUI lo avisa)
+            inline._slots.acquire()
+            with self.assertRaises(HasherBusy):
+                repo.verify_credentials("ana@x.co", "secreto")
+            inline._slots.release()
@@ -0,0 +1,195 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.test import SimpleTestCase, override_settings
+
+from deteccion.consumers_ws import StreamConsumer
+from deteccion.services import preload
+from deteccion.services.preload import FAILED, LOADING, READY, Preloader, inference_plan, warmup_plan
+
+
+class FakeYOLO:
+    loads = 0
+
+    def __init__(self, path):
+        FakeYOLO.loads += 1
+        self.path = path
+        self.predictions = 0
+
+    def predict(self, **kwargs):
+        self.predictions += 1
+        return []
+
+
+class PreloaderTests(SimpleTestCase):
+    def test_warmup_plan_requires_only_enabled_stream_models(self) -> None:
+        env = {"USE_PRIMARY": "0", "USE_COCO": "1", "COCO_MODEL_FILE": "yolov8s.pt", "CASCADE": "1",
+               "STREAM_IMG_W": "320", "INFER_IMG_W": "416", "CASCADE_GATE_IMGSZ": "256"}
+        with mock.patch.dict("os.environ", env):
+            self.assertEqual(warmup_plan(), [("yolov8s.pt", 320, 320), ("yolov8n.pt", 320, 256)])
+            self.assertEqual(inference_plan(), [("NiñeraV.pt", 416, 640), ("yolov8s.pt", 416, 640)])
+
+    def test_loads_once_and_warms_each_size(self) -> None:
+        FakeYOLO.loads = 0
+        loader = Preloader()
+        files = {"primary": "a.pt", "detector": "b.pt"}
+        with mock.patch.object(preload, "yolo_class", return_value=FakeYOLO), mock.patch.dict(
+            "os.environ", {"USE_PRIMARY": "0", "USE_COCO": "1", "COCO_MODEL_FILE": "b.pt", "CASCADE": "0"}
+        ), mock.patch.dict("deteccion.services.model_loader.MODEL_FILENAMES", files, clear=True):
+            self.assertTrue(loader.start())
+            self.assertFalse(loader.start())
+            self.assertTrue(loader.wait(5))
+            loader._thread.join(5)
+            model = loader.model("b.pt")
+
+        self.assertEqual(loader.state, READY)
+        self.assertEqual(FakeYOLO.loads, 2)
+        self.assertEqual(model.predictions, 2)
+        status = loader.status()
+        self.assertEqual(status["warmed"], ["b.pt@416"])
+        self.assertEqual(status["inference"], {"a.pt@640": "ok", "b.pt@640": "ok"})
+
+    def test_upload_models_do_not_gate_readiness(self) -> None:
+        loader = Preloader()
+        files = {"primary": "vacio.pt"}
+
+        class PickyYOLO(FakeYOLO):
+            def __init__(self, path):
+                if path.endswith("vacio.pt"):
+                    raise RuntimeError("archivo vacío")
+                super().__init__(path)
+
+        with mock.patch.object(preload, "yolo_class", return_value=PickyYOLO), mock.patch.dict(
+            "os.environ", {"USE_PRIMARY": "0", "USE_COCO": "1", "COCO_MODEL_FILE": "b.pt", "CASCADE": "0"}
+        ), mock.patch.dict("deteccion.services.model_loader.MODEL_FILENAMES", files, clear=True), \
+                self.assertLogs(level="ERROR"):
+            self.assertTrue(loader.start())
+            self.assertTrue(loader.wait(5))
+            loader._thread.join(5)
+        self.assertEqual(loader.state, READY)
+        self.assertEqual(loader.status()["inference"], {"vacio.pt@640": "missing"})
+
+    def test_failed_warmup_is_retried_after_backoff(self) -> None:
+        class ColdYOLO(FakeYOLO):
+            def predict(self, **kwargs):
+                raise RuntimeError("sin memoria")
+
+        loader = Preloader()
+        with mock.patch.object(preload, "yolo_class", return_value=ColdYOLO), mock.patch.dict(
+            "os.environ", {"USE_PRIMARY": "0", "USE_COCO": "1", "COCO_MODEL_FILE": "b.pt", "CASCADE": "0"}
+        ), mock.patch.dict("deteccion.services.model_loader.MODEL_FILENAMES", {}, clear=True), \
+                self.assertLogs(level="ERROR"):
+            loader.start()
+            self.assertFalse(loader.wait(5))
+        self.assertEqual(loader.state, FAILED)
+        self.assertIn("calentamiento", loader.error)
+        self.assertEqual(loader.warmed, [])
+        # Dentro del backoff no se relanza; vencido, sí, y un éxito limpia el error
+        self.assertFalse(loader.start())
+        self.assertGreater(loader.status()["retry_in"], 0)
+        loader.retry_at = 0.0
+        with mock.patch.object(preload, "yolo_class", return_value=FakeYOLO), mock.patch.dict(
+            "os.environ", {"USE_PRIMARY": "0", "USE_COCO": "1", "COCO_MODEL_FILE": "c.pt", "CASCADE": "0"}
+        ), mock.patch.dict("deteccion.services.model_loader.MODEL_FILENAMES", {}, clear=True):
+            self.assertTrue(loader.start())
+            self.assertTrue(loader.wait(5))
+            loader._thread.join(5)
+        self.assertEqual((loader.attempts, loader.error, loader.warmed), (2, None, ["c.pt@416"]))
+
+    def test_missing_ultralytics_finishes_as_failed(self) -> None:
+        loader = Preloader()
+        with mock.patch.object(preload, "yolo_class", return_value=None):
+            loader.start()
+            self.assertFalse(loader.wait(5))
+        self.assertTrue(loader.done)
+        self.assertEqual(loader.state, FAILED)
+        self.assertIsNone(loader.model("ninera.pt"))
+
+
+class StreamGateTests(SimpleTestCase):
+    def test_frames_get_loading_until_stack_is_ready(self) -> None:
+        loader = Preloader()
+
+        async def scenario():
+            scope = {"type": "websocket", "path": "/ws/stream", "query_string": b"camera=sala"}
+            comm = ApplicationCommunicator(StreamConsumer.as_asgi(), scope)
+            await comm.send_input({"type": "websocket.connect"})
+            self.assertEqual((await comm.receive_output())["type"], "websocket.accept")
+            messages = [json.loads((await comm.receive_output())["text"])["type"] for _ in range(2)]
+            self.assertEqual(messages, ["ready", "loading"])
+
+            await comm.send_input({"type": "websocket.receive", "text": json.dumps({"type": "frame", "data": ""})})
+            self.assertEqual(json.loads((await comm.receive_output())["text"])["type"], "loading")
+
+            loader.state = READY
+            loader._done.set()
+            await comm.send_input({"type": "websocket.receive", "text": json.dumps({"type": "frame", "data": ""})})
+            msg = json.loads((await comm.receive_output())["text"])
+            self.assertEqual((msg["type"], msg["message"]), ("ready", "modelos listos"))
+            await comm.send_input({"type": "websocket.disconnect", "code": 1000})
+            await comm.wait()
+
+        with mock.patch("deteccion.consumers_ws.PRELOAD", loader), mock.patch.object(loader, "start"):
+            async_to_sync(scenario)()
+
+
+class HealthEndpointTests(SimpleTestCase):
+    databases = {"default"}
+
+    @override_settings(SECURE_SSL_REDIRECT=True)
+    def test_healthz_is_live_over_plain_http(self) -> None:
+        response = self.client.get("/healthz")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok"})
+
+    def _loader(self) -> Preloader:
+        loader = Preloader()
+        patcher = mock.patch.object(loader, "start", side_effect=lambda: setattr(loader, "state", LOADING))
+        self.start = patcher.start()
+        self.addCleanup(patcher.stop)
+        return loader
+
+    @override_settings(PRELOAD_MODELS=True)
+    def test_readyz_starts_idle_preload_and_waits_for_models(self) -> None:
+        loader = self._loader()
+        with mock.patch("deteccion.health_views.PRELOAD", loader):
+            response = self.client.get("/readyz")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json()["checks"]["models"], "loading")
+            self.start.assert_called_once()
+
+            loader.state = READY
+            response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()["checks"].values()), {"ok"})
+
+    @override_settings(PRELOAD_MODELS=False)
+    def test_readyz_ignores_models_when_preload_is_disabled(self) -> None:
+        loader = self._loader()
+        with mock.patch("deteccion.health_views.PRELOAD", loader):
+            response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["preload"]["state"], "idle")
+        self.start.assert_not_called()
+
+    def test_readyz_reports_failures(self) -> None:
+        loader = self._loader()
+        loader.state, loader.error = FAILED, "falló el calentamiento de ['b.pt@416']"
+        hasher = mock.Mock(pending=16, max_pending=16)
+        with mock.patch("deteccion.health_views.PRELOAD", loader), \
+                mock.patch("deteccion.health_views.get_hasher", return_value=hasher):
+            response = self.client.get("/readyz")
+        checks = response.json()["checks"]
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(checks["models"], loader.error)
+        self.assertEqual(checks["password_queue"], "16/16 pendientes")
+        self.assertEqual((checks["database"], checks["channel_layer"]), ("ok", "ok"))
+        # La sonda relanza la precarga fallida (start respeta el backoff)
+        self.start.assert_called_once()
+
+    def test_probes_only_answer_safe_methods(self) -> None:
+        self.assertEqual(self.client.post("/healthz").status_code, 405)
+        self.assertEqual(self.client.head("/healthz").status_code, 200)
+        self.assertIn("no-cache", self.client.get("/healthz")["Cache-Control"])
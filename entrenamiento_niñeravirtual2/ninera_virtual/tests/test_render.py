@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from deteccion.legacy import render
+from deteccion.legacy.render import EmaTimer, TkFrameView, fit_size, resize_into
+
+
+class FakePhoto:
+    """``PhotoImage`` sin Tk: registra creaciones y pastes."""
+
+    created = 0
+
+    def __init__(self, image):
+        FakePhoto.created += 1
+        self.size = image.size
+        self.pastes = 0
+
+    def width(self) -> int:
+        return self.size[0]
+
+    def height(self) -> int:
+        return self.size[1]
+
+    def paste(self, image) -> None:
+        self.pastes += 1
+
+
+class ResizeTests(SimpleTestCase):
+    def test_fit_size_keeps_aspect(self) -> None:
+        self.assertEqual(fit_size(1280, 720, 640, 640), (640, 360))
+        self.assertEqual(fit_size(720, 1280, 640, 640), (360, 640))
+        # Widget aún sin tamaño real: se devuelve el original
+        self.assertEqual(fit_size(1280, 720, 1, 1), (1280, 720))
+
+    def test_resize_into_writes_on_given_buffer(self) -> None:
+        src = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+        dst = np.zeros((120, 160, 3), dtype=np.uint8)
+        ptr = dst.ctypes.data
+        for _ in range(3):
+            out = resize_into(src, dst)
+            self.assertIs(out, dst)
+            self.assertEqual(dst.ctypes.data, ptr)
+        self.assertTrue(dst.any())
+
+        big = np.empty((960, 1280, 3), dtype=np.uint8)
+        self.assertIs(resize_into(src, big), big)
+
+
+class EmaTimerTests(SimpleTestCase):
+    def test_first_sample_then_moving_average(self) -> None:
+        timer = EmaTimer(alpha=0.5)
+        timer.add(10.0)
+        self.assertEqual(timer.ms, 10.0)
+        timer.add(20.0)
+        timer.add(20.0)
+        self.assertAlmostEqual(timer.ms, 17.5)
+        self.assertEqual(timer.count, 3)
+
+
+class TkFrameViewTests(SimpleTestCase):
+    def test_buffers_and_photo_reused_until_size_changes(self) -> None:
+        FakePhoto.created = 0
+        label = SimpleNamespace(configure=mock.Mock(), imgtk=None)
+        view = TkFrameView(label)
+        frame = np.full((480, 640, 3), 90, dtype=np.uint8)
+        calls = []
+
+        with mock.patch.object(render.ImageTk, "PhotoImage", FakePhoto):
+            for _ in range(3):
+                view.render(frame, (320, 240), draw=lambda img, sx, sy: calls.append((img.shape, sx, sy)))
+            bgr, photo = view._bgr, view._photo
+            self.assertEqual((FakePhoto.created, photo.pastes), (1, 2))
+            self.assertEqual(calls[0], ((240, 320, 3), 0.5, 0.5))
+
+            view.render(frame, (160, 120))
+        self.assertIsNot(view._bgr, bgr)
+        self.assertEqual(FakePhoto.created, 2)
+        self.assertEqual(label.configure.call_count, 2)
+        self.assertIs(label.imgtk, view._photo)
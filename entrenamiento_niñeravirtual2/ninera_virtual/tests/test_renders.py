@@ -0,0 +1,83 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import cv2
+import numpy as np
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from deteccion.models import InferenceResult
+from deteccion.services.renders import COLORS, contact_sheet, render_image, render_result
+from deteccion.storage import upload_storage
+
+
+class ResultRenderTests(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media = tmp.name
+        override = override_settings(MEDIA_ROOT=tmp.name, RENDER_SHEET_FRAMES=4, RENDER_TILE_W=64)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _result(self, name: str, data: bytes) -> InferenceResult:
+        stored = upload_storage().save(f"deteccion/uploads/{name}", ContentFile(data))
+        payload = {"detections": [{"label": "knife", "conf": 0.9, "src": "coco", "box": [2, 2, 20, 20]}], "frame_size": [32, 24]}
+        return InferenceResult.objects.create(input_file=stored, output_data=payload)
+
+    def _renders(self) -> list:
+        folder = Path(self.media) / "deteccion" / "renders"
+        return sorted(os.listdir(folder)) if folder.is_dir() else []
+
+    def test_renders_once_and_reuses_stored_file(self) -> None:
+        ok, jpg = cv2.imencode(".jpg", np.full((48, 64, 3), 90, np.uint8))
+        result = self._result("foto.jpg", jpg.tobytes())
+        self.assertTrue(render_result(result))
+        stored = InferenceResult.objects.get(pk=result.pk)
+        self.assertEqual(stored.annotated_file.name, result.annotated_file.name)
+        self.assertTrue(render_result(stored))
+        self.assertEqual(self._renders(), [os.path.basename(result.annotated_file.name)])
+        rendered = cv2.imread(result.annotated_file.path)
+        self.assertEqual(rendered.shape[:2], (48, 64))
+        self.assertFalse(np.all(rendered == rendered[0, 0]))
+
+    def test_view_renders_lazily_and_answers_304(self) -> None:
+        ok, jpg = cv2.imencode(".jpg", np.full((48, 64, 3), 90, np.uint8))
+        result = self._result("foto.jpg", jpg.tobytes())
+        session = self.client.session
+        session["legacy_user"] = {"id": 1, "name": "Ana", "email": "a@x.co"}
+        session.save()
+        url = reverse("deteccion:result_render", args=[result.pk])
+
+        first = self.client.get(url)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("immutable", first["Cache-Control"])
+        self.assertEqual(b"".join(first.streaming_content)[:2], b"\xff\xd8")
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(len(self._renders()), 1)
+        self.assertEqual(self.client.get(reverse("deteccion:result_render", args=[result.pk + 1])).status_code, 404)
+
+    def test_results_without_frame_size_use_inference_width(self) -> None:
+        # Resultado anterior a frame_size: cajas en el frame reducido a INFER_IMG_W (416)
+        path = os.path.join(self.media, "grande.png")
+        cv2.imwrite(path, np.full((624, 832, 3), 90, np.uint8))
+        detections = [{"label": "nino", "conf": 0.9, "src": "custom", "box": [100, 100, 150, 150]}]
+        with mock.patch.dict("os.environ", {"INFER_IMG_W": "416"}), override_settings(RENDER_MAX_W=1280):
+            img = render_image(Path(path), detections)
+        color = list(COLORS["custom"])
+        self.assertEqual(img[280, 200].tolist(), color)  # borde izquierdo en x = 100 * 2
+        self.assertEqual(img[280, 300].tolist(), color)
+        self.assertEqual(img[280, 150].tolist(), [90, 90, 90])
+
+    def test_contact_sheet_samples_video_frames(self) -> None:
+        path = os.path.join(self.media, "clip.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 24))
+        for i in range(20):
+            writer.write(np.full((24, 32, 3), i * 10, np.uint8))
+        writer.release()
+        sheet = contact_sheet(path, [{"label": "knife", "conf": 0.9, "src": "coco", "box": [2, 2, 20, 20]}], [32, 24])
+        self.assertEqual(sheet.shape, (96, 128, 3))  # 4 mosaicos de 64x48 en 2x2
@@ -0,0 +1,88 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from deteccion.legacy.snapshots import DirectoryClaim
+from deteccion.models import StreamAlert, StreamAlertRisk
+from deteccion.services import retention
+from deteccion.services.alerts import record_alert
+from deteccion.services.rollups import rollup_counts
+
+
+class RetentionTests(TestCase):
+    def test_prunes_old_alerts_archives_them_and_keeps_rollups(self) -> None:
+        old = record_alert(risks=["knife"], camera="cocina")
+        record_alert(risks=["stairs"], camera="patio")
+        StreamAlert.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=100))
+
+        with tempfile.TemporaryDirectory() as archive:
+            removed = retention.prune_alerts(timezone.now() - timedelta(days=90), chunk=1, archive_dir=archive, pause=0)
+            folder = os.path.join(archive, "stream_alerts")
+            (name,) = os.listdir(folder)
+            with gzip.open(os.path.join(folder, name), "rt", encoding="utf-8") as fh:
+                rows = [json.loads(line) for line in fh]
+
+        self.assertEqual(removed, 1)
+        self.assertEqual([r["id"] for r in rows], [old.pk])
+        self.assertEqual(StreamAlert.objects.count(), 1)
+        self.assertFalse(StreamAlertRisk.objects.filter(alert_id=old.pk).exists())
+        self.assertEqual(rollup_counts()["total"], 2)
+
+    def test_prune_files_by_mtime(self) -> None:
+        with tempfile.TemporaryDirectory() as folder:
+            stale, fresh, other = (os.path.join(folder, n) for n in ("a.jpg", "b.jpg", "notes.txt"))
+            for path in (stale, fresh, other):
+                open(path, "wb").close()
+            past = time.time() - 40 * 86400
+            os.utime(stale, (past, past))
+            os.utime(other, (past, past))
+
+            with mock.patch.object(retention, "snapshot_dirs", return_value=[folder]):
+                result = retention.run_retention(alert_days=0, upload_days=0, snapshot_days=30)
+
+            self.assertEqual(result["snapshots"], 1)
+            self.assertEqual(sorted(os.listdir(folder)), ["b.jpg", "notes.txt"])
+
+    def test_prune_files_skips_directory_claimed_by_writer(self) -> None:
+        with tempfile.TemporaryDirectory() as folder:
+            stale = os.path.join(folder, "a.jpg")
+            open(stale, "wb").close()
+            past = time.time() - 40 * 86400
+            os.utime(stale, (past, past))
+            claim = DirectoryClaim(folder)
+            claim.touch()
+
+            cutoff = timezone.now() - timedelta(days=30)
+            self.assertEqual(retention.prune_files(folder, cutoff), 0)
+            self.assertTrue(os.path.exists(stale))
+
+            # Marca caducada (el escritor murió sin liberarla) o liberada: se poda
+            os.utime(claim.path, (past, past))
+            self.assertEqual(retention.prune_files(folder, cutoff), 1)
+            claim.release()
+            self.assertFalse(os.path.exists(claim.path))
+
+    def test_archive_only_after_delete_commits(self) -> None:
+        old = record_alert(risks=["knife"], camera="cocina")
+        StreamAlert.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=100))
+        cutoff = timezone.now() - timedelta(days=90)
+
+        def archived(table, rows, *args):
+            self.assertFalse(StreamAlert.objects.filter(pk__in=[r["id"] for r in rows]).exists())
+
+        with mock.patch.object(retention, "_archive", side_effect=archived) as archive:
+            with mock.patch.object(StreamAlertRisk.objects, "filter", side_effect=RuntimeError("locked")):
+                with self.assertRaises(RuntimeError):
+                    retention.prune_alerts(cutoff, chunk=10, archive_dir="/tmp/no-usado", pause=0)
+            archive.assert_not_called()
+            self.assertTrue(StreamAlert.objects.filter(pk=old.pk).exists())
+
+            self.assertEqual(retention.prune_alerts(cutoff, chunk=10, archive_dir="/tmp/no-usado", pause=0), 1)
+        archive.assert_called_once()
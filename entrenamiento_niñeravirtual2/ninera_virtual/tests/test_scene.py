@@ -0,0 +1,46 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from deteccion.legacy.batch import DetectionBatch
+from deteccion.legacy.scene import SceneMapRegistry, StaticSceneMap, is_static_label
+
+
+def _frame(value: int) -> np.ndarray:
+    return np.full((90, 160, 3), value, dtype=np.uint8)
+
+
+class StaticSceneMapTests(SimpleTestCase):
+    def test_refreshes_after_refresh_sec(self) -> None:
+        scene = StaticSceneMap(refresh_sec=10, change_thr=255)
+        frame = _frame(100)
+        self.assertTrue(scene.needs_refresh(frame, now=0.0))
+
+        scene.update(frame, DetectionBatch.empty(), now=0.0)
+        self.assertFalse(scene.needs_refresh(frame, now=9.9))
+        self.assertTrue(scene.needs_refresh(frame, now=10.0))
+        self.assertEqual(scene.refreshes, 1)
+
+    def test_refreshes_when_thumbnail_changes(self) -> None:
+        scene = StaticSceneMap(refresh_sec=3600, change_thr=18)
+        scene.update(_frame(100), DetectionBatch.empty(), now=0.0)
+
+        self.assertFalse(scene.needs_refresh(_frame(110), now=1.0))
+        self.assertTrue(scene.needs_refresh(_frame(130), now=1.0))
+
+    def test_static_labels_accept_raw_and_coco_names(self) -> None:
+        for label in ("mesa", "Escaleras", "horno", "chair", "dining table", "oven"):
+            self.assertTrue(is_static_label(label), label)
+        for label in ("nino", "person", "knife", "", None):
+            self.assertFalse(is_static_label(label), label)
+
+
+class SceneMapRegistryTests(SimpleTestCase):
+    def test_one_map_per_camera_until_reset(self) -> None:
+        registry = SceneMapRegistry()
+        sala = registry.get("sala")
+        self.assertIs(registry.get("sala"), sala)
+        self.assertIsNot(registry.get("cocina"), sala)
+
+        registry.reset("sala")
+        registry.reset("inexistente")
+        self.assertIsNot(registry.get("sala"), sala)
@@ -0,0 +1,113 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from deteccion.legacy.scheduler import InferenceScheduler, RateMeter
+
+
+class LatestFrame:
+    """Fuente como la de las cámaras: guarda solo el último frame y lo entrega una vez."""
+
+    def __init__(self, frame=None):
+        self.frame = frame
+
+    def put(self, frame) -> None:
+        self.frame = frame
+
+    def __call__(self):
+        frame, self.frame = self.frame, None
+        return frame
+
+
+class InferenceSchedulerTests(SimpleTestCase):
+    def test_round_robin_across_cameras(self) -> None:
+        scheduler = InferenceScheduler(lambda cam, frame: None, workers=1)
+        for cam in ("a", "b", "c"):
+            scheduler.register(cam, lambda cam=cam: f"{cam}-frame")
+
+        picked = []
+        for _ in range(6):
+            cam, _frame = scheduler._pick()
+            picked.append(cam)
+            scheduler._done(cam, None)
+        self.assertEqual(picked, ["a", "b", "c", "a", "b", "c"])
+
+    def test_one_frame_in_flight_and_newest_wins(self) -> None:
+        scheduler = InferenceScheduler(lambda cam, frame: None, workers=2)
+        source = LatestFrame("f1")
+        scheduler.register("sala", source)
+
+        self.assertEqual(scheduler._pick(), ("sala", "f1"))
+        source.put("f2")
+        source.put("f3")
+        self.assertIsNone(scheduler._pick())
+
+        scheduler._done("sala", 5.0)
+        self.assertEqual(scheduler._pick(), ("sala", "f3"))
+        self.assertIsNone(scheduler._pick())
+
+    def test_pool_never_exceeds_workers(self) -> None:
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0, "calls": 0}
+
+        def process(cam, frame):
+            with lock:
+                state["running"] += 1
+                state["calls"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+
+        scheduler = InferenceScheduler(process, workers=2, idle_sleep=0.001)
+        for cam in "abcd":
+            scheduler.register(cam, lambda: object())
+        scheduler.start()
+        try:
+            deadline = time.monotonic() + 2
+            while state["calls"] < 20 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            scheduler.stop()
+
+        self.assertGreaterEqual(state["calls"], 20)
+        self.assertEqual(state["peak"], 2)
+        self.assertEqual(set(scheduler.stats()), set("abcd"))
+
+    def test_stop_while_dispatch_is_still_picking(self) -> None:
+        picking, release = threading.Event(), threading.Event()
+
+        def slow_source():
+            picking.set()
+            release.wait(2)
+            return object()
+
+        scheduler = InferenceScheduler(lambda cam, frame: None, workers=1)
+        scheduler.register("sala", slow_source)
+        scheduler.start()
+        thread = scheduler._thread
+        self.assertTrue(picking.wait(2))
+        scheduler.stop(timeout=0.05)  # el join vence con el despacho a mitad de _pick
+        self.assertIsNone(scheduler._pool)
+
+        release.set()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(scheduler._inflight, set())
+
+
+class RateMeterTests(SimpleTestCase):
+    def test_exponential_moving_average(self) -> None:
+        meter = RateMeter(alpha=0.2)
+        meter.tick(0.0, 10.0)
+        self.assertEqual((meter.fps, meter.busy_ms), (0.0, 10.0))
+
+        meter.tick(0.1, 20.0)
+        self.assertAlmostEqual(meter.fps, 10.0)
+        self.assertAlmostEqual(meter.busy_ms, 12.0)
+
+        meter.tick(0.3, 20.0)
+        self.assertAlmostEqual(meter.fps, 9.0)
+        self.assertAlmostEqual(meter.busy_ms, 13.6)
+        self.assertEqual(meter.count, 3)
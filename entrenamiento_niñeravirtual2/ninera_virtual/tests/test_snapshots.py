@@ -0,0 +1,46 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from deteccion.legacy.snapshots import SnapshotWriter
+
+
+class SnapshotWriterTests(SimpleTestCase):
+    def test_retention_keeps_newest_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(3):
+                path = os.path.join(tmp, f"old_{i}.jpg")
+                with open(path, "wb") as fh:
+                    fh.write(b"x" * 10)
+                os.utime(path, (1000 + i, 1000 + i))
+
+            writer = SnapshotWriter(tmp, max_files=4, max_bytes=0, max_age_sec=0).start()
+            self.assertEqual(writer.stats()["files"], 3)
+
+            frame = np.zeros((8, 8, 3), dtype=np.uint8)
+            paths = [writer.submit(frame, "Cámara 1") for _ in range(3)]
+            writer.stop()
+
+            remaining = sorted(os.listdir(tmp))
+            self.assertEqual(len(remaining), 4)
+            self.assertNotIn("old_0.jpg", remaining)
+            self.assertNotIn("old_1.jpg", remaining)
+            self.assertTrue(all(os.path.exists(p) for p in paths))
+            self.assertEqual(writer.stats()["evicted"], 2)
+
+    def test_idle_writer_still_expires_old_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = SnapshotWriter(tmp, max_files=0, max_bytes=0, max_age_sec=60).start()
+            path = os.path.join(tmp, "vieja.jpg")
+            with open(path, "wb") as fh:
+                fh.write(b"x")
+            writer._index.append((time.time() - 120, path, 1))
+            deadline = time.monotonic() + 5
+            while os.path.exists(path) and time.monotonic() < deadline:
+                time.sleep(0.1)
+            writer.stop()
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(writer.stats()["evicted"], 1)
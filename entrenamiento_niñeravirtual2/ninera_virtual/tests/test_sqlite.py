@@ -0,0 +1,63 @@
+import gc
+import os
+import sqlite3
+import tempfile
+import threading
+
+from django.test import SimpleTestCase
+
+from deteccion.legacy.config import DatabaseConnection, UserRepository
+from deteccion.legacy.sqlite import ThreadLocalConnections
+
+
+class LegacySqliteTests(SimpleTestCase):
+    def test_per_thread_tuned_connections(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseConnection(os.path.join(tmp, "users.db"))
+            repo = UserRepository(db)
+            self.assertEqual(db.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+            seen, errors = [], []
+
+            def register(i: int) -> None:
+                try:
+                    repo.create_user(f"u{i}", f"u{i}@x.co", "secreto")
+                    seen.append(db.conn)
+                except Exception as e:  # pragma: no cover - solo si falla
+                    errors.append(e)
+
+            threads = [threading.Thread(target=register, args=(i,)) for i in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(len({id(c) for c in seen + [db.conn]}), 5)
+            self.assertIsNotNone(repo.verify_credentials("U3@x.co", "secreto"))
+            db.connections.close_all()
+
+    def test_connections_of_finished_threads_are_closed(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = ThreadLocalConnections(os.path.join(tmp, "users.db"))
+            main = pool.get()
+            opened = []
+
+            def work() -> None:
+                conn = pool.get()
+                conn.execute("SELECT 1")
+                opened.append(conn)
+
+            for _ in range(20):
+                t = threading.Thread(target=work)
+                t.start()
+                t.join()
+            gc.collect()
+
+            self.assertEqual(len(opened), 20)
+            self.assertEqual(len(pool), 1)
+            with self.assertRaises(sqlite3.ProgrammingError):
+                opened[0].execute("SELECT 1")
+            self.assertIs(pool.get(), main)
+            pool.close_all()
+            self.assertEqual(len(pool), 0)
@@ -0,0 +1,59 @@
+import json
+from unittest import mock
+
+from django.test import TestCase
+
+from deteccion.models import Zone
+from deteccion.services import zones
+from deteccion.services.zones import ZONE_CACHE, compile_zone, zones_hit
+
+
+class ZoneCacheTests(TestCase):
+    def setUp(self) -> None:
+        ZONE_CACHE.invalidate()
+        session = self.client.session
+        session["legacy_user"] = {"id": 1, "name": "Test", "email": "t@example.com"}
+        session.save()
+
+    def test_zones_hit_uses_normalized_points(self) -> None:
+        zone = compile_zone("cocina", [(0.0, 0.0), (0.5, 0.0), (0.5, 0.5), (0.0, 0.5)])
+
+        self.assertEqual(zones_hit([zone], [(10, 10, 40, 40)], 200, 100), ["cocina"])
+        self.assertEqual(zones_hit([zone], [(150, 60, 190, 90)], 200, 100), [])
+
+    def test_api_create_invalidates_cache(self) -> None:
+        self.assertEqual(ZONE_CACHE.get("cam1"), ())
+
+        resp = self.client.post(
+            "/api/zones/",
+            data=json.dumps({"camera": "cam1", "name": "Escalera", "points": [[0, 0], [1, 0], [1, 1]]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(resp.status_code, 201)
+        self.assertIsNone(ZONE_CACHE.peek("cam1"))
+        self.assertEqual([z.name for z in ZONE_CACHE.get("cam1")], ["escalera"])
+        self.assertEqual(Zone.objects.get().name, "escalera")
+
+    def test_load_racing_invalidate_is_not_cached(self) -> None:
+        Zone.objects.create(camera="cam1", name="escalera", points=[[0, 0], [1, 0], [1, 1]])
+
+        def edited_meanwhile(name, points):
+            ZONE_CACHE.invalidate("cam1")
+            return compile_zone(name, points)
+
+        with mock.patch.object(zones, "compile_zone", side_effect=edited_meanwhile):
+            self.assertEqual([z.name for z in ZONE_CACHE.load("cam1")], ["escalera"])
+        self.assertIsNone(ZONE_CACHE.peek("cam1"))
+
+        ZONE_CACHE.load("cam1")
+        self.assertIsNotNone(ZONE_CACHE.peek("cam1"))
+
+    def test_api_rejects_invalid_points(self) -> None:
+        resp = self.client.post(
+            "/api/zones/",
+            data=json.dumps({"camera": "cam1", "name": "x", "points": [[0, 0], [2, 0], [1, 1]]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(resp.status_code, 400)